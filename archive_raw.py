@@ -0,0 +1,35 @@
+import argparse
+
+from db.connection import get_connection
+from db.schema import ensure_schema
+from services.raw_store import RAW_TABLES, archive_raw_json
+
+
+def archive(tables=tuple(RAW_TABLES), batch_size: int = 1000) -> None:
+    """
+    raw_json이 남아있는 옛 row를 raw_payloads(압축, 중복 제거)로 옮기고 raw_json을 비움
+    (batch마다 commit하므로 중단 후 다시 실행하면 남은 row부터 이어서 진행)
+    """
+    conn = get_connection()
+    try:
+        ensure_schema(conn)
+        for table in tables:
+            moved = archive_raw_json(conn, table, batch_size=batch_size)
+            print(f"{table}: {moved}건 이전")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "tables",
+        nargs="*",
+        help=f"이전할 테이블 {sorted(RAW_TABLES)} (기본: 전부)",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    unknown = set(args.tables) - set(RAW_TABLES)
+    if unknown:
+        parser.error(f"알 수 없는 테이블: {', '.join(sorted(unknown))}")
+    archive(args.tables or tuple(RAW_TABLES), batch_size=args.batch_size)
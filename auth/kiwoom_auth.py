@@ -1,18 +1,123 @@
-import requests
-from config.settings import Settings
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
 
+from config.accounts import Account, get_account
+from config.settings import BASE_DIR, get_settings
 
-def get_access_token() -> str:
-    settings = Settings()
-    url = f"{settings.BASE_URL}/oauth2/token"
+from clients.client import get_session
+
+KST = ZoneInfo("Asia/Seoul")
+
+# 발급받은 토큰을 실행 간에 재사용하기 위한 로컬 캐시 파일
+TOKEN_CACHE_PATH = BASE_DIR / ".token_cache.json"
+
+# 만료 직전 토큰으로 요청하다 실패하지 않도록 이 시간만큼 일찍 재발급
+REFRESH_MARGIN = timedelta(minutes=5)
+
+# 프로세스 내 캐시: app_key_hash -> {"token", "expires_dt"(YYYYMMDDHHMMSS, KST), "app_key_hash"}
+# (캐시 파일도 같은 형태로 계좌별 토큰을 함께 보관)
+_cached: Dict[str, dict] = {}
+_cache_lock = threading.Lock()  # 캐시 파일 읽고-고쳐-쓰기 (계좌 공용 파일)
+
+# app_key_hash별 발급 lock: 같은 계좌 토큰을 여러 스레드가 동시에 재발급하지 않도록
+_issue_locks: Dict[str, threading.Lock] = {}
+_issue_locks_lock = threading.Lock()
+
+
+def _app_key_hash(app_key: str) -> str:
+    # APP_KEY가 바뀌면 이전 계정 토큰을 쓰지 않도록 캐시에 key hash를 같이 저장
+    return hashlib.sha256(app_key.encode()).hexdigest()[:16]
+
+
+def _is_valid(entry: Optional[dict], app_key_hash: str) -> bool:
+    if not entry or entry.get("app_key_hash") != app_key_hash:
+        return False
+    try:
+        expires_at = datetime.strptime(entry["expires_dt"], "%Y%m%d%H%M%S")
+    except (KeyError, TypeError, ValueError):
+        return False
+    return datetime.now(KST) < expires_at.replace(tzinfo=KST) - REFRESH_MARGIN
+
+
+def _read_cache() -> Dict[str, dict]:
+    try:
+        with open(TOKEN_CACHE_PATH, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _write_cache(entries: Dict[str, dict]) -> None:
+    # 토큰이 담긴 파일이므로 소유자만 읽을 수 있게, tmp 파일 -> rename 으로 원자적 교체
+    tmp_path = f"{TOKEN_CACHE_PATH}.tmp"
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, TOKEN_CACHE_PATH)
+    except OSError as e:
+        print(f"WARN: token cache 저장 실패: {e}")
+
+
+def _issue_lock(key_hash: str) -> threading.Lock:
+    with _issue_locks_lock:
+        return _issue_locks.setdefault(key_hash, threading.Lock())
+
+
+def _issue_token(account: Account) -> dict:
+    url = f"{get_settings().BASE_URL}/oauth2/token"
 
     payload = {
         "grant_type": "client_credentials",
-        "appkey": settings.APP_KEY,
-        "secretkey": settings.SECRET_KEY,
+        "appkey": account.app_key,
+        "secretkey": account.secret_key,
     }
 
-    response = requests.post(url, json=payload)
+    response = get_session().post(url, json=payload, timeout=10.0)
     response.raise_for_status()
 
-    return response.json()["token"]
+    data = response.json()
+    return {"token": data["token"], "expires_dt": data["expires_dt"]}
+
+
+def get_access_token(
+    force_refresh: bool = False, account: Optional[Account] = None
+) -> str:
+    """
+    계좌(기본: 첫 번째 계좌)의 유효한 접근 토큰 반환
+    메모리 -> 로컬 캐시 파일 순으로 찾고, 없거나 만료 임박(REFRESH_MARGIN)이면 새로 발급
+    """
+    account = account or get_account()
+    key_hash = _app_key_hash(account.app_key)
+
+    if not force_refresh:
+        entry = _cached.get(key_hash)
+        if _is_valid(entry, key_hash):
+            return entry["token"]
+
+    # 확인 -> 발급 -> 저장을 계좌별 lock 안에서 (기다리는 동안 다른 스레드가 발급했으면 그 토큰 사용)
+    with _issue_lock(key_hash):
+        if not force_refresh:
+            entry = _cached.get(key_hash)
+            if _is_valid(entry, key_hash):
+                return entry["token"]
+            entry = _read_cache().get(key_hash)
+            if _is_valid(entry, key_hash):
+                _cached[key_hash] = entry
+                return entry["token"]
+
+        entry = _issue_token(account)
+        entry["app_key_hash"] = key_hash
+        _cached[key_hash] = entry
+        with _cache_lock:
+            # 다른 계좌 토큰은 유지한 채 이 계좌만 교체
+            cache = _read_cache()
+            cache[key_hash] = entry
+            _write_cache(cache)
+    return entry["token"]
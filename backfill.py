@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from clients.rest import fetch_history_async
+from config.accounts import Account, load_accounts
+from db.connection import get_connection
+from db.schema import ensure_schema
+from services.backfill_service import (
+    iter_trading_days,
+    load_completed_days,
+    save_backfill_day,
+)
+from services.portfolio_service import update_portfolio_daily
+from services.position_service import build_positions
+
+if TYPE_CHECKING:
+    import httpx
+
+
+async def _fetch_day(
+    day: str, client: httpx.AsyncClient, sem: asyncio.Semaphore, account: Account
+) -> tuple:
+    async with sem:
+        return day, await fetch_history_async(day, client, account=account)
+
+
+async def _run(days, conn, concurrency: int, bulk: bool, account: Account) -> None:
+    """
+    최대 concurrency일을 동시에 조회하고, 조회가 끝난 날부터 하나씩 저장
+    (DB 연결은 하나라 저장은 순차, 저장하는 동안에도 다른 날 조회는 계속 진행)
+    """
+    # httpx는 import 비용이 커서 실제로 조회할 때 불러옴
+    import httpx
+
+    sem = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient() as client:
+        tasks = [asyncio.create_task(_fetch_day(d, client, sem, account)) for d in days]
+        try:
+            for done, fut in enumerate(asyncio.as_completed(tasks), start=1):
+                day, fetched = await fut
+                counts = await asyncio.to_thread(
+                    save_backfill_day, conn, day, fetched, bulk, account.name
+                )
+                print(f"[{account.name} {done}/{len(tasks)}] {day} 저장 완료 {counts}")
+        finally:
+            for t in tasks:
+                t.cancel()
+
+
+def backfill(
+    start_date: str,  # YYYYMMDD
+    end_date: str,  # YYYYMMDD
+    concurrency: int = 4,
+    workers: int = 1,
+    bulk: bool = False,
+    redo: bool = False,
+) -> None:
+    """
+    start_date ~ end_date 일자별 실현손익 / 체결내역 백필 (설정된 계좌를 차례로)
+    - 완료한 날짜는 계좌별로 backfill_progress에 기록해 중단 후 재실행 시 이어서 진행
+      (redo=True면 전부 다시)
+    - lot_matches / position_episodes 는 계좌마다 마지막에 한 번만 갱신
+      (과거 체결이 들어오면 checkpoint 이전 trade로 감지되어 자동 full rebuild)
+    - portfolio_daily 도 계좌마다 마지막에 처음부터 다시 계산
+      (과거 날짜 실현손익이 들어오면 이후 row의 누적 실현손익이 모두 바뀜)
+    """
+    conn = get_connection(local_infile=bulk)
+    try:
+        ensure_schema(conn)
+        for account in load_accounts():
+            days = list(iter_trading_days(start_date, end_date))
+            if not redo:
+                completed = load_completed_days(
+                    conn, start_date, end_date, account=account.name
+                )
+                days = [d for d in days if d not in completed]
+            print(f"{account.name} 백필 대상 {len(days)}일 ({start_date} ~ {end_date})")
+
+            if days:
+                asyncio.run(_run(days, conn, concurrency, bulk, account))
+
+            build_positions(
+                conn,
+                end_date=end_date,
+                workers=workers,
+                bulk=bulk,
+                account=account.name,
+            )
+            update_portfolio_daily(
+                conn,
+                datetime.strptime(end_date, "%Y%m%d").date(),
+                account=account.name,
+                rebuild=True,
+            )
+        print("백필 완료")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("start_date", help="시작일 YYYYMMDD")
+    parser.add_argument(
+        "end_date",
+        nargs="?",
+        default=datetime.now().strftime("%Y%m%d"),
+        help="종료일 YYYYMMDD (기본: 오늘)",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="동시에 조회할 일자 수"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="종목별 병렬 재생 프로세스 수 (position 재생성 단계)",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="체결내역 / lot_matches 를 LOAD DATA LOCAL INFILE 로 적재",
+    )
+    parser.add_argument(
+        "--redo",
+        action="store_true",
+        help="backfill_progress 를 무시하고 구간 전체를 다시 저장",
+    )
+    args = parser.parse_args()
+    backfill(
+        args.start_date,
+        args.end_date,
+        concurrency=args.concurrency,
+        workers=args.workers,
+        bulk=args.bulk,
+        redo=args.redo,
+    )
@@ -0,0 +1,76 @@
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# 실행 진입점 + 노트북 / 테스트에서 주로 import 하는 모듈
+ENTRY_POINTS = (
+    "main",
+    "backfill",
+    "daemon",
+    "realtime",
+    "archive_raw",
+    "clients.rest",
+    "services.asset_service",
+    "services.position_service",
+    "utils.krx_calendar",
+)
+
+
+def measure(module: str) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    새 인터프리터에서 module을 import 하는 비용 (python -X importtime)
+    return: (누적 us, [(누적 us, module이 직접 import 한 모듈)] 큰 순)
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    # importtime은 하위 모듈을 먼저 출력하므로 module 줄 직전의 한 단계 들여쓴 줄들이 직접 의존 모듈
+    children: List[Tuple[int, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[12:].split("|")
+        us, name = int(cumulative), name[1:].rstrip()
+        if not name.startswith(" "):
+            if name == module:
+                return us, sorted(children, reverse=True)
+            children = []
+        elif not name.startswith("   "):
+            children.append((us, name.strip()))
+    raise RuntimeError(f"{module} importtime 결과 없음 (이미 import 된 모듈?)")
+
+
+def bench(modules=ENTRY_POINTS, repeat: int = 3, show: int = 5) -> None:
+    """
+    모듈별 import 시간 (repeat번 중 최솟값)과 가장 무거운 의존 모듈 출력
+    """
+    for module in modules:
+        try:
+            runs = [measure(module) for _ in range(repeat)]
+        except RuntimeError as e:
+            print(f"{module:<28} import 실패: {e}")
+            continue
+        total, heaviest = min(runs)
+        deps = ", ".join(f"{name} {us / 1000:.1f}ms" for us, name in heaviest[:show])
+        print(f"{module:<28} {total / 1000:8.1f}ms  {deps}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", help="측정할 모듈 (기본: 진입점 전체)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--show", type=int, default=5, help="모듈별로 보여줄 무거운 의존 모듈 수"
+    )
+    args = parser.parse_args()
+    bench(args.modules or ENTRY_POINTS, repeat=args.repeat, show=args.show)
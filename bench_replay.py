@@ -0,0 +1,275 @@
+import argparse
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.position_service import (
+    LifoLotMatcher,
+    LotStack,
+    _decode_trade,
+    _side_from_io,
+)
+
+# LIFO 매칭 hot loop 벤치마크 + 동일성 검증 (DB 없이 메모리에서)
+#   python bench_replay.py --fills 45000
+# 현재 구현(정수 고정소수점 / epoch 초)과 이전 Decimal / datetime 구현을 같은 합성 체결로 재생해
+# lot_matches에 기록될 row가 전부 같은지 확인하고 걸린 시간을 비교
+# (양쪽 모두 decode -> 매칭 -> 기록할 row tuple 까지, DB 쓰기는 제외)
+
+
+# ---- 이전 구현 (user-004 이전 position_service의 decode / LIFO hot loop 그대로) ----
+
+
+def _ref_to_int(x: Any, default: int = 0) -> int:
+    if x is None:
+        return default
+    if isinstance(x, int):
+        return x
+    s = str(x).strip()
+    if s == "":
+        return default
+    return int(s)
+
+
+def _ref_to_decimal(x: Any, default: Decimal = Decimal("0")) -> Decimal:
+    if x is None:
+        return default
+    if isinstance(x, Decimal):
+        return x
+    s = str(x).strip()
+    if s == "":
+        return default
+    return Decimal(s)
+
+
+def _ref_combine_dt(trade_date, ord_tm: Optional[str]) -> datetime:
+    if hasattr(trade_date, "strftime"):
+        d = trade_date.strftime("%Y-%m-%d")
+    else:
+        d = str(trade_date)
+    t = (ord_tm or "00:00:00").strip()
+    if len(t) != 8:
+        t = "00:00:00"
+    return datetime.fromisoformat(f"{d} {t}")
+
+
+@dataclass
+class _RefLot:
+    buy_source_id: int
+    buy_dt: datetime
+    buy_px: Decimal
+    remaining_qty: int
+    stk_cd: str
+    stk_nm: str
+    crd_class: str
+
+
+@dataclass
+class _RefTrade:
+    source_id: int
+    dt: datetime
+    stk_cd: str
+    stk_nm: str
+    crd_class: str
+    side: str
+    qty: int
+    px: Decimal
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.stk_cd, self.crd_class)
+
+
+def _ref_decode(row: Tuple) -> Optional[_RefTrade]:
+    source_id, trade_date, ord_tm, stk_cd, stk_nm, crd_class, io_tp_nm, q, px = row
+    side = _side_from_io(io_tp_nm)
+    if side is None:
+        return None
+    qty = _ref_to_int(q, 0)
+    if qty <= 0:
+        return None
+    return _RefTrade(
+        source_id=_ref_to_int(source_id),
+        dt=_ref_combine_dt(trade_date, ord_tm),
+        stk_cd=(stk_cd or "").strip(),
+        stk_nm=(stk_nm or "").strip(),
+        crd_class=(crd_class or "").strip(),
+        side=side,
+        qty=qty,
+        px=_ref_to_decimal(px),
+    )
+
+
+def _reference_rows(rows: List[Tuple]) -> List[Tuple]:
+    """
+    이전 구현으로 재생 -> lot_matches에 기록할 row 목록
+    """
+    stacks: Dict[Tuple[str, str], List[_RefLot]] = {}
+    pending: List[Tuple] = []
+    for row in rows:
+        trade = _ref_decode(row)
+        if trade is None:
+            continue
+        stack = stacks.setdefault(trade.key, [])
+        if trade.side == "BUY":
+            stack.append(
+                _RefLot(
+                    buy_source_id=trade.source_id,
+                    buy_dt=trade.dt,
+                    buy_px=trade.px,
+                    remaining_qty=trade.qty,
+                    stk_cd=trade.stk_cd,
+                    stk_nm=trade.stk_nm,
+                    crd_class=trade.crd_class,
+                )
+            )
+            continue
+        to_close = trade.qty
+        while to_close > 0 and stack:
+            lot = stack[-1]
+            match_qty = min(lot.remaining_qty, to_close)
+            pnl = (trade.px - lot.buy_px) * Decimal(match_qty)
+            holding_seconds = int((trade.dt - lot.buy_dt).total_seconds())
+            pending.append(
+                (
+                    trade.stk_cd,
+                    trade.stk_nm,
+                    trade.crd_class,
+                    lot.buy_source_id,
+                    trade.source_id,
+                    lot.buy_dt,
+                    trade.dt,
+                    lot.buy_px,
+                    trade.px,
+                    match_qty,
+                    pnl,
+                    holding_seconds,
+                    holding_seconds // 86400,
+                )
+            )
+            lot.remaining_qty -= match_qty
+            to_close -= match_qty
+            if lot.remaining_qty == 0:
+                stack.pop()
+    return pending
+
+
+# ---- 현재 구현 ----
+
+
+class _Collector:
+    # LifoLotMatcher.flush가 BulkLoader에 넘기는 row를 그대로 모음
+    def __init__(self) -> None:
+        self.rows: List[Tuple] = []
+
+    def add_rows(self, rows) -> None:
+        self.rows.extend(rows)
+
+
+def _current_rows(rows: List[Tuple]) -> List[Tuple]:
+    matcher = LifoLotMatcher()
+    matcher.loader = _Collector()
+    stacks = matcher.stacks
+    for row in rows:
+        trade = _decode_trade(row)
+        if trade is None:
+            continue
+        if trade.key not in stacks:
+            stacks[trade.key] = LotStack()
+        matcher.on_trade(trade)
+    matcher.flush(None)
+    return [r[:-1] for r in matcher.loader.rows]  # 끝의 account 제외
+
+
+def make_fills(n: int, seed: int = 1, per_day: int = 60) -> List[Tuple]:
+    """
+    account_trade_history 재생 row 형태의 합성 체결 n건 (trade_date, ord_tm, id 순)
+    소수 가격 / 수량 0 / 매수·매도 판정 불가 / ord_tm 없음 row도 섞음
+    """
+    rnd = random.Random(seed)
+    held = {}
+    rows = []
+    day = date(2023, 1, 2)
+    for i in range(1, n + 1):
+        if i % per_day == 0:
+            day += timedelta(days=1)
+        key = (
+            rnd.choice(["A005930", "A000660", "A035420", "068270"]),
+            rnd.choice(["CASH", "CREDIT", ""]),
+        )
+        if held.get(key, 0) > 0 and rnd.random() < 0.45:
+            qty = rnd.randint(1, held[key] + 3)
+            side = rnd.choice(["현금매도", "융자매도상환"])
+            held[key] = max(0, held[key] - qty)
+        else:
+            qty = rnd.randint(1, 50)
+            side = rnd.choice(["현금매수", "시간외신용매수"])
+            held[key] = held.get(key, 0) + qty
+        px = str(rnd.randint(500, 900) * 100)
+        if rnd.random() < 0.01:
+            px += ".5"
+        if rnd.random() < 0.005:
+            side = "정정"
+        tm = f"{rnd.randint(9, 15):02d}:{rnd.randint(0, 59):02d}:{rnd.randint(0, 59):02d}"
+        rows.append(
+            (
+                i,
+                day,
+                None if rnd.random() < 0.002 else tm,
+                key[0],
+                "*종목" + key[0][-2:],
+                key[1],
+                side,
+                "0" if rnd.random() < 0.002 else str(qty),
+                px,
+            )
+        )
+    rows.sort(key=lambda r: (r[1], r[2] or "", r[0]))
+    return rows
+
+
+def _as_written(row: Tuple) -> Tuple:
+    # 이전 구현은 datetime, 현재는 같은 값의 'YYYY-MM-DD HH:MM:SS' 문자열을 DATETIME 컬럼에 기록
+    return tuple(str(v) if isinstance(v, datetime) else v for v in row)
+
+
+def _timed(fn, rows: List[Tuple], repeat: int) -> Tuple[float, Any]:
+    best: Optional[float] = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(rows)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench(fills: int = 45000, seed: int = 1, repeat: int = 3) -> bool:
+    """
+    return: 두 구현의 lot_matches row가 전부 같은지
+    """
+    rows = make_fills(fills, seed)
+    ref_time, ref = _timed(_reference_rows, rows, repeat)
+    cur_time, cur = _timed(_current_rows, rows, repeat)
+    same = [_as_written(r) for r in ref] == cur
+    print(f"fills {len(rows)}, lot_matches {len(cur)} rows, 동일: {same}")
+    print(f"이전 Decimal/datetime  {ref_time:.3f}s")
+    print(f"현재                   {cur_time:.3f}s  ({ref_time / cur_time:.2f}x)")
+    if not same:
+        for i, (a, b) in enumerate(zip(map(_as_written, ref), cur)):
+            if a != b:
+                print(f"첫 차이 #{i}\n  이전 {a}\n  현재 {b}")
+                break
+    return same
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fills", type=int, default=45000, help="합성 체결 수")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="구현별 반복 (최솟값)")
+    args = parser.parse_args()
+    raise SystemExit(0 if bench(args.fills, args.seed, args.repeat) else 1)
@@ -1,13 +1,43 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from dataclasses import dataclass
-from typing import Any, Mapping, Optional
+from typing import TYPE_CHECKING, Any, Mapping, Optional
 from urllib.parse import urljoin
 
-import requests
-from config.settings import Settings
+from config.accounts import DEFAULT_ACCOUNT
+from config.settings import get_settings
 
-settings = Settings()
+from clients import throttle
+
+# requests / httpx는 import 비용이 커서 실제로 요청할 때 불러옴
+if TYPE_CHECKING:
+    import httpx
+    import requests
+
+# 같은 호스트(BASE_URL)로만 요청하므로 keep-alive 연결 몇 개면 충분
+POOL_MAXSIZE = 4
+
+_session: Optional[requests.Session] = None
+
+
+def get_session() -> requests.Session:
+    """
+    프로세스 전체에서 공유하는 keep-alive requests.Session
+    (연속조회 페이지마다 TCP/TLS 연결을 새로 맺지 않도록)
+    """
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _session = session
+    return _session
 
 
 class ApiError(RuntimeError):
@@ -21,6 +51,11 @@ class ApiResponse:
     headers: Mapping[str, str]
 
 
+def _api_id(headers: Optional[Mapping[str, str]]) -> str:
+    # 호출 한도는 kiwoom api-id 단위 (oauth 등 api-id 없는 요청은 "default")
+    return (headers or {}).get("api-id", "default")
+
+
 def request_json(
     method: str,
     path: str,
@@ -28,26 +63,128 @@ def request_json(
     headers: Optional[Mapping[str, str]] = None,
     json_body: Optional[Mapping[str, Any]] = None,
     timeout: float = 10.0,
+    account: str = DEFAULT_ACCOUNT,
+) -> ApiResponse:
+    """
+    account: 호출 한도(clients.throttle)를 나눠 쓰는 계좌 이름
+    """
+    import requests
+
+    request_url = urljoin(get_settings().BASE_URL, path)
+    api_id = _api_id(headers)
+    attempt = 0
+    while True:
+        throttle.acquire(api_id, account)
+        try:
+            resp = get_session().request(
+                method=method,
+                url=request_url,
+                headers=dict(headers) if headers else None,
+                json=json_body,
+                timeout=timeout,
+            )
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ) as e:
+            delay = throttle.retry_delay(api_id, attempt, account=account)
+            if delay is None:
+                raise ApiError(f"요청 실패: {e}") from e
+            time.sleep(delay)
+            attempt += 1
+            continue
+        except requests.exceptions.RequestException as e:
+            raise ApiError(f"요청 실패: {e}") from e
+
+        if resp.status_code in throttle.RETRYABLE_STATUS:
+            delay = throttle.retry_delay(
+                api_id, attempt, resp.headers.get("Retry-After"), account=account
+            )
+            if delay is not None:
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+        try:
+            resp.raise_for_status()
+            return ApiResponse(
+                data=resp.json(), status_code=resp.status_code, headers=resp.headers
+            )
+        except requests.exceptions.HTTPError as e:
+            text_snippet = e.response.text[:500] if e.response is not None else ""
+            raise ApiError(f"HTTP 오류: {e} | body={text_snippet}") from e
+
+        except ValueError as e:
+            raise ApiError(f"JSON 파싱 실패: {e} | body={resp.text[:500]}") from e
+
+
+async def request_json_async(
+    method: str,
+    path: str,
+    *,
+    headers: Optional[Mapping[str, str]] = None,
+    json_body: Optional[Mapping[str, Any]] = None,
+    timeout: float = 10.0,
+    client: Optional[httpx.AsyncClient] = None,
+    account: str = DEFAULT_ACCOUNT,
 ) -> ApiResponse:
-    request_url = urljoin(settings.BASE_URL, path)
-    try:
-        resp = requests.request(
-            method=method,
-            url=request_url,
-            headers=dict(headers) if headers else None,
-            json=json_body,
-            timeout=timeout,
-        )
-        resp.raise_for_status()
-        return ApiResponse(
-            data=resp.json(), status_code=resp.status_code, headers=resp.headers
-        )
-    except requests.exceptions.HTTPError as e:
-        text_snippet = e.response.text[:500] if e.response is not None else ""
-        raise ApiError(f"HTTP 오류: {e} | body={text_snippet}") from e
-
-    except requests.exceptions.RequestException as e:
-        raise ApiError(f"요청 실패: {e}") from e
-
-    except ValueError as e:
-        raise ApiError(f"JSON 파싱 실패: {e} | body={resp.text[:500]}") from e
+    """
+    request_json의 asyncio 버전 (httpx)
+    client를 넘기면 연결을 재사용하고, 없으면 호출마다 임시 client를 만든다.
+    """
+    import httpx
+
+    request_url = urljoin(get_settings().BASE_URL, path)
+    if client is None:
+        async with httpx.AsyncClient() as tmp_client:
+            return await request_json_async(
+                method,
+                path,
+                headers=headers,
+                json_body=json_body,
+                timeout=timeout,
+                client=tmp_client,
+                account=account,
+            )
+
+    api_id = _api_id(headers)
+    attempt = 0
+    while True:
+        await throttle.acquire_async(api_id, account)
+        try:
+            resp = await client.request(
+                method,
+                request_url,
+                headers=dict(headers) if headers else None,
+                json=json_body,
+                timeout=timeout,
+            )
+        except httpx.TransportError as e:
+            delay = throttle.retry_delay(api_id, attempt, account=account)
+            if delay is None:
+                raise ApiError(f"요청 실패: {e}") from e
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        except httpx.RequestError as e:
+            raise ApiError(f"요청 실패: {e}") from e
+
+        if resp.status_code in throttle.RETRYABLE_STATUS:
+            delay = throttle.retry_delay(
+                api_id, attempt, resp.headers.get("Retry-After"), account=account
+            )
+            if delay is not None:
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+        try:
+            resp.raise_for_status()
+            return ApiResponse(
+                data=resp.json(), status_code=resp.status_code, headers=resp.headers
+            )
+        except httpx.HTTPStatusError as e:
+            raise ApiError(f"HTTP 오류: {e} | body={e.response.text[:500]}") from e
+
+        except ValueError as e:
+            raise ApiError(f"JSON 파싱 실패: {e} | body={resp.text[:500]}") from e
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Optional
+
+from auth.kiwoom_auth import get_access_token
+from config.settings import get_settings
+
+from clients.client import ApiError
+
+if TYPE_CHECKING:
+    from config.accounts import Account
+    from websockets.asyncio.client import ClientConnection
+
+# 실시간 등록 type: 주문체결
+ORDER_FILL_TYPE = "00"
+
+# 연결이 끊기면 full jitter 지수 백오프로 재접속 (접속에 성공하면 처음부터)
+RECONNECT_BASE = 1.0  # 초
+RECONNECT_CAP = 60.0  # 초
+
+
+async def _login(ws: ClientConnection, token: str) -> None:
+    await ws.send(json.dumps({"trnm": "LOGIN", "token": token}))
+    while True:
+        msg = json.loads(await ws.recv())
+        if msg.get("trnm") == "PING":
+            await ws.send(json.dumps(msg))
+            continue
+        if msg.get("trnm") != "LOGIN":
+            continue
+        if str(msg.get("return_code")) != "0":
+            raise ApiError(f"websocket LOGIN 실패: {msg.get('return_msg')}")
+        return
+
+
+async def iter_realtime_messages(
+    url: Optional[str] = None,
+    token: Optional[str] = None,
+    types: tuple = (ORDER_FILL_TYPE,),
+    account: Optional[Account] = None,
+    on_reconnect: Optional[Callable[[], None]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    SOCKET_URL에 접속해 LOGIN / REG 후 실시간 REAL 메시지를 그대로 yield
+    PING은 받은 그대로 돌려보내 연결을 유지
+    연결이 끊기면 백오프 후 다시 접속 (token을 안 주면 접속마다 account 토큰을 새로 받음)
+    on_reconnect: 재접속 후 LOGIN / REG 까지 끝나면 호출 (끊긴 동안 놓친 체결 따라잡기용)
+    url을 로컬 ws 서버(utils.ws_replay_server)로 주면 기록된 체결로 테스트 가능
+    """
+    from websockets.asyncio.client import connect
+    from websockets.exceptions import ConnectionClosed, InvalidHandshake
+
+    url = url or get_settings().SOCKET_URL
+    attempt = 0
+    connected = False
+    while True:
+        try:
+            async with connect(url) as ws:
+                await _login(ws, token or get_access_token(account=account))
+                await ws.send(
+                    json.dumps(
+                        {
+                            "trnm": "REG",
+                            "grp_no": "1",
+                            "refresh": "1",
+                            "data": [{"item": [""], "type": list(types)}],
+                        }
+                    )
+                )
+                if connected and on_reconnect is not None:
+                    on_reconnect()
+                connected = True
+                attempt = 0
+
+                async for raw in ws:
+                    msg = json.loads(raw)
+                    trnm = msg.get("trnm")
+                    if trnm == "PING":
+                        await ws.send(raw)
+                    elif trnm == "REG" and str(msg.get("return_code")) != "0":
+                        raise ApiError(f"websocket REG 실패: {msg.get('return_msg')}")
+                    elif trnm == "REAL":
+                        yield msg
+            reason = "서버가 연결을 닫음"
+        except (ConnectionClosed, InvalidHandshake, OSError, asyncio.TimeoutError) as e:
+            reason = f"{type(e).__name__}: {e}"
+
+        delay = random.uniform(0, min(RECONNECT_CAP, RECONNECT_BASE * (2**attempt)))
+        print(f"WARN: websocket 연결 끊김 ({reason}) -> {delay:.1f}초 후 재접속")
+        await asyncio.sleep(delay)
+        attempt += 1
@@ -1,24 +1,30 @@
+from __future__ import annotations
+
+import asyncio
 import json
-from typing import Mapping, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Mapping, Optional
 
-import requests
 from auth.kiwoom_auth import get_access_token
+from config.accounts import Account, get_account
 from config.api_endpoints import AccountStatus, AccountTradeHistory, RealizedPnLDaily
-from config.settings import Settings
 
-from clients.client import request_json
+from clients.client import request_json, request_json_async
 
-settings = Settings()
-access_token = get_access_token()
+if TYPE_CHECKING:
+    import httpx
 
 
-def _make_headers(api_id: str, extra_headers: Optional[Mapping[str, str]] = None):
+def _make_headers(
+    api_id: str,
+    extra_headers: Optional[Mapping[str, str]] = None,
+    account: Optional[Account] = None,
+):
     """
-    api_id를 입력받아 공통 kiwoom api header 생성
+    api_id를 입력받아 공통 kiwoom api header 생성 (account 토큰 사용, 기본: 첫 번째 계좌)
     """
 
     headers = {
-        "Authorization": f"Bearer {access_token}",
+        "Authorization": f"Bearer {get_access_token(account=account)}",
         "Content-Type": "application/json",
         "api-id": api_id,
     }
@@ -29,44 +35,81 @@ def _make_headers(api_id: str, extra_headers: Optional[Mapping[str, str]] = None
     return headers
 
 
-def get_account_balance(qry_tp: str = "1", dmst_stex_tp="KRX"):
-    headers = _make_headers(AccountStatus.api_id)
-    body = {"qry_tp": qry_tp, "dmst_stex_tp": dmst_stex_tp}
+def _account_balance_body(qry_tp: str, dmst_stex_tp: str):
+    return {"qry_tp": qry_tp, "dmst_stex_tp": dmst_stex_tp}
+
+
+def _realized_pnl_daily_body(date: str):
+    return {"strt_dt": date, "end_dt": date}
+
+
+def _account_trade_history_body(
+    ord_dt: str | None,
+    qry_tp: str,
+    stk_bond_tp: str,
+    sell_tp: str,
+    stk_cd: str | None,
+    dmst_stex_tp: str,
+):
+    return {
+        "ord_dt": ord_dt,
+        "qry_tp": qry_tp,
+        "stk_bond_tp": stk_bond_tp,
+        "sell_tp": sell_tp,
+        "stk_cd": stk_cd or "",
+        "fr_ord_no": "",
+        "dmst_stex_tp": dmst_stex_tp,
+    }
+
+
+def get_account_balance(
+    qry_tp: str = "1", dmst_stex_tp="KRX", account: Optional[Account] = None
+):
+    account = account or get_account()
+    headers = _make_headers(AccountStatus.api_id, account=account)
+    body = _account_balance_body(qry_tp, dmst_stex_tp)
     return request_json(
-        method="POST", path=AccountStatus.path, headers=headers, json_body=body
+        method="POST",
+        path=AccountStatus.path,
+        headers=headers,
+        json_body=body,
+        account=account.name,
     ).data
 
 
-def get_realized_pnl_daily(date: str):
-    headers = _make_headers(RealizedPnLDaily.api_id)
-    body = {"strt_dt": date, "end_dt": date}
+def get_realized_pnl_daily(date: str, account: Optional[Account] = None):
+    account = account or get_account()
+    headers = _make_headers(RealizedPnLDaily.api_id, account=account)
+    body = _realized_pnl_daily_body(date)
     return request_json(
-        method="POST", path=RealizedPnLDaily.path, headers=headers, json_body=body
+        method="POST",
+        path=RealizedPnLDaily.path,
+        headers=headers,
+        json_body=body,
+        account=account.name,
     ).data
 
 
-def get_account_trade_history(
+def iter_account_trade_history_pages(
     ord_dt: str | None = None,
     qry_tp: str = "4",
     stk_bond_tp: str = "0",
     sell_tp: str = "0",
     stk_cd: str | None = None,
     dmst_stex_tp: str = "%",
-):
-
-    headers = _make_headers(AccountTradeHistory.api_id)
+    account: Optional[Account] = None,
+) -> Iterator[list[dict]]:
+    """
+    계좌별주문체결내역을 연속조회 페이지 단위로 받는 대로 yield
+    (당일분을 다 받고 asset_service가 새 주문 / 체결이 진행된 주문만 기록)
+    """
 
-    body = {
-        "ord_dt": ord_dt,
-        "qry_tp": qry_tp,
-        "stk_bond_tp": stk_bond_tp,
-        "sell_tp": sell_tp,
-        "stk_cd": stk_cd or "",
-        "fr_ord_no": "",
-        "dmst_stex_tp": dmst_stex_tp,
-    }
+    account = account or get_account()
+    headers = _make_headers(AccountTradeHistory.api_id, account=account)
 
-    all_trades: list[dict] = []
+    body = _account_trade_history_body(
+        ord_dt, qry_tp, stk_bond_tp, sell_tp, stk_cd, dmst_stex_tp
+    )
 
     cont_yn = "N"
     next_key = ""
@@ -81,10 +124,10 @@ def get_account_trade_history(
             path=AccountTradeHistory.path,
             headers=headers,
             json_body=body,
+            account=account.name,
         )
-        # 1) body: 체결내역 수집
-        trades = resp.data.get("acnt_ord_cntr_prps_dtl", [])
-        all_trades.extend(trades)
+        # 1) body: 체결내역 페이지
+        yield resp.data.get("acnt_ord_cntr_prps_dtl", [])
 
         # 2) header: 연속조회 여부 확인
         cont_yn = resp.headers.get("cont-yn", "N")
@@ -93,4 +136,144 @@ def get_account_trade_history(
         if cont_yn != "Y":
             break
 
+
+def get_account_trade_history(
+    ord_dt: str | None = None,
+    qry_tp: str = "4",
+    stk_bond_tp: str = "0",
+    sell_tp: str = "0",
+    stk_cd: str | None = None,
+    dmst_stex_tp: str = "%",
+    account: Optional[Account] = None,
+):
+    all_trades: list[dict] = []
+    for page in iter_account_trade_history_pages(
+        ord_dt, qry_tp, stk_bond_tp, sell_tp, stk_cd, dmst_stex_tp, account=account
+    ):
+        all_trades.extend(page)
     return all_trades
+
+
+async def get_account_balance_async(
+    qry_tp: str = "1",
+    dmst_stex_tp="KRX",
+    client: httpx.AsyncClient | None = None,
+    account: Optional[Account] = None,
+):
+    account = account or get_account()
+    headers = _make_headers(AccountStatus.api_id, account=account)
+    body = _account_balance_body(qry_tp, dmst_stex_tp)
+    resp = await request_json_async(
+        method="POST",
+        path=AccountStatus.path,
+        headers=headers,
+        json_body=body,
+        client=client,
+        account=account.name,
+    )
+    return resp.data
+
+
+async def get_realized_pnl_daily_async(
+    date: str,
+    client: httpx.AsyncClient | None = None,
+    account: Optional[Account] = None,
+):
+    account = account or get_account()
+    headers = _make_headers(RealizedPnLDaily.api_id, account=account)
+    body = _realized_pnl_daily_body(date)
+    resp = await request_json_async(
+        method="POST",
+        path=RealizedPnLDaily.path,
+        headers=headers,
+        json_body=body,
+        client=client,
+        account=account.name,
+    )
+    return resp.data
+
+
+async def get_account_trade_history_async(
+    ord_dt: str | None = None,
+    qry_tp: str = "4",
+    stk_bond_tp: str = "0",
+    sell_tp: str = "0",
+    stk_cd: str | None = None,
+    dmst_stex_tp: str = "%",
+    client: httpx.AsyncClient | None = None,
+    account: Optional[Account] = None,
+):
+    """
+    get_account_trade_history의 async 버전. 연속조회(cont-yn) 페이지는 순서대로 요청
+    """
+    account = account or get_account()
+    headers = _make_headers(AccountTradeHistory.api_id, account=account)
+    body = _account_trade_history_body(
+        ord_dt, qry_tp, stk_bond_tp, sell_tp, stk_cd, dmst_stex_tp
+    )
+
+    all_trades: list[dict] = []
+
+    while True:
+        resp = await request_json_async(
+            method="POST",
+            path=AccountTradeHistory.path,
+            headers=headers,
+            json_body=body,
+            client=client,
+            account=account.name,
+        )
+        all_trades.extend(resp.data.get("acnt_ord_cntr_prps_dtl", []))
+
+        if resp.headers.get("cont-yn", "N") != "Y":
+            break
+        headers["cont-yn"] = "Y"
+        headers["next-key"] = resp.headers.get("next-key", "")
+
+    return all_trades
+
+
+async def fetch_daily_async(
+    date: str, trades: bool = True, account: Optional[Account] = None
+) -> Dict[str, Any]:
+    """
+    잔고 / 일자별 실현손익 / 체결내역 3개 조회를 동시에 요청 (하나의 연결 풀 공유)
+    trades=False: 체결내역은 호출하는 쪽에서 페이지 단위로 따로 받음
+    """
+    import httpx
+
+    async with httpx.AsyncClient() as client:
+        jobs = [
+            get_account_balance_async(client=client, account=account),
+            get_realized_pnl_daily_async(date, client=client, account=account),
+        ]
+        if trades:
+            jobs.append(
+                get_account_trade_history_async(
+                    ord_dt=date, client=client, account=account
+                )
+            )
+        results = await asyncio.gather(*jobs)
+    fetched = {"asset": results[0], "pnl": results[1]}
+    if trades:
+        fetched["trades"] = results[2]
+    return fetched
+
+
+async def fetch_history_async(
+    date: str, client: httpx.AsyncClient, account: Optional[Account] = None
+) -> Dict[str, Any]:
+    """
+    과거 일자 백필용: 일자별 실현손익 / 체결내역만 조회 (잔고는 당일 스냅샷이라 제외)
+    """
+    pnl_data, trades_data = await asyncio.gather(
+        get_realized_pnl_daily_async(date, client=client, account=account),
+        get_account_trade_history_async(ord_dt=date, client=client, account=account),
+    )
+    return {"pnl": pnl_data, "trades": trades_data}
+
+
+def fetch_daily(
+    date: str, trades: bool = True, account: Optional[Account] = None
+) -> Dict[str, Any]:
+    return asyncio.run(fetch_daily_async(date, trades=trades, account=account))
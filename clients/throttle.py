@@ -0,0 +1,155 @@
+import asyncio
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from config.accounts import DEFAULT_ACCOUNT
+
+# 일시적인 서버 오류 / 호출 제한 응답은 재시도
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5  # 초
+BACKOFF_CAP = 8.0  # 초
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate: float  # 초당 허용 요청 수
+    burst: int = 1  # 쉬고 있다가 연속으로 보낼 수 있는 최대 요청 수
+
+
+# api-id 별 호출 한도. 목록에 없는 api-id는 DEFAULT_RATE_LIMIT 사용
+DEFAULT_RATE_LIMIT = RateLimit(rate=4.0, burst=2)
+RATE_LIMITS: Dict[str, RateLimit] = {
+    "kt00004": RateLimit(rate=4.0, burst=2),  # 계좌평가현황
+    "ka10072": RateLimit(rate=4.0, burst=2),  # 일자별 실현손익
+    "kt00007": RateLimit(rate=4.0, burst=2),  # 계좌별주문체결내역 (연속조회)
+}
+
+
+class TokenBucket:
+    """
+    토큰 버킷. reserve()는 토큰 하나를 예약하고 기다려야 할 시간(초)을 돌려줌
+    (sleep은 호출하는 쪽에서 해서 sync/async 양쪽에서 같이 씀)
+    """
+
+    def __init__(self, limit: RateLimit) -> None:
+        self.rate = limit.rate
+        self.burst = limit.burst
+        self.tokens = float(limit.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            # 음수면 이미 예약된 만큼 뒤로 밀림
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+# (계좌, api-id) 별 버킷: 호출 한도는 계좌마다 따로 적용
+_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+_counters: Dict[str, Counter] = defaultdict(Counter)
+_counters_lock = threading.Lock()
+
+
+def configure_rate(api_id: str, rate: float, burst: int = 1) -> None:
+    """
+    api-id 호출 한도 변경 (이미 만들어진 계좌별 버킷도 교체)
+    """
+    limit = RateLimit(rate=rate, burst=burst)
+    with _buckets_lock:
+        RATE_LIMITS[api_id] = limit
+        for key in [k for k in _buckets if k[1] == api_id]:
+            _buckets[key] = TokenBucket(limit)
+
+
+def _bucket(api_id: str, account: str) -> TokenBucket:
+    with _buckets_lock:
+        bucket = _buckets.get((account, api_id))
+        if bucket is None:
+            bucket = TokenBucket(RATE_LIMITS.get(api_id, DEFAULT_RATE_LIMIT))
+            _buckets[(account, api_id)] = bucket
+        return bucket
+
+
+def _counter_key(api_id: str, account: str) -> str:
+    return api_id if account == DEFAULT_ACCOUNT else f"{account}/{api_id}"
+
+
+def record(api_id: str, event: str, n: int = 1) -> None:
+    with _counters_lock:
+        _counters[api_id][event] += n
+
+
+def get_counters() -> Dict[str, Dict[str, int]]:
+    """
+    api-id 별 카운터 스냅샷 (default 외 계좌는 "계좌/api-id")
+    requests / throttled / throttle_wait_ms / retries / failures
+    """
+    with _counters_lock:
+        return {api_id: dict(c) for api_id, c in _counters.items()}
+
+
+def reset_counters() -> None:
+    with _counters_lock:
+        _counters.clear()
+
+
+def _reserve(api_id: str, account: str) -> float:
+    wait = _bucket(api_id, account).reserve()
+    key = _counter_key(api_id, account)
+    record(key, "requests")
+    if wait > 0:
+        record(key, "throttled")
+        record(key, "throttle_wait_ms", int(wait * 1000))
+    return wait
+
+
+def acquire(api_id: str, account: str = DEFAULT_ACCOUNT) -> None:
+    """
+    계좌의 api-id 호출 한도 안에서 요청을 보낼 수 있을 때까지 대기 (blocking)
+    """
+    wait = _reserve(api_id, account)
+    if wait > 0:
+        time.sleep(wait)
+
+
+async def acquire_async(api_id: str, account: str = DEFAULT_ACCOUNT) -> None:
+    wait = _reserve(api_id, account)
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+
+def retry_delay(
+    api_id: str,
+    attempt: int,
+    retry_after: Optional[str] = None,
+    account: str = DEFAULT_ACCOUNT,
+) -> Optional[float]:
+    """
+    attempt번째(0부터) 실패 후 재시도까지 기다릴 시간. 재시도 횟수를 넘으면 None
+    Retry-After 헤더(초)가 있으면 그 값을, 없으면 full jitter 지수 백오프
+    """
+    key = _counter_key(api_id, account)
+    if attempt >= MAX_RETRIES:
+        record(key, "failures")
+        return None
+    record(key, "retries")
+    if retry_after:
+        try:
+            return min(BACKOFF_CAP, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2**attempt)))
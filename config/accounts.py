@@ -0,0 +1,56 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from config.settings import get_settings
+
+# 단일 계좌 설정(APP_KEY/SECRET_KEY)일 때의 계좌 이름 (테이블 account 컬럼 기본값과 같음)
+DEFAULT_ACCOUNT = "default"
+
+
+@dataclass(frozen=True)
+class Account:
+    name: str
+    app_key: str
+    secret_key: str
+
+
+@lru_cache(maxsize=None)
+def load_accounts() -> Tuple[Account, ...]:
+    """
+    Settings.ACCOUNTS 에 나열된 계좌들 (없으면 APP_KEY/SECRET_KEY 의 default 계좌 하나)
+    처음 한 번만 읽고 이후 호출은 같은 결과를 돌려줌
+    """
+    settings = get_settings()
+    names = [n.strip() for n in settings.ACCOUNTS.split(",") if n.strip()]
+    if not names:
+        return (Account(DEFAULT_ACCOUNT, settings.APP_KEY, settings.SECRET_KEY),)
+
+    accounts = []
+    for name in names:
+        suffix = name.upper()
+        try:
+            accounts.append(
+                Account(
+                    name,
+                    os.environ[f"APP_KEY_{suffix}"],
+                    os.environ[f"SECRET_KEY_{suffix}"],
+                )
+            )
+        except KeyError as e:
+            raise RuntimeError(f"계좌 {name} 설정 누락: {e.args[0]}") from e
+    return tuple(accounts)
+
+
+def get_account(name: Optional[str] = None) -> Account:
+    """
+    이름으로 계좌 조회 (None이면 첫 번째 계좌)
+    """
+    accounts = load_accounts()
+    if name is None:
+        return accounts[0]
+    for account in accounts:
+        if account.name == name:
+            return account
+    raise RuntimeError(f"알 수 없는 계좌: {name}")
@@ -1,13 +1,115 @@
+from dataclasses import dataclass
+
+# 응답 필드 변환 방식 (utils.decoders가 해석)
+INT = "int"  # 부호 / 0 채움 숫자 문자열 -> int (빈 값 0)
+FLOAT = "float"  # 비율 등 -> float (빈 값 0.0)
+STR = "str"  # 그대로
+STR_OR_EMPTY = "str_or_empty"  # None / "" -> ""
+STR_OR_NONE = "str_or_none"  # None / "" -> None
+
+
+@dataclass(frozen=True)
+class Field:
+    column: str  # DB 컬럼
+    key: str  # 응답 item key
+    kind: str = STR
+
+
 class AccountStatus:
     api_id = "kt00004"
     path = "/api/dostk/acnt"
 
+    # 응답 최상단 계좌 요약 -> account_summary
+    summary_fields = (
+        Field("acnt_nm", "acnt_nm"),
+        Field("brch_nm", "brch_nm"),
+        Field("entr", "entr", INT),
+        Field("d2_entra", "d2_entra", INT),
+        Field("tot_est_amt", "tot_est_amt", INT),
+        Field("aset_evlt_amt", "aset_evlt_amt", INT),
+        Field("tot_pur_amt", "tot_pur_amt", INT),
+        Field("prsm_dpst_aset_amt", "prsm_dpst_aset_amt", INT),
+        Field("tot_grnt_sella", "tot_grnt_sella", INT),
+        Field("tdy_lspft_amt", "tdy_lspft_amt", INT),
+        Field("invt_bsamt", "invt_bsamt", INT),
+        Field("lspft_amt", "lspft_amt", INT),
+        Field("tdy_lspft", "tdy_lspft", INT),
+        Field("lspft2", "lspft2", INT),
+        Field("lspft", "lspft", INT),
+        Field("tdy_lspft_rt", "tdy_lspft_rt", FLOAT),
+        Field("lspft_ratio", "lspft_ratio", FLOAT),
+        Field("lspft_rt", "lspft_rt", FLOAT),
+        Field("return_code", "return_code", INT),
+        Field("return_msg", "return_msg"),
+    )
+
+    # 종목별 잔고 stk_acnt_evlt_prst -> holdings
+    fields = (
+        Field("stk_cd", "stk_cd"),
+        Field("stk_nm", "stk_nm"),
+        Field("rmnd_qty", "rmnd_qty", INT),
+        Field("avg_prc", "avg_prc", INT),
+        Field("cur_prc", "cur_prc", INT),
+        Field("evlt_amt", "evlt_amt", INT),
+        Field("pl_amt", "pl_amt", INT),
+        Field("pl_rt", "pl_rt", FLOAT),
+        Field("loan_dt", "loan_dt", STR_OR_EMPTY),
+        Field("pur_amt", "pur_amt", INT),
+        Field("setl_remn", "setl_remn", INT),
+        Field("pred_buyq", "pred_buyq", INT),
+        Field("pred_sellq", "pred_sellq", INT),
+        Field("tdy_buyq", "tdy_buyq", INT),
+        Field("tdy_sellq", "tdy_sellq", INT),
+    )
+
 
 class RealizedPnLDaily:
     api_id = "ka10072"
     path = "/api/dostk/acnt"
 
+    # 종목별 실현손익 dt_stk_div_rlzt_pl -> realized_pnl_daily
+    fields = (
+        Field("stk_cd", "stk_cd1"),
+        Field("stk_nm", "stk_nm"),
+        Field("cntr_qty", "cntr_qty", INT),
+        Field("buy_uv", "buy_uv", INT),
+        Field("cntr_pric", "cntr_pric", INT),
+        Field("tdy_sel_pl", "tdy_sel_pl1", INT),  # 실현손익
+        Field("pl_rt", "pl_rt", FLOAT),
+        Field("tdy_trde_cmsn", "tdy_trde_cmsn", INT),
+        Field("tdy_trde_tax", "tdy_trde_tax", INT),
+        Field("wthd_alowa", "wthd_alowa", INT),
+        Field("loan_dt", "loan_dt", STR_OR_EMPTY),
+        Field("crd_tp", "crd_tp"),
+    )
+
 
 class AccountTradeHistory:
     api_id: str = "kt00007"
     path = "/api/dostk/acnt"
+
+    # 주문/체결 acnt_ord_cntr_prps_dtl -> account_trade_history
+    fields = (
+        Field("ord_no", "ord_no"),
+        Field("ori_ord_no", "ori_ord"),
+        Field("stk_cd", "stk_cd"),
+        Field("stk_nm", "stk_nm"),
+        Field("io_tp_nm", "io_tp_nm"),
+        Field("trde_tp", "trde_tp"),
+        Field("crd_tp", "crd_tp"),
+        Field("loan_dt", "loan_dt", STR_OR_NONE),
+        Field("ord_qty", "ord_qty", INT),
+        Field("ord_uv", "ord_uv", INT),
+        Field("ord_tm", "ord_tm"),
+        Field("acpt_tp", "acpt_tp"),
+        Field("rsrv_tp", "rsrv_tp"),
+        Field("ord_remnq", "ord_remnq", INT),
+        Field("cntr_qty", "cntr_qty", INT),
+        Field("cntr_uv", "cntr_uv", INT),
+        Field("cnfm_qty", "cnfm_qty", INT),
+        Field("cnfm_tm", "cnfm_tm"),
+        Field("mdfy_cncl", "mdfy_cncl"),
+        Field("comm_ord_tp", "comm_ord_tp"),
+        Field("dmst_stex_tp", "dmst_stex_tp"),
+        Field("cond_uv", "cond_uv", INT),
+    )
@@ -1,12 +1,12 @@
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(BASE_DIR / ".env")
 
 
 class Settings(BaseSettings):
@@ -21,6 +21,20 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_NAME: str
 
+    # 여러 계좌를 쓸 때 계좌 이름 목록 (예: "main,isa")
+    # 계좌별 키는 APP_KEY_<NAME> / SECRET_KEY_<NAME>, 비어있으면 APP_KEY/SECRET_KEY 단일 계좌
+    ACCOUNTS: str = ""
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    프로세스 전체에서 공유하는 Settings (.env는 처음 호출할 때 한 번만 읽음)
+    계좌별 키(APP_KEY_<NAME>)는 os.environ에서 읽으므로 .env를 환경변수로도 올려둠
+    """
+    load_dotenv(BASE_DIR / ".env")
+    return Settings()
@@ -0,0 +1,143 @@
+import argparse
+import time as _time
+from datetime import datetime, time
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+
+import pymysql
+from clients.client import ApiError
+from clients.rest import (
+    get_account_balance,
+    get_realized_pnl_daily,
+    iter_account_trade_history_pages,
+)
+from config.accounts import Account, load_accounts
+from db.connection import get_connection
+from db.schema import ensure_schema
+from services.asset_service import (
+    save_account_data,
+    save_account_trade_history_pages,
+    save_realized_pnl_daily,
+)
+from services.portfolio_service import update_portfolio_daily
+from services.position_service import build_positions
+from utils.krx_calendar import is_trading_day
+from utils.prefetch import Prefetcher
+
+KST = ZoneInfo("Asia/Seoul")
+
+# KRX 정규장
+MARKET_OPEN = time(9, 0)
+MARKET_CLOSE = time(15, 30)
+
+
+def _in_market_hours(now: datetime) -> bool:
+    return is_trading_day(now.date()) and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+
+
+def _poll(
+    conn: pymysql.connections.Connection,
+    date: str,
+    last_hash: Optional[str],
+    account: Account,
+) -> tuple:
+    """
+    계좌의 새 체결 + 잔고 1회 조회/저장. return: (잔고 hash, 새로 저장된 체결 수)
+    """
+    trade_pages = Prefetcher(
+        iter_account_trade_history_pages(ord_dt=date, account=account)
+    )
+    try:
+        balance = get_account_balance(account=account)
+        data_hash = save_account_data(
+            conn, balance, last_hash=last_hash, account=account.name
+        )
+        inserted = save_account_trade_history_pages(
+            conn, trade_pages, trade_date=date, account=account.name
+        )
+    finally:
+        trade_pages.close()
+    return data_hash, inserted
+
+
+def run_daemon(interval: float = 60.0, workers: int = 1) -> None:
+    """
+    장중(MARKET_OPEN ~ MARKET_CLOSE)에는 interval초마다 설정된 계좌들의 체결/잔고를 조회해 저장하고,
+    장 마감 후 하루 한 번 일자별 실현손익까지 저장
+    DB 연결 / HTTP 세션 / 토큰은 계속 재사용
+    """
+    accounts = load_accounts()
+    conn = get_connection()
+    ensure_schema(conn)
+
+    # 계좌별 마지막 잔고 hash / 장 마감 처리한 날짜
+    last_hash: Dict[str, Optional[str]] = {}
+    hash_date = None  # snapshot_date가 바뀌면 같은 내용이어도 새로 저장해야 함
+    closed_date: Dict[str, str] = {}
+
+    try:
+        while True:
+            now = datetime.now(KST)
+            date = now.strftime("%Y%m%d")
+            if hash_date != date:
+                last_hash, hash_date = {}, date
+
+            market_open = _in_market_hours(now)
+            for account in accounts:
+                after_close = (
+                    is_trading_day(now.date())
+                    and now.time() > MARKET_CLOSE
+                    and closed_date.get(account.name) != date
+                )
+                if not (market_open or after_close):
+                    continue
+                try:
+                    conn.ping(reconnect=True)
+                    prev_hash = last_hash.get(account.name)
+                    new_hash, inserted = _poll(conn, date, prev_hash, account)
+                    if after_close:
+                        save_realized_pnl_daily(
+                            conn,
+                            get_realized_pnl_daily(date, account=account),
+                            query_date=date,
+                            account=account.name,
+                        )
+                        update_portfolio_daily(conn, now.date(), account=account.name)
+                        closed_date[account.name] = date
+                    if inserted or after_close:
+                        build_positions(
+                            conn, end_date=date, workers=workers, account=account.name
+                        )
+                    print(
+                        f"{now:%H:%M:%S} [{account.name}] 체결 {inserted}건 저장, "
+                        f"잔고 {'변경 없음' if new_hash == prev_hash else '저장'}"
+                    )
+                    last_hash[account.name] = new_hash
+                except (ApiError, pymysql.err.Error) as e:
+                    # 일시적인 오류는 다음 주기에 다시 시도 (연결이 끊겼으면 다음 ping에서 재연결)
+                    try:
+                        conn.rollback()
+                    except pymysql.err.Error:
+                        pass
+                    print(f"{now:%H:%M:%S} [{account.name}] WARN: polling 실패: {e}")
+
+            _time.sleep(interval)
+    except KeyboardInterrupt:
+        print("daemon 종료")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--interval", type=float, default=60.0, help="장중 조회 주기(초)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="종목별 병렬 재생 프로세스 수",
+    )
+    args = parser.parse_args()
+    run_daemon(interval=args.interval, workers=args.workers)
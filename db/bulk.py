@@ -0,0 +1,46 @@
+from itertools import islice
+from typing import Any, Iterable, List, Sequence
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def executemany_batched(
+    cur,
+    sql: str,
+    rows: Iterable[Any],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    rows를 batch_size개씩 cur.executemany로 실행하고 affected row 합계를 반환합니다.
+    pymysql은 `INSERT ... VALUES (...) [ON DUPLICATE ...]` 형태면 batch 하나를
+    multi-row INSERT 한 번으로 보냅니다. (VALUES 괄호 안에 주석이 있으면 row별 실행으로 떨어짐)
+    """
+    total = 0
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            return total
+        total += cur.executemany(sql, batch) or 0
+
+
+def execute_grouped(
+    cur,
+    ops: Sequence[Sequence[Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    (sql, params) 작업 목록을 순서를 유지하면서 같은 sql이 연속된 구간끼리 묶어 실행합니다.
+    """
+    total = 0
+    group: List[Any] = []
+    group_sql = None
+    for sql, params in ops:
+        if sql != group_sql and group:
+            total += executemany_batched(cur, group_sql, group, batch_size)
+            group = []
+        group_sql = sql
+        group.append(params)
+    if group:
+        total += executemany_batched(cur, group_sql, group, batch_size)
+    return total
@@ -1,9 +1,22 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
 import pymysql
-from config.settings import Settings
+from config.settings import get_settings
+
+POOL_SIZE = 4
+# 이 시간(초) 이상 쉬던 연결은 꺼내줄 때 ping으로 확인 (끊겼으면 재연결)
+PING_INTERVAL = 30.0
 
 
-def get_connection():
-    settings = Settings()
+def get_connection(local_infile: bool = False):
+    """
+    local_infile=True: LOAD DATA LOCAL INFILE 대량 적재(services.bulk_load) 허용
+    """
+    settings = get_settings()
     return pymysql.connect(
         host=settings.DB_HOST,
         user=settings.DB_USER,
@@ -11,4 +24,105 @@ def get_connection():
         database=settings.DB_NAME,
         charset="utf8mb4",
         autocommit=False,
+        local_infile=local_infile,
     )
+
+
+class ConnectionPool:
+    """
+    스레드 간 공유하는 pymysql 연결 풀 (최대 max_size개, 필요할 때 생성)
+    - acquire: ping_interval 이상 쉬던 연결은 ping(reconnect=True)로 확인 후 반환
+    - release: 끝나지 않은 트랜잭션은 rollback 후 풀에 반납 (commit은 쓰는 쪽 책임)
+    """
+
+    def __init__(
+        self,
+        max_size: int = POOL_SIZE,
+        local_infile: bool = False,
+        ping_interval: float = PING_INTERVAL,
+    ) -> None:
+        self.max_size = max_size
+        self.local_infile = local_infile
+        self.ping_interval = ping_interval
+        # (연결, 반납 시각). 최근 반납한 연결부터 재사용
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def acquire(
+        self, timeout: Optional[float] = None
+    ) -> pymysql.connections.Connection:
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"DB 연결 대기 시간 초과 (pool size {self.max_size})")
+        try:
+            return self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _checkout(self) -> pymysql.connections.Connection:
+        while True:
+            try:
+                conn, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                return get_connection(local_infile=self.local_infile)
+            if time.monotonic() - released_at < self.ping_interval:
+                return conn
+            try:
+                conn.ping(reconnect=True)
+                return conn
+            except pymysql.err.Error:
+                _close_quietly(conn)
+
+    def release(self, conn: pymysql.connections.Connection) -> None:
+        try:
+            if conn.open:
+                conn.rollback()
+                self._idle.put((conn, time.monotonic()))
+        except pymysql.err.Error:
+            _close_quietly(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(
+        self, timeout: Optional[float] = None
+    ) -> Iterator[pymysql.connections.Connection]:
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """
+        쉬고 있는 연결을 모두 닫음 (사용 중인 연결은 release 때 다시 쌓임)
+        """
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _close_quietly(conn)
+
+
+def _close_quietly(conn: pymysql.connections.Connection) -> None:
+    try:
+        conn.close()
+    except pymysql.err.Error:
+        pass
+
+
+_pools: Dict[bool, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(local_infile: bool = False, max_size: int = POOL_SIZE) -> ConnectionPool:
+    """
+    프로세스 공용 연결 풀 (local_infile 여부별로 하나, max_size는 처음 만들 때만 적용)
+    """
+    with _pools_lock:
+        pool = _pools.get(local_infile)
+        if pool is None:
+            pool = ConnectionPool(max_size=max_size, local_infile=local_infile)
+            _pools[local_infile] = pool
+        return pool
@@ -0,0 +1,412 @@
+from typing import Dict, List
+
+import pymysql
+
+# 파이프라인이 직접 관리하는 보조 테이블 DDL
+# (account_trade_history / lot_matches 등 원본 테이블은 DB에서 직접 관리)
+SCHEMA_DDL = [
+    # 파생 테이블 재생(replay) 진행 위치: 마지막으로 반영한 (trade_date, ord_tm, id)
+    """
+    CREATE TABLE IF NOT EXISTS position_checkpoints (
+      account VARCHAR(32) NOT NULL DEFAULT 'default',
+      name VARCHAR(64) NOT NULL,
+      last_trade_date DATE NOT NULL,
+      last_ord_tm CHAR(8) NOT NULL DEFAULT '',
+      last_id BIGINT NOT NULL,
+      max_source_id BIGINT NOT NULL,
+      updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+      PRIMARY KEY (account, name)
+    )
+    """,
+    # LIFO 매칭 후 남아있는 미청산 lot (stk_cd, crd_class)별 스택
+    """
+    CREATE TABLE IF NOT EXISTS lot_match_open_lots (
+      account VARCHAR(32) NOT NULL DEFAULT 'default',
+      stk_cd VARCHAR(20) NOT NULL,
+      crd_class VARCHAR(20) NOT NULL,
+      stack_pos INT NOT NULL,
+      stk_nm VARCHAR(100) NOT NULL DEFAULT '',
+      buy_source_id BIGINT NOT NULL,
+      buy_dt DATETIME NOT NULL,
+      buy_px DECIMAL(20, 4) NOT NULL,
+      remaining_qty INT NOT NULL,
+      PRIMARY KEY (account, stk_cd, crd_class, stack_pos)
+    )
+    """,
+    # position_episodes 증분 유지를 위한 (stk_cd, crd_class)별 누적 상태
+    """
+    CREATE TABLE IF NOT EXISTS position_episode_state (
+      account VARCHAR(32) NOT NULL DEFAULT 'default',
+      stk_cd VARCHAR(20) NOT NULL,
+      crd_class VARCHAR(20) NOT NULL,
+      pos_qty BIGINT NOT NULL,
+      episode_seq INT NOT NULL,
+      has_open TINYINT(1) NOT NULL DEFAULT 0,
+      PRIMARY KEY (account, stk_cd, crd_class)
+    )
+    """,
+    # 백필 진행 상황: 저장까지 끝난 조회일 (재실행 시 건너뜀)
+    """
+    CREATE TABLE IF NOT EXISTS backfill_progress (
+      account VARCHAR(32) NOT NULL DEFAULT 'default',
+      query_date DATE NOT NULL,
+      pnl_rows INT NOT NULL,
+      trade_rows INT NOT NULL,
+      completed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (account, query_date)
+    )
+    """,
+    # 계좌 구분 컬럼 (단일 계좌 시절 데이터는 'default' 계좌로 남음)
+    *(
+        f"""
+        ALTER TABLE {table}
+          ADD COLUMN IF NOT EXISTS account VARCHAR(32) NOT NULL DEFAULT 'default'
+        """
+        for table in (
+            "account_summary",
+            "holdings",
+            "realized_pnl_daily",
+            "account_trade_history",
+            "lot_matches",
+            "position_episodes",
+            "position_checkpoints",
+            "lot_match_open_lots",
+            "position_episode_state",
+            "backfill_progress",
+        )
+    ),
+    # API 원본 응답 보관: 내용 hash로 중복 제거, zlib 압축 (services.raw_store)
+    """
+    CREATE TABLE IF NOT EXISTS raw_payloads (
+      payload_hash CHAR(64) NOT NULL,
+      codec VARCHAR(8) NOT NULL,
+      raw_size INT NOT NULL,
+      body MEDIUMBLOB NOT NULL,
+      created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (payload_hash)
+    )
+    """,
+    # 잔고 snapshot 비교 저장용 내용 hash (account_summary: 응답 전체, holdings: 종목 row)
+    """
+    ALTER TABLE account_summary
+      ADD COLUMN IF NOT EXISTS row_hash CHAR(64) NULL
+    """,
+    """
+    ALTER TABLE holdings
+      ADD COLUMN IF NOT EXISTS row_hash CHAR(64) NULL
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_holdings_account_snapshot
+      ON holdings (account, snapshot_date)
+    """,
+    # trade 재생은 계좌별로 trade_date 구간 단위로 (trade_date, ord_tm, id) 순서 조회
+    """
+    CREATE INDEX IF NOT EXISTS idx_account_trade_history_account_replay
+      ON account_trade_history (account, trade_date, ord_tm, id)
+    """,
+    # 열린 episode를 (key, episode_seq)로 찾아 UPDATE 하므로 인덱스 필요
+    """
+    CREATE INDEX IF NOT EXISTS idx_position_episodes_account_key
+      ON position_episodes (account, stk_cd, crd_class, episode_seq)
+    """,
+    # 재생된 주문의 체결이 바뀌면 그 (stk_cd, crd_class)만 다시 재생 (position_service.rewind_positions)
+    """
+    CREATE INDEX IF NOT EXISTS idx_lot_matches_account_key
+      ON lot_matches (account, stk_cd, crd_class)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_account_trade_history_account_key
+      ON account_trade_history (account, stk_cd, crd_class)
+    """,
+    # 계좌별 최신 snapshot의 보유 종목 (정규화 컬럼, save_account_data가 바뀐 row만 갱신)
+    """
+    CREATE TABLE IF NOT EXISTS latest_holdings (
+      account VARCHAR(32) NOT NULL,
+      holding_id BIGINT NOT NULL,
+      snapshot_date DATE NOT NULL,
+      stk_cd VARCHAR(20) NOT NULL,
+      crd_class VARCHAR(20) NOT NULL,
+      stk_nm VARCHAR(100) NOT NULL DEFAULT '',
+      loan_dt VARCHAR(8) NOT NULL DEFAULT '',
+      rmnd_qty BIGINT NOT NULL,
+      avg_prc BIGINT NOT NULL,
+      cur_prc BIGINT NOT NULL,
+      evlt_amt BIGINT NOT NULL,
+      pl_amt BIGINT NOT NULL,
+      pl_rt DOUBLE NOT NULL,
+      pur_amt BIGINT NOT NULL,
+      PRIMARY KEY (account, holding_id),
+      KEY idx_latest_holdings_key (account, stk_cd, crd_class)
+    )
+    """,
+    # 계좌별 보유중(end_dt IS NULL) episode 요약 (episode 기록 후 건드린 key만 갱신)
+    """
+    CREATE TABLE IF NOT EXISTS open_positions (
+      account VARCHAR(32) NOT NULL,
+      stk_cd VARCHAR(20) NOT NULL,
+      crd_class VARCHAR(20) NOT NULL,
+      stk_nm VARCHAR(100) NOT NULL DEFAULT '',
+      first_buy_dt DATETIME NOT NULL,
+      open_episodes INT NOT NULL,
+      pos_qty BIGINT NOT NULL,
+      PRIMARY KEY (account, stk_cd, crd_class)
+    )
+    """,
+    # 계좌별 일별 자산 / 수익률 (services.portfolio_service가 매일 한 줄씩 이어 붙임)
+    """
+    CREATE TABLE IF NOT EXISTS portfolio_daily (
+      account VARCHAR(32) NOT NULL,
+      trade_date DATE NOT NULL,
+      equity BIGINT NOT NULL,
+      tot_est_amt BIGINT NOT NULL,
+      tot_pur_amt BIGINT NOT NULL,
+      entr BIGINT NOT NULL,
+      d2_entra BIGINT NOT NULL,
+      realized_pnl BIGINT NOT NULL,
+      cum_realized_pnl BIGINT NOT NULL,
+      daily_return DOUBLE NOT NULL,
+      cum_return DOUBLE NOT NULL,
+      updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+      PRIMARY KEY (account, trade_date)
+    )
+    """,
+    # portfolio_daily 갱신 시 계좌의 날짜 구간 snapshot 조회
+    """
+    CREATE INDEX IF NOT EXISTS idx_account_summary_account_snapshot
+      ON account_summary (account, snapshot_date)
+    """,
+]
+
+# 원본 테이블은 raw_json 대신 raw_payloads 참조만 보관 (옛 row의 raw_json은 archive_raw.py로 이전)
+RAW_REF_TABLES = ("account_summary", "holdings", "realized_pnl_daily")
+
+# 정규화 컬럼: 종목코드 앞 'A' / 공백 제거, 종목명 앞 '*'(신용 표시) 제거, 현금/신용 구분
+# 새 row는 쓰는 시점에 utils.parsers.norm_* 로 채우고, 컬럼을 처음 추가할 때만 기존 row를 SQL로 채움
+_NORM_STK_CD = (
+    "CASE WHEN LEFT(TRIM(stk_cd), 1) = 'A' THEN SUBSTRING(TRIM(stk_cd), 2) "
+    "ELSE TRIM(stk_cd) END"
+)
+_NORM_STK_NM = "TRIM(TRIM(LEADING '*' FROM TRIM(stk_nm)))"
+NORMALIZED_COLUMNS = {
+    "holdings": (
+        ("stk_cd_norm", "VARCHAR(20)", _NORM_STK_CD),
+        ("stk_nm_norm", "VARCHAR(100)", _NORM_STK_NM),
+        (
+            "crd_class_norm",
+            "VARCHAR(20)",
+            "CASE WHEN TRIM(COALESCE(loan_dt, '')) <> '' OR stk_nm LIKE '*%' "
+            "THEN 'CREDIT' ELSE 'CASH' END",
+        ),
+    ),
+    "position_episodes": (
+        ("stk_cd_norm", "VARCHAR(20)", _NORM_STK_CD),
+        ("stk_nm_norm", "VARCHAR(100)", _NORM_STK_NM),
+        (
+            "crd_class_norm",
+            "VARCHAR(20)",
+            "COALESCE(NULLIF(TRIM(crd_class), ''), 'CASH')",
+        ),
+    ),
+}
+
+NORMALIZED_INDEX_DDL = [
+    # 종목별 잔고 이력 조회
+    """
+    CREATE INDEX IF NOT EXISTS idx_holdings_account_norm
+      ON holdings (account, stk_cd_norm, crd_class_norm, snapshot_date)
+    """,
+    # open_positions 갱신: 정규화 key의 열린 episode
+    """
+    CREATE INDEX IF NOT EXISTS idx_position_episodes_account_norm
+      ON position_episodes (account, stk_cd_norm, crd_class_norm, end_dt)
+    """,
+]
+
+# 요약 테이블 채우기 (조건은 호출하는 쪽에서 붙임: 처음 생성 시 전체, 이후 바뀐 row / key만)
+LATEST_HOLDINGS_INSERT = """
+    INSERT INTO latest_holdings (
+      account, holding_id, snapshot_date,
+      stk_cd, crd_class, stk_nm, loan_dt,
+      rmnd_qty, avg_prc, cur_prc, evlt_amt, pl_amt, pl_rt, pur_amt
+    )
+    SELECT
+      h.account, h.id, h.snapshot_date,
+      h.stk_cd_norm, h.crd_class_norm, h.stk_nm_norm, COALESCE(h.loan_dt, ''),
+      h.rmnd_qty, h.avg_prc, h.cur_prc, h.evlt_amt, h.pl_amt, h.pl_rt, h.pur_amt
+    FROM holdings h
+"""
+OPEN_POSITIONS_INSERT = """
+    INSERT INTO open_positions (
+      account, stk_cd, crd_class, stk_nm, first_buy_dt, open_episodes, pos_qty
+    )
+    SELECT
+      account, stk_cd_norm, crd_class_norm,
+      MAX(stk_nm_norm), MIN(start_dt), COUNT(*), SUM(end_qty)
+    FROM position_episodes
+    WHERE end_dt IS NULL {cond}
+    GROUP BY account, stk_cd_norm, crd_class_norm
+"""
+SUMMARY_SEED_SQL = {
+    "latest_holdings": LATEST_HOLDINGS_INSERT
+    + """
+    JOIN (
+      SELECT account, MAX(snapshot_date) AS sd FROM holdings GROUP BY account
+    ) t ON t.account = h.account AND t.sd = h.snapshot_date
+    WHERE h.rmnd_qty > 0
+    """,
+    "open_positions": OPEN_POSITIONS_INSERT.format(cond=""),
+}
+
+# 계좌 컬럼 추가 전에 만들어진 보조 테이블의 PK -> account 포함 PK로 교체
+ACCOUNT_PRIMARY_KEYS = {
+    "position_checkpoints": ("account", "name"),
+    "lot_match_open_lots": ("account", "stk_cd", "crd_class", "stack_pos"),
+    "position_episode_state": ("account", "stk_cd", "crd_class"),
+    "backfill_progress": ("account", "query_date"),
+}
+
+# DB에서 직접 관리하는 원본 테이블: 기존 unique key(예: 주문번호)는 계좌 안에서만 유일
+ACCOUNT_SCOPED_UNIQUE_TABLES = (
+    "account_summary",
+    "holdings",
+    "realized_pnl_daily",
+    "account_trade_history",
+)
+
+
+def _index_columns(cur, table: str) -> Dict[str, List[str]]:
+    """
+    unique index 이름 -> 컬럼 목록 (PRIMARY 포함)
+    """
+    cur.execute(
+        """
+        SELECT index_name, column_name
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND non_unique = 0
+        ORDER BY index_name, seq_in_index
+        """,
+        (table,),
+    )
+    indexes: Dict[str, List[str]] = {}
+    for index_name, column_name in cur.fetchall():
+        indexes.setdefault(index_name, []).append(column_name)
+    return indexes
+
+
+def _scope_keys_by_account(cur) -> None:
+    for table, pk in ACCOUNT_PRIMARY_KEYS.items():
+        if _index_columns(cur, table).get("PRIMARY") != list(pk):
+            cur.execute(
+                f"ALTER TABLE {table} DROP PRIMARY KEY, "
+                f"ADD PRIMARY KEY ({', '.join(pk)})"
+            )
+
+    for table in ACCOUNT_SCOPED_UNIQUE_TABLES:
+        for name, cols in _index_columns(cur, table).items():
+            if name == "PRIMARY" or "account" in cols:
+                continue
+            cur.execute(
+                f"ALTER TABLE {table} DROP INDEX {name}, "
+                f"ADD UNIQUE INDEX {name} (account, {', '.join(cols)})"
+            )
+
+
+def _existing_columns(cur, table: str) -> List[str]:
+    cur.execute(
+        """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+        """,
+        (table,),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def _existing_tables(cur, tables) -> List[str]:
+    cur.execute(
+        f"""
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = DATABASE()
+          AND table_name IN ({', '.join(['%s'] * len(tables))})
+        """,
+        list(tables),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def _add_raw_ref_columns(cur) -> None:
+    """
+    raw_ref 컬럼 추가 / raw_json NULL 허용. 이미 되어 있으면 DDL을 실행하지 않음
+    (ALTER는 매 실행마다 테이블 메타데이터 잠금을 잡으므로)
+    raw_json을 바꿀 때는 기존 타입과 column CHECK(예: JSON 타입의 json_valid)를 그대로 유지
+    """
+    for table in RAW_REF_TABLES:
+        cur.execute(
+            """
+            SELECT column_name, column_type, is_nullable
+            FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s
+              AND column_name IN ('raw_json', 'raw_ref')
+            """,
+            (table,),
+        )
+        columns = {
+            name: (column_type, nullable)
+            for name, column_type, nullable in cur.fetchall()
+        }
+        changes = []
+        if "raw_ref" not in columns:
+            changes.append("ADD COLUMN raw_ref CHAR(64) NULL")
+        if "raw_json" in columns and columns["raw_json"][1] == "NO":
+            cur.execute(
+                """
+                SELECT check_clause FROM information_schema.check_constraints
+                WHERE constraint_schema = DATABASE() AND table_name = %s
+                  AND constraint_name = 'raw_json'
+                """,
+                (table,),
+            )
+            check = cur.fetchone()
+            changes.append(
+                f"MODIFY COLUMN raw_json {columns['raw_json'][0]} NULL"
+                + (f" CHECK ({check[0]})" if check else "")
+            )
+        if changes:
+            cur.execute(f"ALTER TABLE {table} " + ", ".join(changes))
+
+
+def _add_normalized_columns(cur) -> None:
+    for table, columns in NORMALIZED_COLUMNS.items():
+        existing = _existing_columns(cur, table)
+        missing = [c for c in columns if c[0] not in existing]
+        if not missing:
+            continue
+        cur.execute(
+            f"ALTER TABLE {table} "
+            + ", ".join(
+                f"ADD COLUMN {name} {ddl_type} NULL" for name, ddl_type, _ in missing
+            )
+        )
+        cur.execute(
+            f"UPDATE {table} SET "
+            + ", ".join(f"{name} = {expr}" for name, _, expr in missing)
+        )
+    for ddl in NORMALIZED_INDEX_DDL:
+        cur.execute(ddl)
+
+
+def ensure_schema(conn: pymysql.connections.Connection) -> None:
+    """
+    보조 테이블이 없으면 생성합니다. (DDL은 암묵적 commit이 일어나므로 쓰기 작업 전에 호출)
+    요약 테이블(latest_holdings / open_positions)은 처음 만들 때 기존 데이터로 채움
+    """
+    with conn.cursor() as cur:
+        created = set(SUMMARY_SEED_SQL) - set(_existing_tables(cur, SUMMARY_SEED_SQL))
+        for ddl in SCHEMA_DDL:
+            cur.execute(ddl)
+        _scope_keys_by_account(cur)
+        _add_raw_ref_columns(cur)
+        _add_normalized_columns(cur)
+        for table in sorted(created):
+            cur.execute(SUMMARY_SEED_SQL[table])
+    conn.commit()
@@ -1,41 +1,178 @@
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from clients.rest import (
-    get_account_balance,
-    get_account_trade_history,
-    get_realized_pnl_daily,
-)
-from db.connection import get_connection
+from clients.rest import fetch_daily, iter_account_trade_history_pages
+from clients.throttle import get_counters
+from config.accounts import Account, load_accounts
+from db.connection import get_pool
+from db.schema import ensure_schema
 from services.asset_service import (
     save_account_data,
-    save_account_trade_history,
+    save_account_trade_history_pages,
     save_realized_pnl_daily,
 )
-from services.position_service import build_lifo_lot_matches, build_position_episodes
-from utils.krx_calendar import is_korea_trading_day_by_samsung
+from services.portfolio_service import update_portfolio_daily
+from services.position_service import build_positions
+from utils.krx_calendar import is_trading_day
+from utils.prefetch import Prefetcher
+
+# 파생 테이블 재생성은 한 계좌씩 (다른 계좌 row 유무를 보고 TRUNCATE / 테이블 교체를 고르므로
+# 이 계좌의 commit까지 lock 안에서 끝냄)
+_positions_lock = threading.Lock()
+
+# commit 시점
+# - step: 저장 단계마다 commit (기존 방식)
+# - stage: 원본(잔고/실현손익/체결내역) 저장 후, 파생 테이블 갱신 후 두 번
+# - single: 계좌별로 전부 한 트랜잭션 (중간에 실패하면 그 계좌는 아무것도 반영 안 됨)
+#   full rebuild의 TRUNCATE / bulk 적재의 staging DDL은 암묵적 commit이라 그 지점에서 끊김
+COMMIT_MODES = ("step", "stage", "single")
+
 
+def ingest_account(
+    account: Account,
+    date: str,
+    full_rebuild: bool = False,
+    workers: int = 1,
+    bulk: bool = False,
+    commit_mode: str = "single",
+) -> None:
+    """
+    계좌 하나의 잔고 / 실현손익 / 체결내역 저장 후 portfolio_daily / lot_matches / position_episodes 갱신
+    (공용 연결 풀에서 연결을 빌려 씀)
+    """
+    if commit_mode not in COMMIT_MODES:
+        raise ValueError(f"unknown commit mode: {commit_mode}")
+    each = commit_mode == "step"
+    trade_pages = None
+    with get_pool(local_infile=bulk).connection() as conn:
+        try:
+            # 체결내역은 페이지 단위로 백그라운드에서 받기 시작하고, 잔고/실현손익은 동시에 요청
+            # (당일분을 다 받되 이미 저장된 주문은 체결이 진행된 경우에만 다시 씀)
+            trade_pages = Prefetcher(
+                iter_account_trade_history_pages(ord_dt=date, account=account)
+            )
+            fetched = fetch_daily(date, trades=False, account=account)
+            asset_data = fetched["asset"]
+            pnl_data = fetched["pnl"]
+            save_account_data(conn, asset_data, account=account.name, commit=each)
+            save_realized_pnl_daily(
+                conn, pnl_data, query_date=date, account=account.name, commit=each
+            )
+            update_portfolio_daily(
+                conn,
+                datetime.strptime(date, "%Y%m%d").date(),
+                account=account.name,
+                commit=each,
+            )
+            save_account_trade_history_pages(
+                conn, trade_pages, trade_date=date, account=account.name, commit=each
+            )
+            if commit_mode == "stage":
+                conn.commit()
+            with _positions_lock:
+                build_positions(
+                    conn,
+                    end_date=date,
+                    full_rebuild=full_rebuild,
+                    workers=workers,
+                    bulk=bulk,
+                    account=account.name,
+                    commit=each,
+                )
+                if not each:
+                    conn.commit()
+            print(f"[{account.name}] DB 저장 완료")
+        finally:
+            if trade_pages is not None:
+                trade_pages.close()
 
-def main():
 
-    if not is_korea_trading_day_by_samsung():
+def main(
+    full_rebuild: bool = False,
+    workers: int = 1,
+    bulk: bool = False,
+    account_workers: int = 4,
+    commit_mode: str = "single",
+):
+
+    if not is_trading_day():
         print("오늘은 KRX 휴장일입니다. 스크립트를 종료합니다.")
         return
     date = datetime.now().strftime("%Y%m%d")
     # date = "20251212"
-    asset_data = get_account_balance()
-    pnl_data = get_realized_pnl_daily(date)
-    trades_data = get_account_trade_history(ord_dt=date)
-    conn = get_connection()
-    try:
-        save_account_data(conn, asset_data)
-        save_realized_pnl_daily(conn, pnl_data, query_date=date)
-        save_account_trade_history(conn, trades_data, trade_date=date)
-        build_lifo_lot_matches(conn, start_date="2025-12-01", end_date=date)
-        build_position_episodes(conn)
-        print("DB 저장 완료")
-    finally:
-        conn.close()
+    accounts = load_accounts()
+
+    # 계좌 worker들이 같은 풀의 연결을 나눠 씀
+    db_pool = get_pool(local_infile=bulk, max_size=max(1, account_workers))
+    with db_pool.connection() as conn:
+        ensure_schema(conn)
+
+    # 계좌별 조회/저장은 스레드 풀에서 동시에 (호출 한도는 계좌마다 따로 적용됨)
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, account_workers)) as executor:
+        futures = {
+            executor.submit(
+                ingest_account,
+                account,
+                date,
+                full_rebuild,
+                workers,
+                bulk,
+                commit_mode,
+            ): account
+            for account in accounts
+        }
+        for fut, account in futures.items():
+            try:
+                fut.result()
+            except Exception as e:
+                # 한 계좌가 실패해도 나머지 계좌는 저장
+                print(f"[{account.name}] ERROR: {e!r}")
+                failed.append(account.name)
+
+    db_pool.close()
+    print(f"API 호출 통계: {get_counters()}")
+    if failed:
+        raise SystemExit(f"실패한 계좌: {', '.join(failed)}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="lot_matches 등 파생 테이블을 checkpoint 없이 처음부터 재생성",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="종목별 병렬 재생 프로세스 수 (full rebuild 시 권장: CPU 코어 수)",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="full rebuild 결과를 LOAD DATA LOCAL INFILE 로 적재 (불가 시 batched INSERT)",
+    )
+    parser.add_argument(
+        "--account-workers",
+        type=int,
+        default=4,
+        help="동시에 조회/저장할 계좌 수",
+    )
+    parser.add_argument(
+        "--commit-mode",
+        choices=COMMIT_MODES,
+        default="single",
+        help="step: 저장마다 commit / stage: 원본, 파생 테이블 두 번 / single: 계좌별 한 번",
+    )
+    args = parser.parse_args()
+    main(
+        full_rebuild=args.full_rebuild,
+        workers=args.workers,
+        bulk=args.bulk,
+        account_workers=args.account_workers,
+        commit_mode=args.commit_mode,
+    )
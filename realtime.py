@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import json
+from datetime import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from clients.realtime import ORDER_FILL_TYPE, iter_realtime_messages
+from config.accounts import get_account
+from db.connection import get_connection
+from db.schema import ensure_schema
+from services.position_service import LivePositionEngine
+from services.realtime_service import parse_fill, parse_order_time, save_live_fill
+
+KST = ZoneInfo("Asia/Seoul")
+
+
+async def run_realtime(
+    url: Optional[str] = None,
+    record: Optional[str] = None,
+    account_name: Optional[str] = None,
+) -> None:
+    """
+    실시간 주문체결을 받아 account_trade_history에 반영하고
+    lot_matches / position_episodes를 체결 단위로 바로 갱신
+    record: 받은 REAL 메시지를 jsonl로 기록 (utils.ws_replay_server로 재생 가능)
+    account_name: 로그인할 계좌 (기본: 첫 번째 계좌, 연결 하나가 계좌 하나)
+    연결이 끊기면 clients.realtime이 재접속하고, 그때마다 engine.sync()로 상태를 다시 맞춤
+    """
+    account = get_account(account_name)
+    conn = get_connection()
+    record_file = open(record, "a", encoding="utf-8") if record else None
+    try:
+        ensure_schema(conn)
+        engine = LivePositionEngine(conn, account=account.name)
+        # 주문번호 -> 접수 이벤트의 주문시간 (체결 row의 ord_tm)
+        order_times = {}
+        # 재접속하면 끊긴 동안 REST 수집분 등 DB에 쌓인 미반영 trade를 배치 재생으로 따라잡음
+        async for msg in iter_realtime_messages(
+            url, account=account, on_reconnect=engine.sync
+        ):
+            if record_file:
+                record_file.write(json.dumps(msg, ensure_ascii=False) + "\n")
+                record_file.flush()
+            trade_date = datetime.now(KST).date()
+            for item in msg.get("data", []):
+                if item.get("type") != ORDER_FILL_TYPE:
+                    continue
+                values = item.get("values", {})
+                accepted = parse_order_time(values)
+                if accepted is not None:
+                    order_times[accepted[0]] = accepted[1]
+                fill = parse_fill(values, trade_date, order_times)
+                if fill is None:
+                    continue
+                row = save_live_fill(conn, fill, account=account.name)
+                engine.apply_fill(row)
+                print(
+                    f"{fill['cntr_tm']} {fill['stk_nm']} {fill['io_tp_nm']} "
+                    f"{fill['unit_qty']}주 @ {fill['unit_px']}"
+                )
+    finally:
+        if record_file:
+            record_file.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--url", default=None, help="websocket 주소 (기본: 설정의 SOCKET_URL)"
+    )
+    parser.add_argument(
+        "--record", default=None, help="받은 실시간 메시지를 기록할 jsonl 경로"
+    )
+    parser.add_argument(
+        "--account", default=None, help="계좌 이름 (기본: 첫 번째 계좌)"
+    )
+    args = parser.parse_args()
+    try:
+        asyncio.run(
+            run_realtime(url=args.url, record=args.record, account_name=args.account)
+        )
+    except KeyboardInterrupt:
+        print("realtime 종료")
@@ -1,157 +1,341 @@
-import json
+from collections import Counter
 from datetime import date, datetime
-from typing import Any, Dict, List
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pymysql
-from utils.parsers import to_float, to_int
+from config.accounts import DEFAULT_ACCOUNT
+from config.api_endpoints import AccountStatus, AccountTradeHistory, RealizedPnLDaily
+from db.bulk import DEFAULT_BATCH_SIZE, executemany_batched
+from db.schema import LATEST_HOLDINGS_INSERT
+from services.bulk_load import BulkLoader
+from services.position_service import rewind_positions
+from services.raw_store import payload_hash, store_payload, store_payloads
+from utils.decoders import Decoder
+from utils.parsers import holding_crd_class, norm_stk_cd, norm_stk_nm, to_int
 
+# 응답 item -> DB tuple 변환기 (endpoint 필드 schema로 import 시 한 번 compile)
+_SUMMARY = Decoder(AccountStatus.summary_fields)
+_HOLDING = Decoder(AccountStatus.fields)
+_REALIZED_PNL = Decoder(RealizedPnLDaily.fields)
+_TRADE = Decoder(AccountTradeHistory.fields)
 
-def save_account_data(
-    conn: pymysql.connections.Connection, data: Dict[str, Any]
+# account_trade_history INSERT 컬럼 순서 (bulk 적재용): 응답 필드 + trade_date, account
+TRADE_HISTORY_COLUMNS = _TRADE.columns + ("trade_date", "account")
+
+
+def account_data_hash(data: Dict[str, Any]) -> str:
+    """
+    잔고 조회 응답 내용 hash (종목별 잔고 stk_acnt_evlt_prst + 계좌 요약)
+    return_code / return_msg 처럼 내용과 무관한 필드는 제외
+    """
+    return payload_hash(
+        {k: v for k, v in data.items() if k not in ("return_code", "return_msg")}
+    )
+
+
+def _holding_keys(pairs: Iterable[Tuple[str, str]]) -> List[Tuple[str, str, int]]:
+    """
+    (stk_cd, loan_dt) 목록 -> 같은 종목 중복(신용 대출일별 등) 구분용 순번을 붙인 key
+    """
+    seen: Counter = Counter()
+    keys = []
+    for stk_cd, loan_dt in pairs:
+        keys.append((stk_cd, loan_dt, seen[(stk_cd, loan_dt)]))
+        seen[(stk_cd, loan_dt)] += 1
+    return keys
+
+
+def _holding_norm(stk: Dict[str, Any]) -> Tuple[str, str, str]:
+    # holdings의 stk_cd_norm, stk_nm_norm, crd_class_norm
+    return (
+        norm_stk_cd(stk.get("stk_cd")),
+        norm_stk_nm(stk.get("stk_nm")),
+        holding_crd_class(stk.get("loan_dt"), stk.get("stk_nm")),
+    )
+
+
+def _refresh_latest_holdings(
+    cur,
+    account: str,
+    snapshot_date: date,
+    changed_hashes: List[str],
+    removed_ids: List[int],
 ) -> None:
+    """
+    latest_holdings 증분 갱신: 이전 snapshot / 빠진 종목 row 삭제, 바뀐 holdings row만 다시 복사
+    (rmnd_qty가 0이 된 종목은 빠짐)
+    """
+    cur.execute(
+        "DELETE FROM latest_holdings WHERE account=%s AND snapshot_date<>%s",
+        (account, snapshot_date),
+    )
+    if removed_ids:
+        cur.execute(
+            f"""
+            DELETE FROM latest_holdings
+            WHERE account=%s AND holding_id IN ({', '.join(['%s'] * len(removed_ids))})
+            """,
+            [account, *removed_ids],
+        )
+    if not changed_hashes:
+        return
+    in_hashes = ", ".join(["%s"] * len(changed_hashes))
+    changed = f"h.snapshot_date=%s AND h.account=%s AND h.row_hash IN ({in_hashes})"
+    params = [snapshot_date, account, *changed_hashes]
+    cur.execute(
+        f"""
+        DELETE FROM latest_holdings
+        WHERE account=%s AND holding_id IN (SELECT h.id FROM holdings h WHERE {changed})
+        """,
+        [account, *params],
+    )
+    cur.execute(
+        LATEST_HOLDINGS_INSERT + f"WHERE {changed} AND h.rmnd_qty > 0",
+        params,
+    )
+
+
+def save_account_data(
+    conn: pymysql.connections.Connection,
+    data: Dict[str, Any],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    last_hash: Optional[str] = None,
+    account: str = DEFAULT_ACCOUNT,
+    commit: bool = True,
+) -> str:
     """
     키움 잔고 조회 응답(JSON dict)을 trading.account_summary / holdings 테이블에 저장
+    - account: 계좌 이름 (config.accounts), 같은 날 같은 계좌 snapshot을 갱신
+    - 저장된 snapshot과 row_hash를 비교해 바뀐 row만 INSERT / UPDATE / DELETE
+      (account_summary는 제자리 UPDATE라 account_id 유지, holdings는 (stk_cd, loan_dt) 단위)
+    - 원본 응답은 raw_payloads에 압축 저장하고 raw_ref만 기록 (services.raw_store)
+    - 정규화 컬럼(stk_cd_norm / stk_nm_norm / crd_class_norm)을 같이 쓰고
+      latest_holdings 요약 테이블도 바뀐 row만 갱신
+    - last_hash: 직전에 저장한 응답 hash. 내용이 같으면 DB 비교도 생략
+    - commit=False: 호출하는 쪽에서 commit (여러 저장을 한 트랜잭션으로 묶을 때)
+    - return: 이번 응답 hash
     """
+    data_hash = account_data_hash(data)
+    if data_hash == last_hash:
+        return data_hash
+
     snapshot_date = date.today()
     with conn.cursor() as cur:
+        # 1) account_summary : 상단 계좌 요약 + 모든 숫자/비율 + return_code/msg + raw_ref
         cur.execute(
-            "DELETE FROM account_summary WHERE snapshot_date=%s", (snapshot_date)
+            """
+            SELECT account_id, row_hash FROM account_summary
+            WHERE snapshot_date=%s AND account=%s
+            ORDER BY account_id
+            LIMIT 1
+            """,
+            (snapshot_date, account),
         )
-        cur.execute("DELETE FROM holdings WHERE snapshot_date=%s", (snapshot_date))
-        # 1) account_summary : 상단 계좌 요약 + 모든 숫자/비율 + return_code/msg + raw_json
+        summary = cur.fetchone()
+        if summary is None or summary[1] != data_hash:
+            raw_ref = store_payload(cur, data)
+        if summary is None:
+            cur.execute(
+                """
+                INSERT INTO account_summary (
+                    snapshot_date,
+                    account,
+                    acnt_nm,
+                    brch_nm,
+                    entr,
+                    d2_entra,
+                    tot_est_amt,
+                    aset_evlt_amt,
+                    tot_pur_amt,
+                    prsm_dpst_aset_amt,
+                    tot_grnt_sella,
+                    tdy_lspft_amt,
+                    invt_bsamt,
+                    lspft_amt,
+                    tdy_lspft,
+                    lspft2,
+                    lspft,
+                    tdy_lspft_rt,
+                    lspft_ratio,
+                    lspft_rt,
+                    return_code,
+                    return_msg,
+                    raw_ref,
+                    row_hash
+                )
+                VALUES (
+                    %s, %s,
+                    %s, %s,
+                    %s, %s,
+                    %s, %s, %s,
+                    %s, %s,
+                    %s, %s,
+                    %s, %s, %s, %s,
+                    %s, %s, %s,
+                    %s, %s,
+                    %s, %s
+                )
+                """,
+                (snapshot_date, account) + _SUMMARY.row(data) + (raw_ref, data_hash),
+            )
+            account_id = cur.lastrowid
+        else:
+            account_id = summary[0]
+            if summary[1] != data_hash:
+                cur.execute(
+                    """
+                    UPDATE account_summary
+                    SET acnt_nm=%s, brch_nm=%s,
+                        entr=%s, d2_entra=%s,
+                        tot_est_amt=%s, aset_evlt_amt=%s, tot_pur_amt=%s,
+                        prsm_dpst_aset_amt=%s, tot_grnt_sella=%s,
+                        tdy_lspft_amt=%s, invt_bsamt=%s,
+                        lspft_amt=%s, tdy_lspft=%s, lspft2=%s, lspft=%s,
+                        tdy_lspft_rt=%s, lspft_ratio=%s, lspft_rt=%s,
+                        return_code=%s, return_msg=%s,
+                        raw_json=NULL, raw_ref=%s, row_hash=%s
+                    WHERE account_id=%s
+                    """,
+                    _SUMMARY.row(data) + (raw_ref, data_hash, account_id),
+                )
+
+        # 2) holdings : 저장된 종목별 row_hash와 비교
         cur.execute(
             """
-            INSERT INTO account_summary (
+            SELECT id, stk_cd, loan_dt, account_id, row_hash FROM holdings
+            WHERE snapshot_date=%s AND account=%s
+            ORDER BY id
+            """,
+            (snapshot_date, account),
+        )
+        stored_rows = cur.fetchall()
+        stored = {
+            key: row
+            for key, row in zip(
+                _holding_keys((r[1], r[2] or "") for r in stored_rows), stored_rows
+            )
+        }
+
+        stocks = data.get("stk_acnt_evlt_prst", [])
+        keys = _holding_keys(
+            (stk.get("stk_cd"), stk.get("loan_dt") or "") for stk in stocks
+        )
+        inserts, updates, changed, changed_hashes = [], [], [], []
+        for key, stk in zip(keys, stocks):
+            # 종목 row의 내용 hash가 곧 raw_payloads의 raw_ref
+            row_hash = payload_hash(stk)
+            row = stored.pop(key, None)
+            if row is None:
+                inserts.append(
+                    (snapshot_date, account, account_id)
+                    + _HOLDING.row(stk)
+                    + _holding_norm(stk)
+                    + (row_hash, row_hash)
+                )
+            elif row[4] != row_hash or row[3] != account_id:
+                updates.append(
+                    (account_id,)
+                    + _HOLDING.row(stk)
+                    + _holding_norm(stk)
+                    + (row_hash, row_hash, row[0])
+                )
+            else:
+                continue
+            changed.append(stk)
+            changed_hashes.append(row_hash)
+        store_payloads(cur, changed, batch_size)
+
+        # 응답에서 빠진 종목 (전량 매도 등)
+        removed_ids = [row[0] for row in stored.values()]
+        if removed_ids:
+            cur.execute(
+                "DELETE FROM holdings "
+                f"WHERE id IN ({', '.join(['%s'] * len(removed_ids))})",
+                removed_ids,
+            )
+        if updates:
+            cur.executemany(
+                """
+                UPDATE holdings
+                SET account_id=%s,
+                    stk_cd=%s, stk_nm=%s,
+                    rmnd_qty=%s, avg_prc=%s, cur_prc=%s, evlt_amt=%s,
+                    pl_amt=%s, pl_rt=%s,
+                    loan_dt=%s,
+                    pur_amt=%s, setl_remn=%s, pred_buyq=%s, pred_sellq=%s,
+                    tdy_buyq=%s, tdy_sellq=%s,
+                    stk_cd_norm=%s, stk_nm_norm=%s, crd_class_norm=%s,
+                    raw_json=NULL, raw_ref=%s, row_hash=%s
+                WHERE id=%s
+                """,
+                updates,
+            )
+        executemany_batched(
+            cur,
+            """
+            INSERT INTO holdings (
                 snapshot_date,
-                acnt_nm,
-                brch_nm,
-                entr,
-                d2_entra,
-                tot_est_amt,
-                aset_evlt_amt,
-                tot_pur_amt,
-                prsm_dpst_aset_amt,
-                tot_grnt_sella,
-                tdy_lspft_amt,
-                invt_bsamt,
-                lspft_amt,
-                tdy_lspft,
-                lspft2,
-                lspft,
-                tdy_lspft_rt,
-                lspft_ratio,
-                lspft_rt,
-                return_code,
-                return_msg,
-                raw_json
+                account,
+                account_id,
+                stk_cd,
+                stk_nm,
+                rmnd_qty,
+                avg_prc,
+                cur_prc,
+                evlt_amt,
+                pl_amt,
+                pl_rt,
+                loan_dt,
+                pur_amt,
+                setl_remn,
+                pred_buyq,
+                pred_sellq,
+                tdy_buyq,
+                tdy_sellq,
+                stk_cd_norm,
+                stk_nm_norm,
+                crd_class_norm,
+                raw_ref,
+                row_hash
             )
             VALUES (
-                %s,
-                %s, %s,
-                %s, %s,
-                %s, %s, %s,
                 %s, %s,
+                %s,
                 %s, %s,
                 %s, %s, %s, %s,
-                %s, %s, %s,
                 %s, %s,
-                %s
+                %s,
+                %s, %s, %s, %s, %s, %s,
+                %s, %s, %s,
+                %s, %s
             )
             """,
-            (
-                snapshot_date,
-                data.get("acnt_nm"),
-                data.get("brch_nm"),
-                to_int(data.get("entr")),
-                to_int(data.get("d2_entra")),
-                to_int(data.get("tot_est_amt")),
-                to_int(data.get("aset_evlt_amt")),
-                to_int(data.get("tot_pur_amt")),
-                to_int(data.get("prsm_dpst_aset_amt")),
-                to_int(data.get("tot_grnt_sella")),
-                to_int(data.get("tdy_lspft_amt")),
-                to_int(data.get("invt_bsamt")),
-                to_int(data.get("lspft_amt")),
-                to_int(data.get("tdy_lspft")),
-                to_int(data.get("lspft2")),
-                to_int(data.get("lspft")),
-                to_float(data.get("tdy_lspft_rt")),
-                to_float(data.get("lspft_ratio")),
-                to_float(data.get("lspft_rt")),
-                to_int(data.get("return_code")),
-                data.get("return_msg"),
-                json.dumps(data, ensure_ascii=False),
-            ),
+            inserts,
+            batch_size,
         )
 
-        account_id = cur.lastrowid
-
-        for stk in data.get("stk_acnt_evlt_prst", []):
-            cur.execute(
-                """
-                INSERT INTO holdings (
-                    snapshot_date,
-                    account_id,
-                    stk_cd,
-                    stk_nm,
-                    rmnd_qty,
-                    avg_prc,
-                    cur_prc,
-                    evlt_amt,
-                    pl_amt,
-                    pl_rt,
-                    loan_dt,
-                    pur_amt,
-                    setl_remn,
-                    pred_buyq,
-                    pred_sellq,
-                    tdy_buyq,
-                    tdy_sellq,
-                    raw_json
-                )
-                VALUES (
-                    %s,
-                    %s,  -- account_id
-                    %s, %s,
-                    %s, %s, %s, %s,
-                    %s, %s,
-                    %s,
-                    %s, %s, %s, %s, %s, %s,
-                    %s
-                )
-                """,
-                (
-                    snapshot_date,
-                    account_id,
-                    stk.get("stk_cd"),
-                    stk.get("stk_nm"),
-                    to_int(stk.get("rmnd_qty")),
-                    to_int(stk.get("avg_prc")),
-                    to_int(stk.get("cur_prc")),
-                    to_int(stk.get("evlt_amt")),
-                    to_int(stk.get("pl_amt")),
-                    to_float(stk.get("pl_rt")),
-                    stk.get("loan_dt") or "",
-                    to_int(stk.get("pur_amt")),
-                    to_int(stk.get("setl_remn")),
-                    to_int(stk.get("pred_buyq")),
-                    to_int(stk.get("pred_sellq")),
-                    to_int(stk.get("tdy_buyq")),
-                    to_int(stk.get("tdy_sellq")),
-                    json.dumps(stk, ensure_ascii=False),
-                ),
+        if summary is None or changed_hashes or removed_ids:
+            _refresh_latest_holdings(
+                cur, account, snapshot_date, changed_hashes, removed_ids
             )
 
-    conn.commit()
+    if commit:
+        conn.commit()
+    return data_hash
 
 
 def save_realized_pnl_daily(
     conn: pymysql.connections.Connection,
     data: Dict[str, Any],
     query_date: str,  # "YYYYMMDD" 형식으로 전달
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    account: str = DEFAULT_ACCOUNT,
+    commit: bool = True,
 ) -> None:
     """
     일자별 실현손익 응답(JSON)을 trading.realized_pnl_daily 테이블에 저장
+    (종목 row 원본은 raw_payloads에 압축 저장, commit=False면 호출하는 쪽에서 commit)
     """
 
     # "20251211" -> date 객체로 변환
@@ -162,158 +346,201 @@ def save_realized_pnl_daily(
     return_msg = data.get("return_msg")
 
     with conn.cursor() as cur:
-        cur.execute("DELETE FROM realized_pnl_daily WHERE query_date=%s", (query_date))
-        for item in rows:
-            cur.execute(
-                """
-                INSERT INTO realized_pnl_daily (
-                    query_date,
-                    stk_cd,
-                    stk_nm,
-                    cntr_qty,
-                    buy_uv,
-                    cntr_pric,
-                    tdy_sel_pl,
-                    pl_rt,
-                    tdy_trde_cmsn,
-                    tdy_trde_tax,
-                    wthd_alowa,
-                    loan_dt,
-                    crd_tp,
-                    return_code,
-                    return_msg,
-                    raw_json
-                ) VALUES (
-                    %s, %s, %s,
-                    %s, %s, %s,
-                    %s, %s,
-                    %s, %s, %s,
-                    %s, %s,
-                    %s, %s,
-                    %s
-                )
-                """,
-                (
-                    qdate,
-                    item.get("stk_cd1"),  # 종목코드
-                    item.get("stk_nm"),
-                    to_int(item.get("cntr_qty")),
-                    to_int(item.get("buy_uv")),
-                    to_int(item.get("cntr_pric")),
-                    to_int(item.get("tdy_sel_pl1")),  # 실현손익
-                    to_float(item.get("pl_rt")),
-                    to_int(item.get("tdy_trde_cmsn")),
-                    to_int(item.get("tdy_trde_tax")),
-                    to_int(item.get("wthd_alowa")),
-                    item.get("loan_dt") or "",
-                    item.get("crd_tp"),
-                    return_code,
-                    return_msg,
-                    json.dumps(item, ensure_ascii=False),
-                ),
+        cur.execute(
+            "DELETE FROM realized_pnl_daily WHERE query_date=%s AND account=%s",
+            (query_date, account),
+        )
+        raw_refs = store_payloads(cur, rows, batch_size)
+        executemany_batched(
+            cur,
+            """
+            INSERT INTO realized_pnl_daily (
+                stk_cd,
+                stk_nm,
+                cntr_qty,
+                buy_uv,
+                cntr_pric,
+                tdy_sel_pl,
+                pl_rt,
+                tdy_trde_cmsn,
+                tdy_trde_tax,
+                wthd_alowa,
+                loan_dt,
+                crd_tp,
+                query_date,
+                account,
+                return_code,
+                return_msg,
+                raw_ref
+            ) VALUES (
+                %s, %s,
+                %s, %s, %s,
+                %s, %s,
+                %s, %s, %s,
+                %s, %s,
+                %s, %s,
+                %s, %s,
+                %s
             )
+            """,
+            (
+                row + (raw_ref,)
+                for row, raw_ref in zip(
+                    _REALIZED_PNL.page(
+                        rows, suffix=(qdate, account, return_code, return_msg)
+                    ),
+                    raw_refs,
+                )
+            ),
+            batch_size,
+        )
+
+    if commit:
+        conn.commit()
+
+
+# 체결이 진행되면 바뀌는 컬럼: 이미 저장된 주문을 다시 받으면 갱신
+# (REST 응답이 실시간 반영분보다 늦을 수 있어 누적 체결수량이 줄지 않는 경우에만,
+#  MySQL은 UPDATE 절을 왼쪽부터 적용하므로 cntr_qty는 마지막에 갱신)
+_FILL_COLUMNS = ("ord_remnq", "cntr_uv", "cnfm_qty", "cnfm_tm")
+_ORD_NO = TRADE_HISTORY_COLUMNS.index("ord_no")
+_CNTR_QTY = TRADE_HISTORY_COLUMNS.index("cntr_qty")
+_ORD_REMNQ = TRADE_HISTORY_COLUMNS.index("ord_remnq")
+
+_TRADE_UPSERT = f"""
+    INSERT INTO account_trade_history ({", ".join(TRADE_HISTORY_COLUMNS)})
+    VALUES ({", ".join(["%s"] * len(TRADE_HISTORY_COLUMNS))})
+    ON DUPLICATE KEY UPDATE
+        {", ".join(
+            f"{c} = IF(VALUES(cntr_qty) >= cntr_qty, VALUES({c}), {c})"
+            for c in _FILL_COLUMNS
+        )},
+        cntr_qty = GREATEST(cntr_qty, VALUES(cntr_qty))
+    """
+
+
+def _stored_fills(
+    cur, trade_date: str, account: str
+) -> Dict[str, Tuple[int, int, int]]:
+    """
+    trade_date에 저장된 주문별 (id, cntr_qty, ord_remnq)
+    """
+    cur.execute(
+        """
+        SELECT ord_no, id, cntr_qty, ord_remnq
+        FROM account_trade_history
+        WHERE trade_date = %s AND account = %s
+        """,
+        (trade_date, account),
+    )
+    return {
+        ord_no: (to_int(id_), to_int(cntr_qty), to_int(ord_remnq))
+        for ord_no, id_, cntr_qty, ord_remnq in cur.fetchall()
+    }
+
+
+def _split_trade_rows(
+    rows: Iterable[Tuple],
+    stored: Dict[str, Tuple[int, int, int]],
+    changed: List[Tuple[int, Tuple]],
+) -> Iterator[Tuple]:
+    """
+    새 주문 row는 yield, 저장된 주문 중 체결이 진행된 row는 (id, row)로 changed에 모음
+    (저장된 것과 같거나 뒤처진 row는 버림)
+    """
+    for row in rows:
+        prev = stored.get(row[_ORD_NO])
+        if prev is None:
+            yield row
+        elif (
+            row[_CNTR_QTY] >= prev[1] and (row[_CNTR_QTY], row[_ORD_REMNQ]) != prev[1:]
+        ):
+            changed.append((prev[0], row))
+
 
-    conn.commit()
+def _refresh_fills(
+    cur, changed: List[Tuple[int, Tuple]], account: str, batch_size: int
+) -> None:
+    """
+    체결이 진행된 기존 주문 row 갱신
+    이미 lot_matches / position_episodes에 재생된 row가 바뀌었으면 그 종목 key만 다시 재생
+    (다른 key와 checkpoint는 그대로라 다음 build_positions는 새 trade만 이어서 재생)
+    """
+    if not changed:
+        return
+    executemany_batched(cur, _TRADE_UPSERT, (row for _, row in changed), batch_size)
+    rewind_positions(cur, [id_ for id_, _ in changed], account=account)
 
 
 def save_account_trade_history(
     conn: pymysql.connections.Connection,
-    trades: List[Dict],
+    trades: Iterable[Dict],
     trade_date: str,  # YYYYMMDD
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    bulk: bool = False,
+    account: str = DEFAULT_ACCOUNT,
+    commit: bool = True,
 ) -> int:
     """
     계좌 주문/체결 내역을 account_trade_history 테이블에 저장
-    - 중복 데이터는 자동 무시
-    - return: 실제로 INSERT된 row 수
-    """
-
-    insert_sql = """
-    INSERT INTO account_trade_history (
-        ord_no,
-        ori_ord_no,
-        stk_cd,
-        stk_nm,
-        io_tp_nm,
-        trde_tp,
-        crd_tp,
-        loan_dt,
-        ord_qty,
-        ord_uv,
-        ord_tm,
-        acpt_tp,
-        rsrv_tp,
-        ord_remnq,
-        cntr_qty,
-        cntr_uv,
-        cnfm_qty,
-        cnfm_tm,
-        mdfy_cncl,
-        comm_ord_tp,
-        dmst_stex_tp,
-        cond_uv,
-        trade_date
-    )
-    VALUES (
-        %(ord_no)s,
-        %(ori_ord)s,
-        %(stk_cd)s,
-        %(stk_nm)s,
-        %(io_tp_nm)s,
-        %(trde_tp)s,
-        %(crd_tp)s,
-        %(loan_dt)s,
-        %(ord_qty)s,
-        %(ord_uv)s,
-        %(ord_tm)s,
-        %(acpt_tp)s,
-        %(rsrv_tp)s,
-        %(ord_remnq)s,
-        %(cntr_qty)s,
-        %(cntr_uv)s,
-        %(cnfm_qty)s,
-        %(cnfm_tm)s,
-        %(mdfy_cncl)s,
-        %(comm_ord_tp)s,
-        %(dmst_stex_tp)s,
-        %(cond_uv)s,
-        %(trade_date)s
-    )
-    ON DUPLICATE KEY UPDATE
-        ord_no = ord_no
+    - 새 주문은 INSERT, 이미 저장된 주문은 체결이 진행된 경우에만 체결 컬럼 갱신
+      (당일 재실행 시 그대로인 주문은 다시 쓰지 않음)
+    - batch_size건씩 multi-row INSERT (trades는 generator여도 됨, batch 단위로만 메모리에 올림)
+    - bulk=True: 대량 백필용. 새 주문은 LOAD DATA LOCAL INFILE 로 staging 적재 후 merge
+      (staging CREATE/DROP은 암묵적 commit이라 commit=False여도 트랜잭션이 끊김)
+    - commit=False: 호출하는 쪽에서 commit
+    - return: 새로 INSERT 되었거나 체결이 갱신된 row 수
     """
 
-    inserted = 0
+    # generator 그대로 batch 단위로만 변환 (TRADE_HISTORY_COLUMNS 순서 tuple)
+    suffix = (trade_date, account)
+    trade_row = _TRADE.row
+    changed: List[Tuple[int, Tuple]] = []
 
     with conn.cursor() as cur:
-        for t in trades:
-            params = {
-                "ord_no": t.get("ord_no"),
-                "ori_ord": t.get("ori_ord"),
-                "stk_cd": t.get("stk_cd"),
-                "stk_nm": t.get("stk_nm"),
-                "io_tp_nm": t.get("io_tp_nm"),
-                "trde_tp": t.get("trde_tp"),
-                "crd_tp": t.get("crd_tp"),
-                "loan_dt": t.get("loan_dt") or None,
-                "ord_qty": to_int(t.get("ord_qty")),
-                "ord_uv": to_int(t.get("ord_uv")),
-                "ord_tm": t.get("ord_tm"),
-                "acpt_tp": t.get("acpt_tp"),
-                "rsrv_tp": t.get("rsrv_tp"),
-                "ord_remnq": to_int(t.get("ord_remnq")),
-                "cntr_qty": to_int(t.get("cntr_qty")),
-                "cntr_uv": to_int(t.get("cntr_uv")),
-                "cnfm_qty": to_int(t.get("cnfm_qty")),
-                "cnfm_tm": t.get("cnfm_tm"),
-                "mdfy_cncl": t.get("mdfy_cncl"),
-                "comm_ord_tp": t.get("comm_ord_tp"),
-                "dmst_stex_tp": t.get("dmst_stex_tp"),
-                "cond_uv": to_int(t.get("cond_uv")),
-                "trade_date": trade_date,
-            }
-
-            cur.execute(insert_sql, params)
-            inserted += cur.rowcount  # 1이면 insert, 0이면 중복
-
-    conn.commit()
-    return inserted
+        stored = _stored_fills(cur, trade_date, account)
+        rows = _split_trade_rows(
+            (trade_row(t) + suffix for t in trades), stored, changed
+        )
+
+        if bulk:
+            with BulkLoader(
+                conn,
+                "account_trade_history",
+                TRADE_HISTORY_COLUMNS,
+                batch_size=batch_size,
+            ) as loader:
+                loader.add_rows(rows)
+                inserted = loader.load()
+        else:
+            # multi-row INSERT의 affected rows = 새로 INSERT된 row 수
+            inserted = executemany_batched(cur, _TRADE_UPSERT, rows, batch_size)
+
+        _refresh_fills(cur, changed, account, batch_size)
+
+    if commit:
+        conn.commit()
+    return inserted + len(changed)
+
+
+def save_account_trade_history_pages(
+    conn: pymysql.connections.Connection,
+    pages: Iterable[List[Dict]],
+    trade_date: str,  # YYYYMMDD
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    account: str = DEFAULT_ACCOUNT,
+    commit: bool = True,
+) -> int:
+    """
+    연속조회 페이지(clients.rest.iter_account_trade_history_pages)를 받는 대로 batch INSERT
+    utils.prefetch.Prefetcher로 감싸서 넘기면 다음 페이지 조회와 INSERT가 겹쳐서 진행됨
+    - return: 새로 INSERT 되었거나 체결이 갱신된 row 수
+    """
+    return save_account_trade_history(
+        conn,
+        chain.from_iterable(pages),
+        trade_date,
+        batch_size=batch_size,
+        account=account,
+        commit=commit,
+    )
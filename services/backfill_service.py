@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Set
+
+import pymysql
+from config.accounts import DEFAULT_ACCOUNT
+from services.asset_service import save_account_trade_history, save_realized_pnl_daily
+from utils.krx_calendar import trading_days_between
+
+
+def iter_trading_days(start_date: str, end_date: str) -> Iterator[str]:
+    """
+    start_date ~ end_date(YYYYMMDD, 양끝 포함) 중 KRX 거래일을 YYYYMMDD로 반환
+    (휴장일은 조회해도 결과가 비어있으므로 API 호출 자체를 생략)
+    """
+    start = datetime.strptime(start_date, "%Y%m%d").date()
+    end = datetime.strptime(end_date, "%Y%m%d").date()
+    for d in trading_days_between(start, end):
+        yield d.strftime("%Y%m%d")
+
+
+def load_completed_days(
+    conn: pymysql.connections.Connection,
+    start_date: str,
+    end_date: str,
+    account: str = DEFAULT_ACCOUNT,
+) -> Set[str]:
+    """
+    backfill_progress에 계좌별로 완료 기록된 조회일(YYYYMMDD)
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT query_date FROM backfill_progress
+            WHERE account = %s AND query_date BETWEEN %s AND %s
+            """,
+            (account, start_date, end_date),
+        )
+        return {row[0].strftime("%Y%m%d") for row in cur.fetchall()}
+
+
+def save_backfill_day(
+    conn: pymysql.connections.Connection,
+    query_date: str,  # YYYYMMDD
+    fetched: Dict[str, Any],
+    bulk: bool = False,
+    account: str = DEFAULT_ACCOUNT,
+) -> Dict[str, int]:
+    """
+    하루치 실현손익 / 체결내역 저장 후 backfill_progress에 완료 기록
+    저장 도중 중단되면 완료 기록이 없으므로 다음 실행에서 그 날짜를 다시 저장
+    (실현손익은 일자 단위 DELETE 후 INSERT, 체결내역은 중복 무시라 재실행해도 안전)
+    """
+    pnl_rows: List[Dict] = fetched["pnl"].get("dt_stk_div_rlzt_pl", [])
+    save_realized_pnl_daily(
+        conn, fetched["pnl"], query_date=query_date, account=account
+    )
+    trade_rows = save_account_trade_history(
+        conn, fetched["trades"], trade_date=query_date, bulk=bulk, account=account
+    )
+
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO backfill_progress (account, query_date, pnl_rows, trade_rows)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                pnl_rows = VALUES(pnl_rows),
+                trade_rows = VALUES(trade_rows),
+                completed_at = CURRENT_TIMESTAMP
+            """,
+            (account, query_date, len(pnl_rows), trade_rows),
+        )
+    conn.commit()
+    return {"pnl_rows": len(pnl_rows), "trade_rows": trade_rows}
@@ -0,0 +1,190 @@
+import os
+import tempfile
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+import pymysql
+from db.bulk import DEFAULT_BATCH_SIZE, executemany_batched
+from pymysql.constants import CLIENT
+
+# LOAD DATA LOCAL INFILE 을 쓸 수 없을 때 서버/클라이언트가 돌려주는 에러 코드
+_LOCAL_INFILE_DISABLED = {
+    1148,  # ER_NOT_ALLOWED_COMMAND
+    2068,  # CR_LOAD_DATA_LOCAL_INFILE_REJECTED
+    3948,  # ER_CLIENT_LOCAL_FILES_DISABLED
+}
+
+_TSV_ESCAPES = str.maketrans(
+    {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"}
+)
+
+
+def _tsv_value(v: Any) -> str:
+    if v is None:
+        return "\\N"
+    if isinstance(v, bool):
+        return "1" if v else "0"
+    return str(v).translate(_TSV_ESCAPES)
+
+
+def local_infile_enabled(conn: pymysql.connections.Connection) -> bool:
+    """
+    클라이언트(get_connection(local_infile=True))와 서버(@@local_infile) 모두 허용하는지 확인
+    """
+    if not conn.client_flag & CLIENT.LOCAL_FILES:
+        return False
+    with conn.cursor() as cur:
+        cur.execute("SELECT @@GLOBAL.local_infile")
+        row = cur.fetchone()
+    return bool(row and row[0])
+
+
+class BulkLoader:
+    """
+    대량 row를 임시 TSV 파일로 흘려 쓴 뒤 LOAD DATA LOCAL INFILE 로 staging 테이블에 적재하고
+    대상 테이블에 반영합니다.
+    - mode="swap": staging 으로 대상 테이블을 통째로 교체 (full rebuild, RENAME 은 암묵적 commit)
+    - mode="merge": staging -> 대상 INSERT ... SELECT (중복 키는 무시)
+    - scope=(column, value): 대상 중 이 값의 row만 다시 쓰는 경우.
+      swap은 교체 직전에 다른 값의 row가 없을 때만 하고, 있으면 scope row 삭제 후 merge
+    서버/클라이언트가 local infile 을 허용하지 않으면 staging 을 batched INSERT 로 채웁니다.
+    """
+
+    def __init__(
+        self,
+        conn: pymysql.connections.Connection,
+        table: str,
+        columns: Sequence[str],
+        mode: str = "merge",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        scope: Optional[Tuple[str, Any]] = None,
+    ) -> None:
+        if mode not in ("swap", "merge"):
+            raise ValueError(f"unknown bulk mode: {mode}")
+        self.conn = conn
+        self.table = table
+        self.staging = f"{table}_staging"
+        self.columns = list(columns)
+        self.mode = mode
+        self.scope = scope
+        self.batch_size = batch_size
+        self.row_count = 0
+        self._file = tempfile.NamedTemporaryFile(
+            "w", suffix=".tsv", encoding="utf-8", newline="", delete=False
+        )
+
+    def __enter__(self) -> "BulkLoader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add_rows(self, rows: Iterable[Sequence[Any]]) -> None:
+        write = self._file.write
+        for row in rows:
+            write("\t".join(_tsv_value(v) for v in row))
+            write("\n")
+            self.row_count += 1
+
+    def load(self) -> int:
+        """
+        staging 적재 후 대상 테이블에 반영. return: 대상 테이블에 새로 들어간 row 수
+        """
+        self._file.close()
+        cols = ", ".join(self.columns)
+
+        with self.conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {self.staging}")
+            cur.execute(f"CREATE TABLE {self.staging} LIKE {self.table}")
+
+            if not self._load_local_infile(cur, cols):
+                print(f"WARN: local infile 불가 -> {self.staging} batched INSERT 적재")
+                executemany_batched(
+                    cur,
+                    f"INSERT INTO {self.staging} ({cols}) "
+                    f"VALUES ({', '.join(['%s'] * len(self.columns))})",
+                    self._read_rows(),
+                    self.batch_size,
+                )
+
+            if self.mode == "swap" and self._exclusive(cur):
+                # 이전 실행이 RENAME 후 DROP 전에 죽었으면 _old 가 남아 RENAME 이 실패함
+                cur.execute(f"DROP TABLE IF EXISTS {self.table}_old")
+                cur.execute(
+                    f"RENAME TABLE {self.table} TO {self.table}_old, "
+                    f"{self.staging} TO {self.table}"
+                )
+                cur.execute(f"DROP TABLE {self.table}_old")
+                return self.row_count
+
+            if self.scope is not None:
+                column, value = self.scope
+                cur.execute(f"DELETE FROM {self.table} WHERE {column} = %s", (value,))
+            key = self.columns[0]
+            inserted = cur.execute(f"""
+                INSERT INTO {self.table} ({cols})
+                SELECT {cols} FROM {self.staging}
+                ON DUPLICATE KEY UPDATE {key} = {self.table}.{key}
+                """)
+            cur.execute(f"DROP TABLE {self.staging}")
+            return inserted
+
+    def close(self) -> None:
+        self._file.close()
+        if os.path.exists(self._file.name):
+            os.unlink(self._file.name)
+
+    def _exclusive(self, cur) -> bool:
+        """
+        교체해도 scope 밖 row를 잃지 않는지 교체 직전에 확인
+        (staging 적재 중에 다른 계좌 row가 들어왔으면 merge로 전환)
+        """
+        if self.scope is None:
+            return True
+        column, value = self.scope
+        cur.execute(
+            f"SELECT 1 FROM {self.table} WHERE {column} <> %s LIMIT 1 FOR UPDATE",
+            (value,),
+        )
+        return cur.fetchone() is None
+
+    def _load_local_infile(self, cur, cols: str) -> bool:
+        if not local_infile_enabled(self.conn):
+            return False
+        try:
+            cur.execute(
+                f"""
+                LOAD DATA LOCAL INFILE %s
+                INTO TABLE {self.staging}
+                CHARACTER SET utf8mb4
+                FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+                LINES TERMINATED BY '\\n'
+                ({cols})
+                """,
+                (self._file.name,),
+            )
+        except (pymysql.err.OperationalError, pymysql.err.InternalError) as e:
+            if e.args and e.args[0] in _LOCAL_INFILE_DISABLED:
+                return False
+            raise
+        return True
+
+    def _read_rows(self) -> Iterable[List[Optional[str]]]:
+        unescape = {"t": "\t", "n": "\n", "r": "\r", "0": "\0", "\\": "\\"}
+        with open(self._file.name, encoding="utf-8", newline="") as f:
+            for line in f:
+                row: List[Optional[str]] = []
+                for field in line.rstrip("\n").split("\t"):
+                    if field == "\\N":
+                        row.append(None)
+                        continue
+                    out, i = [], 0
+                    while i < len(field):
+                        ch = field[i]
+                        if ch == "\\" and i + 1 < len(field):
+                            out.append(unescape.get(field[i + 1], field[i + 1]))
+                            i += 2
+                            continue
+                        out.append(ch)
+                        i += 1
+                    row.append("".join(out))
+                yield row
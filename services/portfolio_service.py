@@ -0,0 +1,280 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+import pymysql
+from config.accounts import DEFAULT_ACCOUNT
+from db.bulk import DEFAULT_BATCH_SIZE, executemany_batched
+from utils.parsers import to_int
+
+# portfolio_daily: 계좌별 하루 한 줄 (account_summary의 그날 snapshot + realized_pnl_daily 합계)
+# - equity: 추정예탁자산(prsm_dpst_aset_amt), 없으면 유가잔고평가액 + D+2 예수금
+# - daily_return: 전일 대비 equity 변화율 (입출금도 그대로 반영됨 - 응답에 입출금 내역이 없음)
+# - cum_return: 첫 row부터 daily_return을 이어 곱한 누적 수익률 -> 구간 수익률은 양끝 두 row로 계산
+_COLUMNS = (
+    "trade_date",
+    "equity",
+    "tot_est_amt",
+    "tot_pur_amt",
+    "entr",
+    "d2_entra",
+    "realized_pnl",
+    "cum_realized_pnl",
+    "daily_return",
+    "cum_return",
+)
+
+
+@dataclass(frozen=True)
+class PortfolioDay:
+    trade_date: date
+    equity: int
+    tot_est_amt: int  # 유가잔고 평가액
+    tot_pur_amt: int  # 매입금액 (투자금)
+    entr: int  # 예수금
+    d2_entra: int  # D+2 추정예수금
+    realized_pnl: int  # 직전 row 다음날 ~ trade_date 실현손익 합계
+    cum_realized_pnl: int
+    daily_return: float
+    cum_return: float
+
+    @property
+    def index(self) -> float:
+        """첫 row 직전을 1.0으로 한 누적 지수"""
+        return 1.0 + self.cum_return
+
+
+def _select_days(where: str, order: str = "ASC", limit: str = "") -> str:
+    return f"""
+        SELECT {', '.join(_COLUMNS)}
+        FROM portfolio_daily
+        WHERE account = %s AND {where}
+        ORDER BY trade_date {order}
+        {limit}
+    """
+
+
+def _to_day(row: Tuple) -> PortfolioDay:
+    return PortfolioDay(
+        row[0],
+        *(to_int(v) for v in row[1:8]),
+        float(row[8]),
+        float(row[9]),
+    )
+
+
+def _last_day_before(cur, account: str, day: date) -> Optional[PortfolioDay]:
+    cur.execute(_select_days("trade_date < %s", "DESC", "LIMIT 1"), (account, day))
+    row = cur.fetchone()
+    return _to_day(row) if row else None
+
+
+def update_portfolio_daily(
+    conn: pymysql.connections.Connection,
+    day: date,
+    account: str = DEFAULT_ACCOUNT,
+    rebuild: bool = False,
+    commit: bool = True,
+) -> int:
+    """
+    portfolio_daily를 day까지 이어서 채웁니다. (매일 실행이면 day 한 줄만 계산)
+    - 저장된 마지막 row 다음부터 day까지의 snapshot만 읽고, 직전 row에 이어 누적값 계산
+    - day 이전 날짜로 다시 실행하면 day부터 마지막 row까지 다시 계산 (같은 날 재실행 포함)
+    - rebuild=True: 계좌 row를 처음부터 다시 계산 (실현손익을 과거 날짜로 백필한 뒤 등)
+    - return: 기록한 row 수
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT trade_date FROM portfolio_daily
+            WHERE account = %s
+            ORDER BY trade_date DESC
+            LIMIT 1
+            """,
+            (account,),
+        )
+        row = cur.fetchone()
+        last = row[0] if row else None
+        if rebuild or last is None:
+            prev = None
+            snapshot_range, params = "snapshot_date <= %s", [max(day, last or day)]
+        else:
+            start = min(day, last + timedelta(days=1))
+            prev = _last_day_before(cur, account, start)
+            snapshot_range, params = "snapshot_date BETWEEN %s AND %s", [
+                start,
+                max(day, last),
+            ]
+
+        # 날짜별 마지막 snapshot
+        cur.execute(
+            f"""
+            SELECT s.snapshot_date, s.prsm_dpst_aset_amt, s.tot_est_amt, s.tot_pur_amt,
+                   s.entr, s.d2_entra
+            FROM account_summary s
+            JOIN (
+              SELECT MAX(account_id) AS account_id
+              FROM account_summary
+              WHERE account = %s AND {snapshot_range}
+              GROUP BY snapshot_date
+            ) t ON t.account_id = s.account_id
+            ORDER BY s.snapshot_date
+            """,
+            [account, *params],
+        )
+        snapshots = cur.fetchall()
+        if not snapshots:
+            return 0
+
+        # 직전 row 다음날부터의 날짜별 실현손익 (snapshot 없는 날 = 백필한 과거 등은 다음 row에 합산)
+        cur.execute(
+            f"""
+            SELECT query_date, SUM(tdy_sel_pl)
+            FROM realized_pnl_daily
+            WHERE account = %s AND query_date <= %s
+              {"AND query_date > %s" if prev else ""}
+            GROUP BY query_date
+            ORDER BY query_date
+            """,
+            [account, snapshots[-1][0], *([prev.trade_date] if prev else [])],
+        )
+        realized = cur.fetchall()
+
+        days: List[PortfolioDay] = []
+        j = 0
+        for snapshot_date, prsm, tot_est, tot_pur, entr, d2_entra in snapshots:
+            equity = to_int(prsm) or to_int(tot_est) + to_int(d2_entra)
+            pnl = 0
+            while j < len(realized) and realized[j][0] <= snapshot_date:
+                pnl += to_int(realized[j][1])
+                j += 1
+            daily = equity / prev.equity - 1.0 if prev and prev.equity else 0.0
+            cur_day = PortfolioDay(
+                snapshot_date,
+                equity,
+                to_int(tot_est),
+                to_int(tot_pur),
+                to_int(entr),
+                to_int(d2_entra),
+                pnl,
+                (prev.cum_realized_pnl if prev else 0) + pnl,
+                daily,
+                (prev.index if prev else 1.0) * (1.0 + daily) - 1.0,
+            )
+            days.append(cur_day)
+            prev = cur_day
+
+        if rebuild:
+            cur.execute("DELETE FROM portfolio_daily WHERE account = %s", (account,))
+        executemany_batched(
+            cur,
+            f"""
+            INSERT INTO portfolio_daily (account, {', '.join(_COLUMNS)})
+            VALUES ({', '.join(['%s'] * (len(_COLUMNS) + 1))})
+            ON DUPLICATE KEY UPDATE
+              {', '.join(f'{c} = VALUES({c})' for c in _COLUMNS[1:])}
+            """,
+            (
+                (account, d.trade_date, *(getattr(d, c) for c in _COLUMNS[1:]))
+                for d in days
+            ),
+            DEFAULT_BATCH_SIZE,
+        )
+
+    if commit:
+        conn.commit()
+    return len(days)
+
+
+def get_portfolio_days(
+    conn: pymysql.connections.Connection,
+    start: date,
+    end: date,
+    account: str = DEFAULT_ACCOUNT,
+) -> List[PortfolioDay]:
+    """
+    start ~ end(양끝 포함) row (PK 구간 조회라 전체 이력 길이와 무관)
+    """
+    with conn.cursor() as cur:
+        cur.execute(_select_days("trade_date BETWEEN %s AND %s"), (account, start, end))
+        return [_to_day(row) for row in cur.fetchall()]
+
+
+def period_return(
+    conn: pymysql.connections.Connection,
+    start: date,
+    end: date,
+    account: str = DEFAULT_ACCOUNT,
+) -> Optional[float]:
+    """
+    start ~ end 구간 수익률: (end 이하 마지막 row 지수) / (start 직전 row 지수) - 1
+    row 두 개만 읽음. 구간에 row가 없으면 None
+    """
+    with conn.cursor() as cur:
+        cur.execute(_select_days("trade_date <= %s", "DESC", "LIMIT 1"), (account, end))
+        row = cur.fetchone()
+        if row is None or row[0] < start:
+            return None
+        last = _to_day(row)
+        base = _last_day_before(cur, account, start)
+    return last.index / (base.index if base else 1.0) - 1.0
+
+
+def rolling_returns(
+    conn: pymysql.connections.Connection,
+    start: date,
+    end: date,
+    window: int,
+    account: str = DEFAULT_ACCOUNT,
+) -> List[Tuple[date, Optional[float]]]:
+    """
+    start ~ end 각 row의 직전 window개 row(거래일) 대비 수익률
+    구간 앞쪽 window개 row만 더 읽음. 이력이 window보다 짧으면 None
+    """
+    if window <= 0:
+        raise ValueError("window must be positive")
+    with conn.cursor() as cur:
+        cur.execute(
+            _select_days("trade_date < %s", "DESC", "LIMIT %s"),
+            (account, start, window),
+        )
+        history = [_to_day(row) for row in reversed(cur.fetchall())]
+    days = history + get_portfolio_days(conn, start, end, account=account)
+
+    out: List[Tuple[date, Optional[float]]] = []
+    for i in range(len(history), len(days)):
+        base = days[i - window] if i >= window else None
+        out.append(
+            (days[i].trade_date, days[i].index / base.index - 1.0 if base else None)
+        )
+    return out
+
+
+@dataclass(frozen=True)
+class Drawdown:
+    max_drawdown: float  # 0 이하 (예: -0.12 = 고점 대비 -12%)
+    peak_date: Optional[date]
+    trough_date: Optional[date]
+    series: List[Tuple[date, float]]  # 날짜별 구간 내 고점 대비 낙폭
+
+
+def drawdown(
+    conn: pymysql.connections.Connection,
+    start: date,
+    end: date,
+    account: str = DEFAULT_ACCOUNT,
+) -> Drawdown:
+    """
+    start ~ end 구간 안에서의 고점 대비 낙폭 (구간 row를 한 번 훑음)
+    """
+    peak: Optional[PortfolioDay] = None
+    worst = (0.0, None, None)
+    series: List[Tuple[date, float]] = []
+    for day in get_portfolio_days(conn, start, end, account=account):
+        if peak is None or day.index > peak.index:
+            peak = day
+        dd = day.index / peak.index - 1.0 if peak.index else 0.0
+        series.append((day.trade_date, dd))
+        if dd < worst[0]:
+            worst = (dd, peak.trade_date, day.trade_date)
+    return Drawdown(worst[0], worst[1], worst[2], series)
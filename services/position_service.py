@@ -1,49 +1,99 @@
 from __future__ import annotations
 
+import heapq
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Any, Dict, List, Optional, Tuple
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 import pymysql
+from config.accounts import DEFAULT_ACCOUNT
+from db.bulk import DEFAULT_BATCH_SIZE, execute_grouped, executemany_batched
+from db.schema import OPEN_POSITIONS_INSERT
+from services.bulk_load import BulkLoader
+from utils.parsers import norm_crd_class, norm_stk_cd, norm_stk_nm, to_decimal, to_int
 
 
-def _to_int(x: Any, default: int = 0) -> int:
-    if x is None:
-        return default
+def _to_px(x: Any) -> Union[int, Decimal]:
+    """
+    체결가. 키움 가격은 원 단위 정수이므로 정수면 int(고정소수점 경로),
+    소수부가 있으면 Decimal로 남겨 둔다. (int/Decimal 혼합 연산 결과도 Decimal 경로와 동일)
+    """
     if isinstance(x, int):
         return x
-    s = str(x).strip()
-    if s == "":
-        return default
-    return int(s)
+    if isinstance(x, str):
+        # "70000" 같은 정수 문자열은 Decimal을 거치지 않음
+        try:
+            return int(x)
+        except ValueError:
+            pass
+    d = to_decimal(x)
+    i = int(d)
+    return i if i == d else d
 
 
-def _to_decimal(x: Any, default: Decimal = Decimal("0")) -> Decimal:
-    if x is None:
-        return default
-    if isinstance(x, Decimal):
-        return x
-    s = str(x).strip()
-    if s == "":
-        return default
-    return Decimal(s)
+# 초 단위 timestamp = date ordinal * 86400 + 하루 중 초 (KST naive, DST 없음)
+_date_seconds_cache: Dict[Any, int] = {}
+_time_seconds_cache: Dict[Optional[str], int] = {}
 
 
-def _combine_dt(trade_date, ord_tm: Optional[str]) -> datetime:
+def _epoch_seconds(trade_date, ord_tm: Optional[str]) -> int:
     """
     trade_date: DATE (python date) or 'YYYY-MM-DD'
-    ord_tm: 'HH:MM:SS' (char(8)) or None
+    ord_tm: 'HH:MM:SS' (char(8)) or None -> 8자리가 아니면 00:00:00
+    datetime 객체 생성 없이 날짜/시각별 캐시로 계산
     """
-    if hasattr(trade_date, "strftime"):
-        d = trade_date.strftime("%Y-%m-%d")
-    else:
-        d = str(trade_date)
+    base = _date_seconds_cache.get(trade_date)
+    if base is None:
+        if hasattr(trade_date, "toordinal"):
+            d = trade_date
+        else:
+            d = date.fromisoformat(str(trade_date))
+        base = d.toordinal() * 86400
+        _date_seconds_cache[trade_date] = base
+
+    secs = _time_seconds_cache.get(ord_tm)
+    if secs is None:
+        t = (ord_tm or "").strip()
+        if len(t) == 8:
+            secs = int(t[0:2]) * 3600 + int(t[3:5]) * 60 + int(t[6:8])
+        else:
+            secs = 0
+        _time_seconds_cache[ord_tm] = secs
+
+    return base + secs
+
+
+def _dt_from_seconds(ts: int) -> datetime:
+    days, secs = divmod(ts, 86400)
+    return datetime.fromordinal(days) + timedelta(seconds=secs)
 
-    t = (ord_tm or "00:00:00").strip()
-    if len(t) != 8:
-        t = "00:00:00"
-    return datetime.fromisoformat(f"{d} {t}")
+
+def _seconds_from_dt(dt: datetime) -> int:
+    return dt.toordinal() * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second
+
+
+# DATETIME 기록용 문자열 캐시 (date ordinal -> 'YYYY-MM-DD ', 하루 중 초 -> 'HH:MM:SS')
+_date_text_cache: Dict[int, str] = {}
+_time_text_cache: Dict[int, str] = {}
+
+
+def _dt_text(ts: int) -> str:
+    """
+    _epoch_seconds -> 'YYYY-MM-DD HH:MM:SS' (str(datetime)과 같은 값, DATETIME 컬럼에 그대로 기록)
+    datetime 객체 생성 없이 날짜/시각별 캐시로 조합
+    """
+    days, secs = divmod(ts, 86400)
+    day = _date_text_cache.get(days)
+    if day is None:
+        day = _date_text_cache[days] = date.fromordinal(days).isoformat() + " "
+    tm = _time_text_cache.get(secs)
+    if tm is None:
+        h, rem = divmod(secs, 3600)
+        tm = _time_text_cache[secs] = f"{h:02d}:{rem // 60:02d}:{rem % 60:02d}"
+    return day + tm
 
 
 def _side_from_io(io_tp_nm: Optional[str]) -> Optional[str]:
@@ -64,288 +114,1312 @@ def _side_from_io(io_tp_nm: Optional[str]) -> Optional[str]:
     return None
 
 
-@dataclass
-class Lot:
-    buy_source_id: int
-    buy_dt: datetime
-    buy_px: Decimal
-    remaining_qty: int
-    stk_cd: str
-    stk_nm: str
-    crd_class: str
+class LotStack:
+    """
+    (stk_cd, crd_class) 하나의 LIFO 미청산 lot 스택
+    lot 객체 대신 필드별 list(배열)에 쌓아 두고 index -1을 top으로 씀
+    (매수는 append, 소진은 pop, 부분 소진은 remaining_qty[-1]만 갱신)
+    buy_dt는 lot_matches / lot_match_open_lots에 기록할 DATETIME 문자열 (쌓을 때 한 번만 변환)
+    """
 
+    __slots__ = (
+        "buy_source_id",
+        "buy_ts",
+        "buy_dt",
+        "buy_px",
+        "remaining_qty",
+        "stk_nm",
+    )
 
-def build_lifo_lot_matches(
-    conn: pymysql.connections.Connection,
-    start_date: Optional[str] = None,  # 'YYYY-MM-DD'
-    end_date: Optional[str] = None,  # 'YYYY-MM-DD'
+    def __init__(self) -> None:
+        self.buy_source_id: List[int] = []
+        self.buy_ts: List[int] = []  # _epoch_seconds
+        self.buy_dt: List[str] = []  # _dt_text(buy_ts)
+        self.buy_px: List[Union[int, Decimal]] = []
+        self.remaining_qty: List[int] = []
+        self.stk_nm: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.remaining_qty)
+
+    def push(
+        self,
+        buy_source_id: int,
+        buy_ts: int,
+        buy_px: Union[int, Decimal],
+        remaining_qty: int,
+        stk_nm: str,
+    ) -> None:
+        self.buy_source_id.append(buy_source_id)
+        self.buy_ts.append(buy_ts)
+        self.buy_dt.append(_dt_text(buy_ts))
+        self.buy_px.append(buy_px)
+        self.remaining_qty.append(remaining_qty)
+        self.stk_nm.append(stk_nm)
+
+    def pop(self) -> None:
+        self.buy_source_id.pop()
+        self.buy_ts.pop()
+        self.buy_dt.pop()
+        self.buy_px.pop()
+        self.remaining_qty.pop()
+        self.stk_nm.pop()
+
+    def lots(self) -> Iterator[Tuple[str, int, str, Union[int, Decimal], int]]:
+        """
+        아래(먼저 쌓인 lot)부터 (stk_nm, buy_source_id, buy_dt, buy_px, remaining_qty)
+        """
+        return zip(
+            self.stk_nm,
+            self.buy_source_id,
+            self.buy_dt,
+            self.buy_px,
+            self.remaining_qty,
+        )
+
+
+# 재생 순서 = ORDER BY trade_date, ord_tm, id (NULL ord_tm은 ''로 취급)
+_TRADE_SORT_KEY = "(trade_date, COALESCE(ord_tm, ''), id)"
+
+
+def _load_checkpoint(
+    cur, name: str, account: str, lock: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    lock=True: checkpoint row를 FOR UPDATE로 읽어 commit 전까지 같은 계좌의 다른 재생
+    (build_positions / LivePositionEngine)이 checkpoint를 옮기지 못하게 함
+    """
+    cur.execute(
+        f"""
+        SELECT last_trade_date, last_ord_tm, last_id, max_source_id
+        FROM position_checkpoints
+        WHERE account = %s AND name = %s
+        {"FOR UPDATE" if lock else ""}
+        """,
+        (account, name),
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None
+    last_trade_date, last_ord_tm, last_id, max_source_id = row
+    return {
+        "last_trade_date": last_trade_date,
+        "last_ord_tm": last_ord_tm or "",
+        "last_id": to_int(last_id),
+        "max_source_id": to_int(max_source_id),
+    }
+
+
+def _save_checkpoint(cur, name: str, checkpoint: Dict[str, Any], account: str) -> None:
+    cur.execute(
+        """
+        INSERT INTO position_checkpoints (
+          account, name, last_trade_date, last_ord_tm, last_id, max_source_id
+        )
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+          last_trade_date = VALUES(last_trade_date),
+          last_ord_tm = VALUES(last_ord_tm),
+          last_id = VALUES(last_id),
+          max_source_id = VALUES(max_source_id)
+        """,
+        (
+            account,
+            name,
+            checkpoint["last_trade_date"],
+            checkpoint["last_ord_tm"],
+            checkpoint["last_id"],
+            checkpoint["max_source_id"],
+        ),
+    )
+
+
+def _advance_checkpoint(
+    checkpoint: Dict[str, Any], source_id: int, trade_date, ord_tm: Optional[str]
 ) -> None:
+    checkpoint.update(
+        last_trade_date=trade_date,
+        last_ord_tm=(ord_tm or ""),
+        last_id=source_id,
+        max_source_id=max(checkpoint["max_source_id"], source_id),
+    )
+
+
+def _has_late_trades(cur, checkpoint: Dict[str, Any], account: str) -> bool:
+    """
+    checkpoint 이후 INSERT 되었는데 정렬상 watermark 이전에 위치하는 trade가 있는지 확인
+    (예: 늦게 수집된 과거 체결) -> 이 경우 증분 재생으로는 LIFO 순서를 보장할 수 없음
+    """
+    cur.execute(
+        f"""
+        SELECT 1
+        FROM account_trade_history
+        WHERE account = %s
+          AND id > %s
+          AND {_TRADE_SORT_KEY} <= (%s, %s, %s)
+        LIMIT 1
+        """,
+        (
+            account,
+            checkpoint["max_source_id"],
+            checkpoint["last_trade_date"],
+            checkpoint["last_ord_tm"],
+            checkpoint["last_id"],
+        ),
+    )
+    return cur.fetchone() is not None
+
+
+def _resume_checkpoint(
+    cur, name: str, full_rebuild: bool, account: str
+) -> Optional[Dict[str, Any]]:
     """
-    account_trade_history를 읽어서 lot_matches를 (LIFO)로 재생성합니다.
-    - 안전한 재실행을 위해: 지정 기간이 있으면 해당 기간의 lot_matches만 삭제 후 재생성
-    - start/end 없으면: lot_matches 전체 삭제 후 재생성(간단/확실)
+    증분 재생을 이어갈 checkpoint를 반환합니다.
+    None이면 호출자가 파생 테이블을 비우고 처음부터 재생해야 합니다.
     """
+    if full_rebuild:
+        checkpoint = None
+    else:
+        checkpoint = _load_checkpoint(cur, name, account, lock=True)
+        if checkpoint is not None and _has_late_trades(cur, checkpoint, account):
+            print(
+                f"WARN: watermark 이전 trade가 추가되어 {account} {name}를 전체 재생성합니다."
+            )
+            checkpoint = None
+
+    if checkpoint is None:
+        cur.execute(
+            "DELETE FROM position_checkpoints WHERE account = %s AND name = %s",
+            (account, name),
+        )
+    return checkpoint
+
 
-    # 1) 트레이드 로드
-    where = []
-    params: Dict[str, Any] = {}
-    if start_date:
+def _trade_where(
+    checkpoint: Optional[Dict[str, Any]],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    account: str = DEFAULT_ACCOUNT,
+) -> Tuple[str, Dict[str, Any]]:
+    where = ["account = %(account)s"]
+    params: Dict[str, Any] = {"account": account}
+    if checkpoint is not None:
+        where.append(
+            f"{_TRADE_SORT_KEY} > (%(last_trade_date)s, %(last_ord_tm)s, %(last_id)s)"
+        )
+        params.update(checkpoint)
+    elif start_date:
         where.append("trade_date >= %(start_date)s")
         params["start_date"] = start_date
     if end_date:
         where.append("trade_date <= %(end_date)s")
         params["end_date"] = end_date
 
-    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    return "WHERE " + " AND ".join(where), params
 
-    with conn.cursor(pymysql.cursors.DictCursor) as cur:
-        # 2) 파생 테이블 정리 (재실행 안전)
-        if where_sql:
-            cur.execute(
-                f"""
-                DELETE FROM lot_matches
-                WHERE DATE(sell_dt) >= %(start_date)s AND DATE(sell_dt) <= %(end_date)s
-                """,
-                params,
-            )
-        else:
-            cur.execute("TRUNCATE TABLE lot_matches")
 
+DEFAULT_REPLAY_BATCH_SIZE = 5000
+
+_TRADE_COLUMNS = """
+    id,
+    trade_date,
+    ord_tm,
+    stk_cd,
+    stk_nm,
+    crd_class,
+    io_tp_nm,
+    cntr_qty,
+    cntr_uv
+"""
+
+
+def _iter_trade_pages(
+    cur, where_sql: str, params: Dict[str, Any], batch_size: int
+) -> Iterator[List[Tuple]]:
+    """
+    재생 대상 trade를 (trade_date, ord_tm, id) 순서로 batch 단위 tuple 리스트로 반환합니다.
+    날짜별 건수로 trade_date 구간을 나눠(keyset) 구간마다 조회하므로
+    전체 이력을 메모리에 올리지 않고, 정렬도 구간 안에서만 일어납니다.
+    (하루치는 쪼개지 않으므로 batch는 batch_size보다 커질 수 있음)
+    """
+    cur.execute(
+        f"""
+        SELECT trade_date, COUNT(*)
+        FROM account_trade_history
+        {where_sql}
+        GROUP BY trade_date
+        ORDER BY trade_date ASC
+        """,
+        params,
+    )
+    day_counts = cur.fetchall()
+
+    ranges: List[Tuple[Any, Any]] = []
+    first = last = None
+    count = 0
+    for trade_date, n in day_counts:
+        if first is None:
+            first = trade_date
+        last = trade_date
+        count += n
+        if count >= batch_size:
+            ranges.append((first, last))
+            first, count = None, 0
+    if first is not None:
+        ranges.append((first, last))
+
+    page_where = ("AND" if where_sql else "WHERE") + (
+        " trade_date BETWEEN %(page_from)s AND %(page_to)s"
+    )
+    for page_from, page_to in ranges:
         cur.execute(
             f"""
-            SELECT
-              id,
-              trade_date,
-              ord_tm,
-              stk_cd,
-              stk_nm,
-              crd_class,
-              io_tp_nm,
-              cntr_qty,
-              cntr_uv
+            SELECT {_TRADE_COLUMNS}
             FROM account_trade_history
             {where_sql}
-            ORDER BY trade_date ASC, ord_tm ASC, id ASC
+            {page_where}
+            ORDER BY trade_date ASC, COALESCE(ord_tm, '') ASC, id ASC
             """,
-            params,
+            {**params, "page_from": page_from, "page_to": page_to},
         )
-        rows: List[Dict[str, Any]] = cur.fetchall()
-
-        # 3) (stk_cd, crd_tp)별 LIFO 스택
-        stacks: Dict[Tuple[str, str], List[Lot]] = {}
-
-        insert_sql = """
-            INSERT INTO lot_matches (
-              stk_cd, stk_nm, crd_class,
-              buy_source_id, sell_source_id,
-              buy_dt, sell_dt,
-              buy_px, sell_px,
-              match_qty,
-              pnl_amt, holding_seconds, holding_days
-            )
-            VALUES (
-              %s, %s, %s,
-              %s, %s,
-              %s, %s,
-              %s, %s,
-              %s,
-              %s, %s, %s
-            )
+        yield cur.fetchall()
+
+
+def _watermark(checkpoint: Dict[str, Any]) -> Tuple[Any, str, int]:
+    return (
+        checkpoint["last_trade_date"],
+        checkpoint["last_ord_tm"],
+        checkpoint["last_id"],
+    )
+
+
+def _key_chunks(
+    keys: List[Tuple[str, str]], size: int = 500
+) -> List[List[Tuple[str, str]]]:
+    return [keys[i : i + size] for i in range(0, len(keys), size)]
+
+
+def _key_in_sql(
+    keys: List[Tuple[str, str]], columns: str = "stk_cd, crd_class"
+) -> Tuple[str, List[str]]:
+    """
+    (stk_cd, crd_class) IN (...) 조건절과 파라미터
+    """
+    placeholders = ", ".join(["(%s, %s)"] * len(keys))
+    return (
+        f"({columns}) IN ({placeholders})",
+        [v for key in keys for v in key],
+    )
+
+
+@dataclass(slots=True)
+class Trade:
+    """
+    account_trade_history 한 줄을 한 번만 디코딩한 결과 (consumer들이 공유)
+    """
+
+    source_id: int
+    ts: int  # _epoch_seconds
+    stk_cd: str
+    stk_nm: str
+    crd_class: str
+    side: str
+    qty: int
+    px: Union[int, Decimal]
+    key: Tuple[str, str]
+
+    @property
+    def dt(self) -> datetime:
+        return _dt_from_seconds(self.ts)
+
+
+# io_tp_nm -> _side_from_io 결과 (종류가 몇 개 안 됨)
+_side_cache: Dict[Optional[str], Optional[str]] = {}
+_UNKNOWN_SIDE = object()
+
+
+def _decode_trade(row: Tuple) -> Optional[Trade]:
+    """
+    row: (id, trade_date, ord_tm, stk_cd, stk_nm, crd_class, io_tp_nm, cntr_qty, cntr_uv)
+    매수/매도 판정이 안 되거나 체결수량이 0이면 None
+    """
+    (
+        source_id,
+        trade_date,
+        ord_tm,
+        stk_cd,
+        stk_nm,
+        crd_class,
+        io_tp_nm,
+        cntr_qty,
+        cntr_uv,
+    ) = row
+
+    side = _side_cache.get(io_tp_nm, _UNKNOWN_SIDE)
+    if side is _UNKNOWN_SIDE:
+        side = _side_cache[io_tp_nm] = _side_from_io(io_tp_nm)
+    if side is None:
+        return None
+
+    qty = cntr_qty if type(cntr_qty) is int else to_int(cntr_qty, 0)
+    if qty <= 0:
+        return None
+
+    stk_cd = (stk_cd or "").strip()
+    crd_class = (crd_class or "").strip()
+    # 필드 순서: source_id, ts, stk_cd, stk_nm, crd_class, side, qty, px, key
+    return Trade(
+        source_id if type(source_id) is int else to_int(source_id),
+        _epoch_seconds(trade_date, ord_tm),
+        stk_cd,
+        (stk_nm or "").strip(),
+        crd_class,
+        side,
+        qty,
+        _to_px(cntr_uv),
+        (stk_cd, crd_class),
+    )
+
+
+class PositionConsumer:
+    """
+    run_position_engine에 연결되는 (stk_cd, crd_class)별 누적기.
+    on_trade는 DB를 건드리지 않고 쓰기 작업을 모아두며, flush/save_state에서 한번에 기록합니다.
+    """
+
+    checkpoint_name: str = ""
+    # key별 상태를 담은 dict 속성 이름 (sharded 재생 시 key 단위로 나눠 worker에 전달)
+    keyed_state: Tuple[str, ...] = ()
+    # 이 consumer가 다루는 계좌 (파생 테이블 / 상태 / checkpoint 모두 계좌별)
+    account: str = DEFAULT_ACCOUNT
+
+    def reset(self, cur, bulk: bool = False) -> None:
+        """
+        full rebuild: 파생 테이블과 저장된 상태를 비운다
+        bulk=True면 파생 테이블을 LOAD DATA 대량 적재로 다시 채운다 (지원하는 consumer만)
         """
 
-        for r in rows:
-            side = _side_from_io(r.get("io_tp_nm"))
-            if side is None:
-                continue
+    def clear_keys(self, cur, keys: List[Tuple[str, str]]) -> None:
+        """keys의 파생 row와 저장된 상태만 비운다 (rewind_positions의 key 단위 재생용)"""
 
-            stk_cd = (r.get("stk_cd") or "").strip()
-            stk_nm = (r.get("stk_nm") or "").strip()
-            # crd_tp = (r.get("crd_tp") or "").strip()
-            crd_class = (r.get("crd_class") or "").strip()
+    def load_state(self, cur, keys: List[Tuple[str, str]]) -> None:
+        """이번 실행에서 처음 등장한 key들의 저장된 상태를 불러온다"""
 
-            # key = (stk_cd, crd_tp)
-            key = (stk_cd, crd_class)
-            stacks.setdefault(key, [])
+    def on_trade(self, trade: Trade) -> None:
+        raise NotImplementedError
 
-            dt = _combine_dt(r.get("trade_date"), r.get("ord_tm"))
-            qty = _to_int(r.get("cntr_qty"), 0)
-            px = _to_decimal(r.get("cntr_uv"))
+    def flush(self, cur) -> None:
+        """모아둔 쓰기 작업을 기록한다"""
 
-            if qty <= 0:
-                continue
+    def save_state(self, cur) -> None:
+        """다음 실행을 위해 건드린 key들의 상태를 저장한다"""
+
+    def spawn(self, keys: List[Tuple[str, str]]) -> "PositionConsumer":
+        """keys의 상태만 떼어낸 같은 종류의 consumer (sharded 재생용)"""
+        child = type(self)(account=self.account)
+        for attr in self.keyed_state:
+            src, dst = getattr(self, attr), getattr(child, attr)
+            for key in keys:
+                if key in src:
+                    dst[key] = src.pop(key)
+        return child
+
+    def absorb(self, child: "PositionConsumer") -> None:
+        """spawn으로 떼어낸 consumer의 최종 상태를 되돌려 받는다"""
+        for attr in self.keyed_state:
+            getattr(self, attr).update(getattr(child, attr))
 
-            if side == "BUY":
-                stacks[key].append(
-                    Lot(
-                        buy_source_id=_to_int(r["id"]),
-                        buy_dt=dt,
-                        buy_px=px,
-                        remaining_qty=qty,
-                        stk_cd=stk_cd,
-                        stk_nm=stk_nm,
-                        crd_class=crd_class,
-                    )
-                )
-                continue
 
-            # SELL: LIFO로 소진
-            sell_source_id = _to_int(r["id"])
-            sell_dt = dt
-            sell_px = px
-            to_close = qty
+def _clear_account_rows(cur, table: str, account: str) -> bool:
+    """
+    파생 테이블에서 계좌 row 삭제. 다른 계좌 row가 없으면 TRUNCATE
+    return: 테이블에 이 계좌만 있었는지 (True면 테이블 통째로 교체해도 됨)
+    """
+    cur.execute(f"SELECT 1 FROM {table} WHERE account <> %s LIMIT 1", (account,))
+    if cur.fetchone() is None:
+        cur.execute(f"TRUNCATE TABLE {table}")
+        return True
+    cur.execute(f"DELETE FROM {table} WHERE account = %s", (account,))
+    return False
+
 
-            while to_close > 0 and stacks[key]:
-                lot = stacks[key][-1]
-                match_qty = min(lot.remaining_qty, to_close)
+class LifoLotMatcher(PositionConsumer):
+    """
+    (stk_cd, crd_class)별 LIFO 스택으로 매도를 매수 lot에 매칭하여 lot_matches 생성
+    미청산 lot은 lot_match_open_lots에 저장되어 다음 실행에서 이어서 매칭합니다.
+    """
 
-                pnl = (sell_px - lot.buy_px) * Decimal(match_qty)
-                holding_seconds = int((sell_dt - lot.buy_dt).total_seconds())
-                holding_days = holding_seconds // 86400
+    checkpoint_name = "lot_matches"
+    keyed_state = ("stacks",)
 
+    insert_sql = """
+        INSERT INTO lot_matches (
+          stk_cd, stk_nm, crd_class,
+          buy_source_id, sell_source_id,
+          buy_dt, sell_dt,
+          buy_px, sell_px,
+          match_qty,
+          pnl_amt, holding_seconds, holding_days,
+          account
+        )
+        VALUES (
+          %s, %s, %s,
+          %s, %s,
+          %s, %s,
+          %s, %s,
+          %s,
+          %s, %s, %s,
+          %s
+        )
+    """
+
+    columns = (
+        "stk_cd",
+        "stk_nm",
+        "crd_class",
+        "buy_source_id",
+        "sell_source_id",
+        "buy_dt",
+        "sell_dt",
+        "buy_px",
+        "sell_px",
+        "match_qty",
+        "pnl_amt",
+        "holding_seconds",
+        "holding_days",
+        "account",
+    )
+
+    def __init__(
+        self, batch_size: int = DEFAULT_BATCH_SIZE, account: str = DEFAULT_ACCOUNT
+    ) -> None:
+        self.account = account
+        self.stacks: Dict[Tuple[str, str], LotStack] = {}
+        self.pending: List[Tuple] = []
+        self.batch_size = batch_size
+        self.loader: Optional[BulkLoader] = None
+
+    def reset(self, cur, bulk: bool = False) -> None:
+        cur.execute(
+            "DELETE FROM lot_match_open_lots WHERE account = %s", (self.account,)
+        )
+        if bulk:
+            # 매칭 결과를 TSV로 모았다가 save_state에서 staging 적재 후 lot_matches에 반영
+            # (교체 시점에 이 계좌 row만 있으면 테이블 교체, 다른 계좌가 있으면 이 계좌 row 삭제 후 merge)
+            self.loader = BulkLoader(
+                cur.connection,
+                "lot_matches",
+                self.columns,
+                mode="swap",
+                batch_size=self.batch_size,
+                scope=("account", self.account),
+            )
+        else:
+            _clear_account_rows(cur, "lot_matches", self.account)
+
+    def clear_keys(self, cur, keys: List[Tuple[str, str]]) -> None:
+        for chunk in _key_chunks(keys):
+            cond, params = _key_in_sql(chunk)
+            for table in ("lot_matches", "lot_match_open_lots"):
                 cur.execute(
-                    insert_sql,
-                    (
-                        stk_cd,
-                        stk_nm,
-                        crd_class,
-                        lot.buy_source_id,
-                        sell_source_id,
-                        lot.buy_dt,
-                        sell_dt,
-                        lot.buy_px,
-                        sell_px,
-                        match_qty,
-                        pnl,
-                        holding_seconds,
-                        holding_days,
-                    ),
+                    f"DELETE FROM {table} WHERE account = %s AND {cond}",
+                    [self.account, *params],
                 )
 
-                lot.remaining_qty -= match_qty
-                to_close -= match_qty
+    def load_state(self, cur, keys: List[Tuple[str, str]]) -> None:
+        for key in keys:
+            self.stacks.setdefault(key, LotStack())
+        for chunk in _key_chunks(keys):
+            cond, params = _key_in_sql(chunk)
+            cur.execute(
+                f"""
+                SELECT stk_cd, crd_class, stk_nm, buy_source_id, buy_dt, buy_px, remaining_qty
+                FROM lot_match_open_lots
+                WHERE account = %s AND {cond}
+                ORDER BY stk_cd, crd_class, stack_pos
+                """,
+                [self.account, *params],
+            )
+            for (
+                stk_cd,
+                crd_class,
+                stk_nm,
+                buy_source_id,
+                buy_dt,
+                buy_px,
+                qty,
+            ) in cur.fetchall():
+                self.stacks[(stk_cd, crd_class)].push(
+                    to_int(buy_source_id),
+                    _seconds_from_dt(buy_dt),
+                    _to_px(buy_px),
+                    to_int(qty),
+                    stk_nm,
+                )
 
-                if lot.remaining_qty == 0:
-                    stacks[key].pop()
+    def on_trade(self, trade: Trade) -> None:
+        stack = self.stacks[trade.key]
 
-            # 만약 매도수량이 남았는데 스택이 비었다면(데이터 누락/과거 미수집 등)
-            # 여기서는 조용히 스킵(원하시면 경고 로그 추가)
-            # if to_close > 0: print("WARN: sell exceeds lots", stk_cd, crd_tp, to_close)
+        if trade.side == "BUY":
+            stack.push(trade.source_id, trade.ts, trade.px, trade.qty, trade.stk_nm)
+            return
 
-    conn.commit()
+        # SELL: LIFO로 소진 (가격이 정수면 pnl도 정수 연산)
+        remaining = stack.remaining_qty
+        if not remaining:
+            return
+        buy_source_ids = stack.buy_source_id
+        buy_tss = stack.buy_ts
+        buy_dts = stack.buy_dt
+        buy_pxs = stack.buy_px
+        to_close = trade.qty
+        sell_ts = trade.ts
+        sell_px = trade.px
+        # 기록할 row를 바로 만듦 (DATETIME 문자열은 매도 한 건당 한 번만 변환)
+        head = (trade.stk_cd, trade.stk_nm, trade.crd_class)
+        sell_source_id = trade.source_id
+        sell_dt = _dt_text(sell_ts)
+        account = self.account
+        append = self.pending.append
+        while to_close > 0 and remaining:
+            lot_qty = remaining[-1]
+            match_qty = lot_qty if lot_qty < to_close else to_close
+            buy_px = buy_pxs[-1]
+            holding_seconds = sell_ts - buy_tss[-1]
 
+            append(
+                head
+                + (
+                    buy_source_ids[-1],
+                    sell_source_id,
+                    buy_dts[-1],
+                    sell_dt,
+                    buy_px,
+                    sell_px,
+                    match_qty,
+                    (sell_px - buy_px) * match_qty,
+                    holding_seconds,
+                    holding_seconds // 86400,
+                    account,
+                )
+            )
 
-def build_position_episodes(
-    conn: pymysql.connections.Connection,
-) -> None:
+            to_close -= match_qty
+            if lot_qty == match_qty:
+                stack.pop()
+            else:
+                remaining[-1] = lot_qty - match_qty
+
+        # 만약 매도수량이 남았는데 스택이 비었다면(데이터 누락/과거 미수집 등)
+        # 여기서는 조용히 스킵(원하시면 경고 로그 추가)
+        # if to_close > 0: print("WARN: sell exceeds lots", trade.stk_cd, to_close)
+
+    def flush(self, cur) -> None:
+        if self.loader is not None:
+            self.loader.add_rows(self.pending)
+        else:
+            executemany_batched(cur, self.insert_sql, self.pending, self.batch_size)
+        self.pending = []
+
+    def save_state(self, cur) -> None:
+        if self.loader is not None:
+            with self.loader:
+                self.loader.load()
+            self.loader = None
+
+        keys = sorted(self.stacks)
+        for chunk in _key_chunks(keys):
+            cond, params = _key_in_sql(chunk)
+            cur.execute(
+                f"DELETE FROM lot_match_open_lots WHERE account = %s AND {cond}",
+                [self.account, *params],
+            )
+        executemany_batched(
+            cur,
+            """
+            INSERT INTO lot_match_open_lots (
+              account, stk_cd, crd_class, stack_pos, stk_nm,
+              buy_source_id, buy_dt, buy_px, remaining_qty
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            (
+                (
+                    self.account,
+                    stk_cd,
+                    crd_class,
+                    pos,
+                    stk_nm,
+                    buy_source_id,
+                    buy_dt,
+                    buy_px,
+                    remaining_qty,
+                )
+                for stk_cd, crd_class in keys
+                for pos, (
+                    stk_nm,
+                    buy_source_id,
+                    buy_dt,
+                    buy_px,
+                    remaining_qty,
+                ) in enumerate(self.stacks[(stk_cd, crd_class)].lots())
+            ),
+            self.batch_size,
+        )
+
+
+def _refresh_open_positions(cur, account: str, keys: List[Tuple[str, str]]) -> None:
+    """
+    open_positions에서 keys((stk_cd, crd_class) 원본 key)의 정규화 key만 position_episodes로 다시 계산
+    """
+    norm_keys = sorted({(norm_stk_cd(k[0]), norm_crd_class(k[1])) for k in keys})
+    for chunk in _key_chunks(norm_keys):
+        cond, params = _key_in_sql(chunk)
+        cur.execute(
+            f"DELETE FROM open_positions WHERE account = %s AND {cond}",
+            [account, *params],
+        )
+        cond, params = _key_in_sql(chunk, "stk_cd_norm, crd_class_norm")
+        cur.execute(
+            OPEN_POSITIONS_INSERT.format(cond=f"AND account = %s AND {cond}"),
+            [account, *params],
+        )
+
+
+def _episode_norm(ep: Dict[str, Any]) -> Tuple[str, str, str]:
+    # position_episodes의 stk_cd_norm, stk_nm_norm, crd_class_norm
+    return (
+        norm_stk_cd(ep["stk_cd"]),
+        norm_stk_nm(ep["stk_nm"]),
+        norm_crd_class(ep["crd_class"]),
+    )
+
+
+class EpisodeTracker(PositionConsumer):
+    """
+    (stk_cd, crd_class)별 포지션이 0->양수 시작 / 양수->0 종료 되는 구간을 position_episodes로 기록
+    누적 수량 / episode 순번 / 열린 episode 여부는 position_episode_state에 저장되어
+    다음 실행은 새 episode만 INSERT 하고, 종료된 episode는 end_dt/end_qty를 UPDATE 합니다.
+    정규화 컬럼(stk_cd_norm 등)을 같이 쓰고, 상태 저장 시 체결이 있었던 key의 open_positions를 갱신
+    """
+
+    checkpoint_name = "position_episodes"
+    keyed_state = ("pos_qty", "episode_seq", "open_episode")
+
+    insert_sql = """
+        INSERT INTO position_episodes (
+          stk_cd, stk_nm, crd_class,
+          episode_seq,
+          start_dt, end_dt,
+          start_qty, end_qty,
+          account,
+          stk_cd_norm, stk_nm_norm, crd_class_norm
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
     """
-    account_trade_history 전체를 시간순으로 누적하여
-    (종목+crd_tp)별 포지션이 0->양수 시작 / 양수->0 종료 되는 구간을 episode로 저장합니다.
-    재실행 안전을 위해 episodes는 전체 재생성(TRUNCATE)로 처리합니다.
+    update_sql = """
+        UPDATE position_episodes
+        SET end_dt = %s, end_qty = %s
+        WHERE stk_cd = %s AND crd_class = %s AND episode_seq = %s AND account = %s
+    """
+    delete_sql = """
+        DELETE FROM position_episodes
+        WHERE stk_cd = %s AND crd_class = %s AND episode_seq = %s AND account = %s
     """
 
-    with conn.cursor(pymysql.cursors.DictCursor) as cur:
-        cur.execute("TRUNCATE TABLE position_episodes")
+    def __init__(
+        self, batch_size: int = DEFAULT_BATCH_SIZE, account: str = DEFAULT_ACCOUNT
+    ) -> None:
+        self.account = account
+        self.pos_qty: Dict[Tuple[str, str], int] = {}
+        self.episode_seq: Dict[Tuple[str, str], int] = {}
+        # persisted=True 이면 position_episodes에 이미 end_dt=NULL row가 있음
+        self.open_episode: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.pending: List[Tuple[str, Tuple]] = []
+        self.batch_size = batch_size
+        # 마지막 save_state 이후 체결이 있었던 key (open_positions 갱신 대상)
+        self.dirty: set = set()
 
+    def reset(self, cur, bulk: bool = False) -> None:
+        _clear_account_rows(cur, "position_episodes", self.account)
         cur.execute(
-            """
-            SELECT
-              id,
-              trade_date,
-              ord_tm,
-              stk_cd,
-              stk_nm,
-              crd_class,
-              io_tp_nm,
-              cntr_qty
-            FROM account_trade_history
-            ORDER BY trade_date ASC, ord_tm ASC, id ASC
-            """
+            "DELETE FROM position_episode_state WHERE account = %s", (self.account,)
         )
-        rows = cur.fetchall()
-
-        pos_qty: Dict[Tuple[str, str], int] = {}
-        episode_seq: Dict[Tuple[str, str], int] = {}
-        open_episode: Dict[Tuple[str, str], Dict[str, Any]] = {}
-
-        insert_sql = """
-            INSERT INTO position_episodes (
-              stk_cd, stk_nm, crd_class,
-              episode_seq,
-              start_dt, end_dt,
-              start_qty, end_qty
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """
+        cur.execute("DELETE FROM open_positions WHERE account = %s", (self.account,))
 
-        for r in rows:
-            side = _side_from_io(r.get("io_tp_nm"))
-            if side is None:
-                continue
+    def clear_keys(self, cur, keys: List[Tuple[str, str]]) -> None:
+        for chunk in _key_chunks(keys):
+            cond, params = _key_in_sql(chunk)
+            for table in ("position_episodes", "position_episode_state"):
+                cur.execute(
+                    f"DELETE FROM {table} WHERE account = %s AND {cond}",
+                    [self.account, *params],
+                )
+        # 다시 재생한 뒤 open_positions도 갱신
+        self.dirty.update(keys)
+
+    def absorb(self, child: "PositionConsumer") -> None:
+        super().absorb(child)
+        self.dirty |= child.dirty
 
-            stk_cd = (r.get("stk_cd") or "").strip()
-            stk_nm = (r.get("stk_nm") or "").strip()
-            crd_class = (r.get("crd_class") or "").strip()
-            # crd_tp = (r.get("crd_tp") or "").strip()
+    def load_state(self, cur, keys: List[Tuple[str, str]]) -> None:
+        for key in keys:
+            self.pos_qty.setdefault(key, 0)
+            self.episode_seq.setdefault(key, 0)
+        for chunk in _key_chunks(keys):
+            cond, params = _key_in_sql(chunk)
+            cur.execute(
+                f"""
+                SELECT stk_cd, crd_class, pos_qty, episode_seq, has_open
+                FROM position_episode_state
+                WHERE account = %s AND {cond}
+                """,
+                [self.account, *params],
+            )
+            for stk_cd, crd_class, pos_qty, episode_seq, has_open in cur.fetchall():
+                key = (stk_cd, crd_class)
+                self.pos_qty[key] = to_int(pos_qty)
+                self.episode_seq[key] = to_int(episode_seq)
+                if has_open:
+                    self.open_episode[key] = {
+                        "episode_seq": self.episode_seq[key],
+                        "persisted": True,
+                    }
 
-            # key = (stk_cd, crd_tp)
-            key = (stk_cd, crd_class)
-            pos_qty.setdefault(key, 0)
-            episode_seq.setdefault(key, 0)
+    def on_trade(self, trade: Trade) -> None:
+        key = trade.key
+        before = self.pos_qty[key]
+        after = before + trade.qty if trade.side == "BUY" else before - trade.qty
+        self.pos_qty[key] = after
+        self.dirty.add(key)
 
-            dt = _combine_dt(r.get("trade_date"), r.get("ord_tm"))
-            qty = _to_int(r.get("cntr_qty"), 0)
-            if qty <= 0:
-                continue
+        # 0 -> 양수 : episode start
+        if before == 0 and after > 0:
+            # 닫히지 않은 채 덮어써지는 episode(음수 포지션 경유)는 전체 재생성과 같게 버린다
+            prev = self.open_episode.get(key)
+            if prev and prev["persisted"]:
+                self.pending.append(
+                    (
+                        self.delete_sql,
+                        (
+                            trade.stk_cd,
+                            trade.crd_class,
+                            prev["episode_seq"],
+                            self.account,
+                        ),
+                    )
+                )
 
-            before = pos_qty[key]
-            after = before + qty if side == "BUY" else before - qty
-            pos_qty[key] = after
-
-            # 0 -> 양수 : episode start
-            if before == 0 and after > 0:
-                episode_seq[key] += 1
-                open_episode[key] = {
-                    "stk_cd": stk_cd,
-                    "stk_nm": stk_nm,
-                    "crd_class": crd_class,
-                    "episode_seq": episode_seq[key],
-                    "start_dt": dt,
-                    "start_qty": after,
-                }
-
-            # 양수 -> 0 : episode end
-            if before > 0 and after == 0:
-                ep = open_episode.get(key)
-                if ep:
-                    cur.execute(
-                        insert_sql,
+            self.episode_seq[key] += 1
+            self.open_episode[key] = {
+                "stk_cd": trade.stk_cd,
+                "stk_nm": trade.stk_nm,
+                "crd_class": trade.crd_class,
+                "episode_seq": self.episode_seq[key],
+                "start_dt": trade.dt,
+                "start_qty": after,
+                "persisted": False,
+            }
+
+        # 양수 -> 0 : episode end
+        if before > 0 and after == 0:
+            ep = self.open_episode.pop(key, None)
+            if ep and ep["persisted"]:
+                self.pending.append(
+                    (
+                        self.update_sql,
+                        (
+                            trade.dt,
+                            0,
+                            trade.stk_cd,
+                            trade.crd_class,
+                            ep["episode_seq"],
+                            self.account,
+                        ),
+                    )
+                )
+            elif ep:
+                self.pending.append(
+                    (
+                        self.insert_sql,
                         (
                             ep["stk_cd"],
                             ep["stk_nm"],
                             ep["crd_class"],
                             ep["episode_seq"],
                             ep["start_dt"],
-                            dt,
+                            trade.dt,
                             ep["start_qty"],
                             0,
+                            self.account,
+                            *_episode_norm(ep),
                         ),
                     )
-                    open_episode.pop(key, None)
+                )
 
-        # 아직 종료되지 않은 episode(보유중)는 end_dt=NULL로 기록
-        for key, ep in open_episode.items():
-            cur.execute(
-                insert_sql,
+    def flush(self, cur) -> None:
+        # 순서를 유지하면서 연속된 INSERT는 multi-row로 묶어 기록
+        execute_grouped(cur, self.pending, self.batch_size)
+        self.pending = []
+
+    def save_state(self, cur) -> None:
+        # 아직 종료되지 않은 episode(보유중)는 end_dt=NULL, end_qty=현재 수량으로 기록
+        for key in sorted(self.open_episode):
+            ep = self.open_episode[key]
+            if key not in self.pos_qty:
+                continue
+            if ep["persisted"]:
+                self.pending.append(
+                    (
+                        self.update_sql,
+                        (
+                            None,
+                            self.pos_qty[key],
+                            key[0],
+                            key[1],
+                            ep["episode_seq"],
+                            self.account,
+                        ),
+                    )
+                )
+            else:
+                self.pending.append(
+                    (
+                        self.insert_sql,
+                        (
+                            ep["stk_cd"],
+                            ep["stk_nm"],
+                            ep["crd_class"],
+                            ep["episode_seq"],
+                            ep["start_dt"],
+                            None,
+                            ep["start_qty"],
+                            self.pos_qty[key],
+                            self.account,
+                            *_episode_norm(ep),
+                        ),
+                    )
+                )
+                ep["persisted"] = True
+        self.flush(cur)
+
+        executemany_batched(
+            cur,
+            """
+            INSERT INTO position_episode_state (
+              account, stk_cd, crd_class, pos_qty, episode_seq, has_open
+            )
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+              pos_qty = VALUES(pos_qty),
+              episode_seq = VALUES(episode_seq),
+              has_open = VALUES(has_open)
+            """,
+            (
                 (
-                    ep["stk_cd"],
-                    ep["stk_nm"],
-                    ep["crd_class"],
-                    ep["episode_seq"],
-                    ep["start_dt"],
-                    None,
-                    ep["start_qty"],
-                    pos_qty[key],
-                ),
+                    self.account,
+                    key[0],
+                    key[1],
+                    self.pos_qty[key],
+                    self.episode_seq[key],
+                    key in self.open_episode,
+                )
+                for key in sorted(self.pos_qty)
+            ),
+            self.batch_size,
+        )
+
+        if self.dirty:
+            _refresh_open_positions(cur, self.account, sorted(self.dirty))
+            self.dirty = set()
+
+
+def _replay_shard(
+    consumers: List[PositionConsumer],
+    items: List[Tuple[int, Trade, Tuple[bool, ...]]],
+) -> Tuple[List[PositionConsumer], List[List[Tuple[int, Any]]]]:
+    """
+    worker 프로세스에서 한 shard(key 묶음)를 재생합니다.
+    쓰기 작업은 원래 trade 순번(seq)을 붙여 반환 -> 호출 측에서 순서대로 병합
+    """
+    tagged: List[List[Tuple[int, Any]]] = [[] for _ in consumers]
+    for seq, trade, mask in items:
+        for consumer, out, receive in zip(consumers, tagged, mask):
+            if not receive:
+                continue
+            consumer.on_trade(trade)
+            out.extend((seq, op) for op in consumer.pending)
+            consumer.pending.clear()
+    return consumers, tagged
+
+
+def _replay_sharded(
+    consumers: List[PositionConsumer],
+    shards: Dict[Tuple[str, str], List[Tuple[int, Trade, Tuple[bool, ...]]]],
+    workers: int,
+) -> None:
+    """
+    key별 trade 묶음을 workers개 shard로 나눠 ProcessPoolExecutor에서 재생하고,
+    상태는 consumer에 되돌리고 쓰기 작업은 seq 순서로 병합해 pending에 넣습니다.
+    (결과 row와 기록 순서는 단일 스레드 재생과 동일)
+    """
+    # trade 수 기준 greedy 분배 (결정적 순서)
+    groups: List[List[Tuple[str, str]]] = [[] for _ in range(workers)]
+    loads = [0] * workers
+    for key in sorted(shards, key=lambda k: (-len(shards[k]), k)):
+        i = loads.index(min(loads))
+        groups[i].append(key)
+        loads[i] += len(shards[key])
+
+    jobs = []
+    for keys in groups:
+        if not keys:
+            continue
+        items = sorted(
+            (item for key in keys for item in shards[key]), key=itemgetter(0)
+        )
+        jobs.append(([c.spawn(keys) for c in consumers], items))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_replay_shard, *zip(*jobs)))
+
+    for i, consumer in enumerate(consumers):
+        for children, _ in results:
+            consumer.absorb(children[i])
+        merged = heapq.merge(*(tagged[i] for _, tagged in results), key=itemgetter(0))
+        consumer.pending.extend(op for _, op in merged)
+
+
+def run_position_engine(
+    conn: pymysql.connections.Connection,
+    consumers: List[PositionConsumer],
+    start_date: Optional[str] = None,  # 'YYYY-MM-DD'
+    end_date: Optional[str] = None,  # 'YYYY-MM-DD'
+    full_rebuild: bool = False,
+    batch_size: int = DEFAULT_REPLAY_BATCH_SIZE,
+    workers: int = 1,
+    bulk: bool = False,
+    commit: bool = True,
+) -> None:
+    """
+    account_trade_history를 한 번만 읽고, 각 row를 한 번만 디코딩하여 여러 consumer에 전달합니다.
+    - consumer마다 position_checkpoints의 watermark가 따로 있으며,
+      가장 이른 watermark부터 읽어서 각자 watermark 이후 trade만 받습니다.
+    - checkpoint가 없거나 full_rebuild면 해당 consumer는 reset 후 처음부터 재생
+      (start_date는 모든 consumer가 처음부터 재생할 때만 적용)
+    - trade는 batch_size 단위로 스트리밍되므로 메모리는 이력 길이가 아니라 미청산 lot 수에 비례
+    - workers > 1: (stk_cd, crd_class)별로 trade를 나눠 프로세스 풀에서 재생 (full rebuild/백필용,
+      재생 구간 trade를 메모리에 모은 뒤 결과를 원래 trade 순서로 합쳐 기록)
+    - bulk=True: 처음부터 재생하는 consumer는 결과를 LOAD DATA LOCAL INFILE 로 적재
+      (local infile 불가 시 batched INSERT, get_connection(local_infile=True) 필요)
+    - consumer들은 같은 계좌를 다루며 해당 계좌 trade만 재생합니다.
+    - commit=False: 호출하는 쪽에서 commit (단, reset의 TRUNCATE / bulk 테이블 교체는
+      암묵적 commit이라 처음부터 재생하는 경우엔 트랜잭션이 끊김)
+    """
+    account = consumers[0].account
+    if any(c.account != account for c in consumers):
+        raise ValueError("consumers must share one account")
+
+    with conn.cursor() as cur:
+        # 1) consumer별 시작 상태 준비
+        resumed: List[Optional[Dict[str, Any]]] = []
+        for consumer in consumers:
+            checkpoint = _resume_checkpoint(
+                cur, consumer.checkpoint_name, full_rebuild, account
             )
+            if checkpoint is None:
+                consumer.reset(cur, bulk=bulk)
+            resumed.append(checkpoint)
+
+        if any(cp is None for cp in resumed):
+            scan_from = None
+        else:
+            scan_from = min(resumed, key=_watermark)
+        if not all(cp is None for cp in resumed):
+            start_date = None
+        where_sql, params = _trade_where(scan_from, start_date, end_date, account)
+
+        # 2) 가장 이른 watermark 이후분을 batch 단위로 스트리밍하며 단일 패스로 전달
+        progress = [dict(cp) if cp else {"max_source_id": 0} for cp in resumed]
+        loaded_keys: set = set()
+        # sharded 모드: key별로 (seq, trade, 받을 consumer mask)를 모아 뒀다가 병렬 재생
+        shards: Dict[Tuple[str, str], List[Tuple[int, Trade, Tuple[bool, ...]]]] = {}
+        seq = 0
+        for rows in _iter_trade_pages(cur, where_sql, params, batch_size):
+            trades = [_decode_trade(r) for r in rows]
+
+            # batch에서 처음 등장한 key만 상태 로드
+            new_keys = sorted({t.key for t in trades if t is not None} - loaded_keys)
+            loaded_keys.update(new_keys)
+            for consumer in consumers:
+                consumer.load_state(cur, new_keys)
+
+            for row, trade in zip(rows, trades):
+                source_id = to_int(row[0])
+                sort_key = (row[1], row[2] or "", source_id)
+                mask = []
+                for checkpoint, prog in zip(resumed, progress):
+                    if checkpoint is not None and sort_key <= _watermark(checkpoint):
+                        mask.append(False)
+                        continue
+                    _advance_checkpoint(prog, source_id, row[1], row[2])
+                    mask.append(True)
+
+                if trade is None:
+                    continue
+                if workers > 1:
+                    shards.setdefault(trade.key, []).append((seq, trade, tuple(mask)))
+                    seq += 1
+                    continue
+                for consumer, receive in zip(consumers, mask):
+                    if receive:
+                        consumer.on_trade(trade)
+
+            # 3) batch마다 모아둔 쓰기 작업 기록 -> 메모리는 미청산 상태 + 1 batch 수준
+            for consumer in consumers:
+                consumer.flush(cur)
+
+        if shards:
+            _replay_sharded(consumers, shards, workers)
+            for consumer in consumers:
+                consumer.flush(cur)
+
+        # 4) 다음 실행을 위한 상태/watermark 저장
+        for consumer, prog in zip(consumers, progress):
+            consumer.save_state(cur)
+            if "last_id" in prog:
+                _save_checkpoint(cur, consumer.checkpoint_name, prog, account)
+
+    if commit:
+        conn.commit()
+
+
+def build_lifo_lot_matches(
+    conn: pymysql.connections.Connection,
+    start_date: Optional[str] = None,  # 'YYYY-MM-DD' (full rebuild 시에만 사용)
+    end_date: Optional[str] = None,  # 'YYYY-MM-DD'
+    full_rebuild: bool = False,
+    bulk: bool = False,
+    account: str = DEFAULT_ACCOUNT,
+) -> None:
+    """
+    account_trade_history를 읽어서 lot_matches를 (LIFO)로 생성합니다.
+    - 증분(기본): watermark 이후 trade만 재생하여 저장된 미청산 스택에서 이어서 매칭 -> append
+    - full_rebuild=True (또는 checkpoint 없음 / watermark 이전 trade 유입): 처음부터 재생성
+      (bulk=True면 LOAD DATA로 staging 적재 후 lot_matches와 교체)
+    두 경로는 같은 lot_matches row를 만듭니다.
+    """
+    run_position_engine(
+        conn,
+        [LifoLotMatcher(account=account)],
+        start_date=start_date,
+        end_date=end_date,
+        full_rebuild=full_rebuild,
+        bulk=bulk,
+    )
+
+
+def build_position_episodes(
+    conn: pymysql.connections.Connection,
+    end_date: Optional[str] = None,  # 'YYYY-MM-DD'
+    full_rebuild: bool = False,
+    account: str = DEFAULT_ACCOUNT,
+) -> None:
+    """
+    position_episodes를 증분 유지합니다. (full_rebuild=True면 계좌분 삭제 후 전체 재생성)
+    """
+    run_position_engine(
+        conn,
+        [EpisodeTracker(account=account)],
+        end_date=end_date,
+        full_rebuild=full_rebuild,
+    )
+
+
+def build_positions(
+    conn: pymysql.connections.Connection,
+    end_date: Optional[str] = None,  # 'YYYY-MM-DD'
+    full_rebuild: bool = False,
+    batch_size: int = DEFAULT_REPLAY_BATCH_SIZE,
+    workers: int = 1,
+    bulk: bool = False,
+    account: str = DEFAULT_ACCOUNT,
+    commit: bool = True,
+) -> None:
+    """
+    계좌의 lot_matches와 position_episodes를 account_trade_history 한 번의 스캔으로 함께 갱신합니다.
+    workers > 1 이면 종목별로 나눠 병렬 재생 (full rebuild 등 재생 구간이 클 때)
+    """
+    run_position_engine(
+        conn,
+        [LifoLotMatcher(account=account), EpisodeTracker(account=account)],
+        end_date=end_date,
+        full_rebuild=full_rebuild,
+        batch_size=batch_size,
+        workers=workers,
+        bulk=bulk,
+        commit=commit,
+    )
+
+
+def rewind_positions(
+    cur, source_ids: List[int], account: str = DEFAULT_ACCOUNT
+) -> List[Tuple[str, str]]:
+    """
+    이미 재생된 trade row(source_ids)의 체결수량/단가가 바뀌었을 때 그 row의 (stk_cd, crd_class)만
+    처음부터 watermark까지 다시 재생합니다. (다른 key와 checkpoint는 그대로)
+    LIFO 매칭 / episode는 key끼리 독립이라 결과는 전체 재생성과 같고, 비용은 그 key의 이력 길이
+    - checkpoint를 FOR UPDATE로 읽어 같은 계좌의 다른 재생과 트랜잭션 단위로 직렬화
+    - checkpoint가 없는 consumer는 다음 build_positions가 어차피 처음부터 재생하므로 건너뜀
+    - commit은 호출하는 쪽에서
+    return: 다시 재생한 key (아직 재생 전인 row뿐이면 빈 목록)
+    """
+    if not source_ids:
+        return []
+    consumers: List[PositionConsumer] = [
+        LifoLotMatcher(account=account),
+        EpisodeTracker(account=account),
+    ]
+    active = []
+    for consumer in consumers:
+        checkpoint = _load_checkpoint(cur, consumer.checkpoint_name, account, lock=True)
+        if checkpoint is not None:
+            active.append((consumer, checkpoint))
+    if not active:
+        return []
+    scan_to = _watermark(max((cp for _, cp in active), key=_watermark))
+
+    placeholders = ", ".join(["%s"] * len(source_ids))
+    cur.execute(
+        f"""
+        SELECT DISTINCT stk_cd, crd_class
+        FROM account_trade_history
+        WHERE account = %s AND id IN ({placeholders})
+          AND {_TRADE_SORT_KEY} <= (%s, %s, %s)
+        """,
+        [account, *source_ids, *scan_to],
+    )
+    raw_keys = list(cur.fetchall())
+    if not raw_keys:
+        return []
+    # 파생 테이블 key는 _decode_trade와 같이 공백 제거한 값
+    keys = sorted({((s or "").strip(), (c or "").strip()) for s, c in raw_keys})
+    for consumer, _ in active:
+        consumer.clear_keys(cur, keys)
+        consumer.load_state(cur, keys)
+
+    for chunk in _key_chunks(raw_keys):
+        cond, params = _key_in_sql(chunk)
+        cur.execute(
+            f"""
+            SELECT {_TRADE_COLUMNS}
+            FROM account_trade_history
+            WHERE account = %s AND {cond}
+              AND {_TRADE_SORT_KEY} <= (%s, %s, %s)
+            ORDER BY trade_date ASC, COALESCE(ord_tm, '') ASC, id ASC
+            """,
+            [account, *params, *scan_to],
+        )
+        for row in cur.fetchall():
+            trade = _decode_trade(row)
+            if trade is None:
+                continue
+            sort_key = (row[1], row[2] or "", trade.source_id)
+            for consumer, checkpoint in active:
+                if sort_key <= _watermark(checkpoint):
+                    consumer.on_trade(trade)
+        for consumer, _ in active:
+            consumer.flush(cur)
+
+    for consumer, _ in active:
+        consumer.save_state(cur)
+    return keys
+
+
+class LivePositionEngine:
+    """
+    실시간 체결을 한 건씩 받아 lot_matches / position_episodes를 바로 갱신합니다.
+    (build_positions 배치 재생과 같은 consumer / checkpoint를 공유)
+    - 새 주문 row: 정렬상 watermark 뒤이고 다른 미반영 row가 없으면 그 key 상태만 읽어 즉시 처리,
+      아니면 배치 재생(build_positions)으로 따라잡음
+      (row의 누적 체결수량/평균단가로 처리, 실시간 이전에 REST로 일부 체결이 저장된 경우 포함)
+    - 이미 반영된 주문의 추가 체결: 누적 row가 바뀌었으므로 그 key만 다시 재생(rewind_positions)
+      -> 부분 체결이 여러 번 와도 결과는 전체 재생성과 같음
+    - 체결마다 checkpoint를 FOR UPDATE로 읽고 key 상태도 DB에서 읽으므로(메모리에 들고 있지 않음)
+      같은 계좌를 데몬 / cron의 build_positions / REST 수집이 같이 갱신해도 트랜잭션 단위로 직렬화됨
+    """
+
+    def __init__(
+        self, conn: pymysql.connections.Connection, account: str = DEFAULT_ACCOUNT
+    ) -> None:
+        self.conn = conn
+        self.account = account
+        self.sync()
+
+    def sync(self) -> None:
+        """
+        account_trade_history에 쌓인 미반영 trade를 배치 재생으로 반영
+        """
+        build_positions(self.conn, account=self.account)
+
+    def _has_other_unseen(
+        self, cur, source_id: int, checkpoints: List[Dict[str, Any]]
+    ) -> bool:
+        cur.execute(
+            """
+            SELECT 1 FROM account_trade_history
+            WHERE account = %s AND id > %s AND id <> %s
+            LIMIT 1
+            """,
+            (
+                self.account,
+                min(cp["max_source_id"] for cp in checkpoints),
+                source_id,
+            ),
+        )
+        return cur.fetchone() is not None
+
+    def apply_fill(self, row: Tuple) -> None:
+        """
+        row: upsert 직후의 account_trade_history row (_TRADE_COLUMNS 순서, 이번 체결까지 누적)
+        """
+        trade = _decode_trade(row)
+        if trade is None:
+            return
+        source_id = trade.source_id
+        sort_key = (row[1], row[2] or "", source_id)
+        consumers: List[PositionConsumer] = [
+            LifoLotMatcher(account=self.account),
+            EpisodeTracker(account=self.account),
+        ]
+
+        with self.conn.cursor() as cur:
+            checkpoints = [
+                _load_checkpoint(cur, c.checkpoint_name, self.account, lock=True)
+                or {"max_source_id": 0}
+                for c in consumers
+            ]
+            if not any(source_id > cp["max_source_id"] for cp in checkpoints):
+                # 이미 재생된 주문의 추가 체결
+                rewind_positions(cur, [source_id], account=self.account)
+                self.conn.commit()
+                return
+
+            behind = any(
+                "last_id" in cp and sort_key <= _watermark(cp) for cp in checkpoints
+            )
+            if behind or self._has_other_unseen(cur, source_id, checkpoints):
+                # 이번 체결까지 row에 누적되어 있으므로 배치 재생이 같이 반영
+                self.conn.commit()
+                self.sync()
+                return
+
+            for consumer, cp in zip(consumers, checkpoints):
+                consumer.load_state(cur, [trade.key])
+                consumer.on_trade(trade)
+                consumer.flush(cur)
+                consumer.save_state(cur)
+                _advance_checkpoint(cp, source_id, row[1], row[2])
+                _save_checkpoint(cur, consumer.checkpoint_name, cp, self.account)
 
-    conn.commit()
+        self.conn.commit()
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+import pymysql
+from db.bulk import DEFAULT_BATCH_SIZE, executemany_batched
+
+# 원본 응답(raw_json)은 raw_payloads 테이블에 압축해서 한 번만 저장하고
+# account_summary / holdings / realized_pnl_daily 에는 raw_ref(내용 hash)만 남김
+CODEC_ZLIB = "zlib"
+ZLIB_LEVEL = 6
+
+# raw_json 컬럼을 raw_ref로 옮길 수 있는 테이블 -> PK 컬럼
+RAW_TABLES = {
+    "account_summary": "account_id",
+    "holdings": "id",
+    "realized_pnl_daily": "id",
+}
+
+
+def _canonical(obj: Any) -> str:
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False)
+
+
+def payload_hash(obj: Any) -> str:
+    """
+    응답 내용 hash (key 순서와 무관, raw_payloads의 key)
+    """
+    return hashlib.sha256(_canonical(obj).encode()).hexdigest()
+
+
+def store_payloads(
+    cur, payloads: Iterable[Any], batch_size: int = DEFAULT_BATCH_SIZE
+) -> List[str]:
+    """
+    payload들을 압축해 raw_payloads에 저장 (이미 있는 hash는 건너뜀)
+    return: 입력 순서대로 raw_ref
+    """
+    refs: List[str] = []
+    rows: Dict[str, tuple] = {}
+    for obj in payloads:
+        text = _canonical(obj)
+        ref = hashlib.sha256(text.encode()).hexdigest()
+        refs.append(ref)
+        if ref not in rows:
+            raw = text.encode()
+            rows[ref] = (ref, CODEC_ZLIB, len(raw), zlib.compress(raw, ZLIB_LEVEL))
+
+    executemany_batched(
+        cur,
+        """
+        INSERT INTO raw_payloads (payload_hash, codec, raw_size, body)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE payload_hash = payload_hash
+        """,
+        rows.values(),
+        batch_size,
+    )
+    return refs
+
+
+def store_payload(cur, obj: Any) -> str:
+    return store_payloads(cur, [obj])[0]
+
+
+def _decode(codec: str, body: bytes) -> Any:
+    if codec == CODEC_ZLIB:
+        return json.loads(zlib.decompress(body).decode())
+    raise ValueError(f"unknown payload codec: {codec}")
+
+
+def load_payloads(
+    conn: pymysql.connections.Connection, refs: Iterable[Optional[str]]
+) -> Dict[str, Any]:
+    """
+    raw_ref 목록 -> {raw_ref: 원본 응답(dict)} (None / 없는 ref는 결과에서 빠짐)
+    """
+    wanted = sorted({ref for ref in refs if ref})
+    found: Dict[str, Any] = {}
+    with conn.cursor() as cur:
+        for i in range(0, len(wanted), DEFAULT_BATCH_SIZE):
+            chunk = wanted[i : i + DEFAULT_BATCH_SIZE]
+            cur.execute(
+                f"""
+                SELECT payload_hash, codec, body FROM raw_payloads
+                WHERE payload_hash IN ({', '.join(['%s'] * len(chunk))})
+                """,
+                chunk,
+            )
+            for ref, codec, body in cur.fetchall():
+                found[ref] = _decode(codec, body)
+    return found
+
+
+def load_payload(conn: pymysql.connections.Connection, ref: Optional[str]) -> Any:
+    """
+    raw_ref 하나의 원본 응답 (없으면 None)
+    """
+    return load_payloads(conn, [ref]).get(ref) if ref else None
+
+
+def load_row_payloads(
+    conn: pymysql.connections.Connection, table: str, ids: Iterable[int]
+) -> Dict[int, Any]:
+    """
+    테이블 row id -> 원본 응답. raw_ref가 없는 옛 row는 raw_json을 그대로 읽음
+    """
+    pk = RAW_TABLES[table]
+    ids = list(ids)
+    if not ids:
+        return {}
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT {pk}, raw_ref, raw_json FROM {table}
+            WHERE {pk} IN ({', '.join(['%s'] * len(ids))})
+            """,
+            ids,
+        )
+        rows = cur.fetchall()
+    payloads = load_payloads(conn, (row[1] for row in rows))
+    return {
+        row[0]: (
+            payloads.get(row[1]) if row[1] else (json.loads(row[2]) if row[2] else None)
+        )
+        for row in rows
+    }
+
+
+def archive_raw_json(
+    conn: pymysql.connections.Connection,
+    table: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """
+    기존 row의 raw_json을 raw_payloads로 옮기고 raw_json을 비움 (batch마다 commit)
+    return: 옮긴 row 수
+    """
+    pk = RAW_TABLES[table]
+    moved = 0
+    with conn.cursor() as cur:
+        while True:
+            cur.execute(
+                f"""
+                SELECT {pk}, raw_json FROM {table}
+                WHERE raw_json IS NOT NULL
+                ORDER BY {pk}
+                LIMIT %s
+                """,
+                (batch_size,),
+            )
+            rows = cur.fetchall()
+            if not rows:
+                return moved
+            refs = store_payloads(cur, (json.loads(row[1]) for row in rows))
+            cur.executemany(
+                f"UPDATE {table} SET raw_ref = %s, raw_json = NULL WHERE {pk} = %s",
+                [(ref, row[0]) for ref, row in zip(refs, rows)],
+            )
+            conn.commit()
+            moved += len(rows)
@@ -0,0 +1,135 @@
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+import pymysql
+from config.accounts import DEFAULT_ACCOUNT
+from utils.parsers import to_int
+
+# 주문체결(type 00) 실시간 FID
+FID_ORD_NO = "9203"  # 주문번호
+FID_STK_CD = "9001"  # 종목코드 (A005930 형태, REST 조회의 stk_cd와 같음)
+FID_ORI_ORD_NO = "904"  # 원주문번호
+FID_STK_NM = "302"  # 종목명
+FID_ORD_QTY = "900"  # 주문수량
+FID_ORD_UV = "901"  # 주문가격
+FID_ORD_REMNQ = "902"  # 미체결수량
+FID_CNTR_AMT = "903"  # 체결누계금액
+FID_IO_TP = "905"  # 주문구분 (+매수 / -매도 ...)
+FID_TRDE_TP = "906"  # 매매구분
+FID_ORD_TM = (
+    "908"  # 주문/체결시간 HHMMSS (접수 이벤트는 주문시간, 체결 이벤트는 체결시간)
+)
+FID_CNTR_QTY = "911"  # 체결량 (누적)
+FID_UNIT_PX = "914"  # 단위체결가
+FID_UNIT_QTY = "915"  # 단위체결량
+FID_ORD_STATUS = "913"  # 주문상태 (접수 / 체결 / 확인 ...)
+FID_CRD_TP = "917"  # 신용구분
+
+
+def _hhmmss(tm: str) -> str:
+    return f"{tm[0:2]}:{tm[2:4]}:{tm[4:6]}" if len(tm) == 6 else tm
+
+
+def parse_order_time(values: Dict[str, str]) -> Optional[Tuple[str, str]]:
+    """
+    접수 이벤트면 (주문번호, 주문시간 HH:MM:SS), 아니면 None
+    REST 조회의 ord_tm(주문시간)과 같은 값을 체결 row에 쓰기 위해 체결 전에 받아 둠
+    """
+    if (values.get(FID_ORD_STATUS) or "").strip() != "접수":
+        return None
+    ord_no = (values.get(FID_ORD_NO) or "").strip()
+    tm = (values.get(FID_ORD_TM) or "").strip()
+    if not ord_no or not tm:
+        return None
+    return ord_no, _hhmmss(tm)
+
+
+def parse_fill(
+    values: Dict[str, str],
+    trade_date: date,
+    order_times: Optional[Dict[str, str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    실시간 주문체결 values -> account_trade_history 형태 dict
+    접수/확인/취소처럼 이번에 체결된 수량이 없는 이벤트는 None
+    order_times: parse_order_time으로 모아 둔 주문번호 -> 주문시간 (ord_tm).
+      체결 이벤트의 908은 체결시간이라 cntr_tm으로 따로 두고, 접수를 못 받은 주문만 ord_tm 대신 씀
+      (이미 저장된 주문이면 save_live_fill이 기존 ord_tm을 유지)
+    """
+    unit_qty = abs(to_int(values.get(FID_UNIT_QTY)))
+    if unit_qty <= 0:
+        return None
+
+    cntr_qty = abs(to_int(values.get(FID_CNTR_QTY)))
+    cntr_amt = abs(to_int(values.get(FID_CNTR_AMT)))
+    unit_px = abs(to_int(values.get(FID_UNIT_PX)))
+    tm = (values.get(FID_ORD_TM) or "").strip()
+    stk_cd = (values.get(FID_STK_CD) or "").strip()
+    ord_no = (values.get(FID_ORD_NO) or "").strip()
+
+    return {
+        "ord_no": ord_no,
+        "ori_ord_no": (values.get(FID_ORI_ORD_NO) or "").strip(),
+        # REST 수집(account_trade_history)과 같은 값 그대로: 다르면 같은 종목이 다른 key로 재생됨
+        "stk_cd": stk_cd,
+        "stk_nm": (values.get(FID_STK_NM) or "").strip(),
+        "io_tp_nm": (values.get(FID_IO_TP) or "").strip().lstrip("+-"),
+        "trde_tp": (values.get(FID_TRDE_TP) or "").strip(),
+        "crd_tp": (values.get(FID_CRD_TP) or "").strip(),
+        "ord_qty": abs(to_int(values.get(FID_ORD_QTY))),
+        "ord_uv": abs(to_int(values.get(FID_ORD_UV))),
+        "ord_tm": (order_times or {}).get(ord_no) or _hhmmss(tm),
+        "ord_remnq": abs(to_int(values.get(FID_ORD_REMNQ))),
+        "cntr_qty": cntr_qty,
+        # 주문 row의 체결단가는 누적 평균 (조회 API의 cntr_uv와 같은 의미)
+        "cntr_uv": round(cntr_amt / cntr_qty) if cntr_qty else unit_px,
+        "trade_date": trade_date,
+        "unit_qty": unit_qty,
+        "unit_px": unit_px,
+        "cntr_tm": _hhmmss(tm),
+    }
+
+
+def save_live_fill(
+    conn: pymysql.connections.Connection,
+    fill: Dict[str, Any],
+    account: str = DEFAULT_ACCOUNT,
+) -> Tuple:
+    """
+    체결 이벤트를 account_trade_history 주문 row에 반영 (같은 주문의 추가 체결은 누적 수량/단가 갱신,
+    ord_tm 등 주문 정보는 처음 INSERT 때만 씀,
+    MySQL은 UPDATE 절을 왼쪽부터 적용하므로 cntr_uv를 cntr_qty보다 먼저 비교)
+    return: 갱신된 row (position_service._TRADE_COLUMNS 순서, LivePositionEngine.apply_fill 입력)
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO account_trade_history (
+                ord_no, ori_ord_no, stk_cd, stk_nm, io_tp_nm, trde_tp, crd_tp,
+                ord_qty, ord_uv, ord_tm, ord_remnq, cntr_qty, cntr_uv, trade_date,
+                account
+            )
+            VALUES (
+                %(ord_no)s, %(ori_ord_no)s, %(stk_cd)s, %(stk_nm)s, %(io_tp_nm)s,
+                %(trde_tp)s, %(crd_tp)s, %(ord_qty)s, %(ord_uv)s, %(ord_tm)s,
+                %(ord_remnq)s, %(cntr_qty)s, %(cntr_uv)s, %(trade_date)s,
+                %(account)s
+            )
+            ON DUPLICATE KEY UPDATE
+                ord_remnq = VALUES(ord_remnq),
+                cntr_uv = IF(VALUES(cntr_qty) >= cntr_qty, VALUES(cntr_uv), cntr_uv),
+                cntr_qty = GREATEST(cntr_qty, VALUES(cntr_qty))
+            """,
+            {**fill, "account": account},
+        )
+        cur.execute(
+            """
+            SELECT id, trade_date, ord_tm, stk_cd, stk_nm, crd_class,
+                   io_tp_nm, cntr_qty, cntr_uv
+            FROM account_trade_history
+            WHERE account = %s AND ord_no = %s AND trade_date = %s
+            """,
+            (account, fill["ord_no"], fill["trade_date"]),
+        )
+        row = cur.fetchone()
+    return row
@@ -0,0 +1,55 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config.api_endpoints import FLOAT, INT, STR, STR_OR_EMPTY, STR_OR_NONE, Field
+from utils.parsers import to_float, to_int
+
+# kind -> item 값 하나를 변환하는 함수 (STR은 변환 없음: None)
+_CONVERTERS: Dict[str, Optional[Callable[[Any], Any]]] = {
+    INT: to_int,
+    FLOAT: to_float,
+    STR: None,
+    STR_OR_EMPTY: lambda v: v or "",
+    STR_OR_NONE: lambda v: v or None,
+}
+
+
+def _converters(
+    fields: Sequence[Field],
+) -> Tuple[Tuple[str, Optional[Callable[[Any], Any]]], ...]:
+    """
+    fields -> (item key, 변환 함수) tuple (DB 컬럼 순서, kind 조회는 여기서 한 번만)
+    """
+    pairs = []
+    for f in fields:
+        if f.kind not in _CONVERTERS:
+            raise ValueError(f"알 수 없는 필드 kind: {f.column}={f.kind!r}")
+        pairs.append((f.key, _CONVERTERS[f.kind]))
+    return tuple(pairs)
+
+
+class Decoder:
+    """
+    endpoint 필드 schema(config.api_endpoints)로 한 번 만들어 두고 재사용하는 응답 변환기
+    - row(item): item 하나 -> tuple (columns 순서)
+    - page(items, suffix): 페이지 전체를 한 번에 tuple 목록으로 (suffix: 모든 row 끝에 붙일 값)
+    """
+
+    def __init__(self, fields: Sequence[Field]):
+        self.fields = tuple(fields)
+        self.columns = tuple(f.column for f in self.fields)
+        self._pairs = _converters(self.fields)
+
+    def row(self, item: Dict[str, Any]) -> Tuple:
+        get = item.get
+        return tuple(
+            [
+                get(key) if convert is None else convert(get(key))
+                for key, convert in self._pairs
+            ]
+        )
+
+    def page(self, items: Iterable[Dict[str, Any]], suffix: Tuple = ()) -> List[Tuple]:
+        row = self.row
+        if suffix:
+            return [row(item) + suffix for item in items]
+        return [row(item) for item in items]
@@ -1,15 +1,192 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from typing import List, Optional
 from zoneinfo import ZoneInfo
 
-import yfinance as yf
+KST = ZoneInfo("Asia/Seoul")
+
+# KRX 휴장일 (주말 제외). 매년 12월 거래소 공지(다음 해 휴장일)를 보고 추가
+# 표 늘리는 법: 새 연도 휴장일을 아래에 "# YYYY" 묶음으로 넣고 CALENDAR_END를 그 해 12월 31일로
+# (과거 연도를 넣으면 CALENDAR_START도 그 해 1월 1일로). 추가한 날짜는
+# is_korea_trading_day_by_samsung 으로 장 마감 후 며칠 확인해 볼 수 있음
+KRX_HOLIDAYS = frozenset(
+    date.fromisoformat(d)
+    for d in (
+        # 2024
+        "2024-01-01",  # 신정
+        "2024-02-09",  # 설날 연휴
+        "2024-02-12",  # 설날 대체공휴일
+        "2024-03-01",  # 삼일절
+        "2024-04-10",  # 국회의원 선거
+        "2024-05-01",  # 근로자의 날
+        "2024-05-06",  # 어린이날 대체공휴일
+        "2024-05-15",  # 부처님오신날
+        "2024-06-06",  # 현충일
+        "2024-08-15",  # 광복절
+        "2024-09-16",  # 추석 연휴
+        "2024-09-17",  # 추석
+        "2024-09-18",  # 추석 연휴
+        "2024-10-01",  # 국군의 날 (임시공휴일)
+        "2024-10-03",  # 개천절
+        "2024-10-09",  # 한글날
+        "2024-12-25",  # 성탄절
+        "2024-12-31",  # 연말 휴장
+        # 2025
+        "2025-01-01",  # 신정
+        "2025-01-27",  # 임시공휴일
+        "2025-01-28",  # 설날 연휴
+        "2025-01-29",  # 설날
+        "2025-01-30",  # 설날 연휴
+        "2025-03-03",  # 삼일절 대체공휴일
+        "2025-05-01",  # 근로자의 날
+        "2025-05-05",  # 어린이날 / 부처님오신날
+        "2025-05-06",  # 대체공휴일
+        "2025-06-03",  # 대통령 선거
+        "2025-06-06",  # 현충일
+        "2025-08-15",  # 광복절
+        "2025-10-03",  # 개천절
+        "2025-10-06",  # 추석
+        "2025-10-07",  # 추석 연휴
+        "2025-10-08",  # 추석 대체공휴일
+        "2025-10-09",  # 한글날
+        "2025-12-25",  # 성탄절
+        "2025-12-31",  # 연말 휴장
+        # 2026
+        "2026-01-01",  # 신정
+        "2026-02-16",  # 설날 연휴
+        "2026-02-17",  # 설날
+        "2026-02-18",  # 설날 연휴
+        "2026-03-02",  # 삼일절 대체공휴일
+        "2026-05-01",  # 근로자의 날
+        "2026-05-05",  # 어린이날
+        "2026-05-25",  # 부처님오신날 대체공휴일
+        "2026-06-03",  # 지방선거
+        "2026-08-17",  # 광복절 대체공휴일
+        "2026-09-24",  # 추석 연휴
+        "2026-09-25",  # 추석
+        "2026-10-05",  # 개천절 대체공휴일
+        "2026-10-09",  # 한글날
+        "2026-12-25",  # 성탄절
+        "2026-12-31",  # 연말 휴장
+    )
+)
+
+# 휴장일 표가 있는 구간. 밖의 날짜는 평일이면 거래일로 보고 연도마다 한 번 경고
+CALENDAR_START = date(2024, 1, 1)
+CALENDAR_END = date(2026, 12, 31)
+
+_warned_years: set = set()
+
+
+def _build_index():
+    days = []
+    # _rank[i]: CALENDAR_START + i일 이전 거래일 수 (i는 끝 다음날까지)
+    rank = []
+    d = CALENDAR_START
+    while d <= CALENDAR_END:
+        rank.append(len(days))
+        if d.weekday() < 5 and d not in KRX_HOLIDAYS:
+            days.append(d)
+        d += timedelta(days=1)
+    rank.append(len(days))
+    return tuple(days), tuple(rank)
+
+
+_TRADING_DAYS, _RANK = _build_index()
+
+
+def _offset(d: date) -> int:
+    return (d - CALENDAR_START).days
+
+
+def _covered(d: date) -> bool:
+    return CALENDAR_START <= d <= CALENDAR_END
+
+
+def _warn_uncovered(d: date) -> None:
+    if d.year in _warned_years:
+        return
+    _warned_years.add(d.year)
+    print(
+        f"WARN: KRX 휴장일 표({CALENDAR_START} ~ {CALENDAR_END}) 밖의 날짜 {d}: "
+        f"{d.year}년은 평일을 모두 거래일로 봅니다. utils/krx_calendar.py KRX_HOLIDAYS에 추가하세요."
+    )
+
+
+def today_kst() -> date:
+    return datetime.now(KST).date()
+
+
+def is_trading_day(d: Optional[date] = None) -> bool:
+    """
+    KRX 거래일 여부 (기본: 오늘 KST). 네트워크 조회 없음
+    CALENDAR_START ~ CALENDAR_END 밖이면 휴장일을 알 수 없어 평일은 모두 거래일로 보고 경고
+    (표를 늘리는 법은 KRX_HOLIDAYS 위 주석 참고)
+    """
+    d = d or today_kst()
+    if not _covered(d):
+        _warn_uncovered(d)
+    return d.weekday() < 5 and d not in KRX_HOLIDAYS
+
+
+def next_trading_day(d: Optional[date] = None, include_today: bool = False) -> date:
+    """
+    d 다음 거래일 (include_today=True면 d가 거래일일 때 d)
+    """
+    d = d or today_kst()
+    if not include_today:
+        d += timedelta(days=1)
+    if _covered(d):
+        i = _RANK[_offset(d)]
+        if i < len(_TRADING_DAYS):
+            return _TRADING_DAYS[i]
+        d = CALENDAR_END + timedelta(days=1)
+    while not is_trading_day(d):
+        d += timedelta(days=1)
+    return d
+
+
+def trading_days_between(start: date, end: date) -> List[date]:
+    """
+    start ~ end(양끝 포함) 거래일 목록
+    """
+    if start > end:
+        return []
+    if _covered(start) and _covered(end):
+        return list(_TRADING_DAYS[_RANK[_offset(start)] : _RANK[_offset(end) + 1]])
+    days = []
+    d = start
+    while d <= end:
+        if _covered(d):
+            # 표가 있는 구간은 잘라서 한 번에
+            stop = min(end, CALENDAR_END)
+            days.extend(trading_days_between(d, stop))
+            d = stop + timedelta(days=1)
+            continue
+        if is_trading_day(d):
+            days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+def count_trading_days(start: date, end: date) -> int:
+    """
+    start ~ end(양끝 포함) 거래일 수 (표 구간 안이면 O(1))
+    """
+    if start > end:
+        return 0
+    if _covered(start) and _covered(end):
+        return _RANK[_offset(end) + 1] - _RANK[_offset(start)]
+    return len(trading_days_between(start, end))
 
 
 def is_korea_trading_day_by_samsung() -> bool:
     """
     삼성전자(005930.KS) 일봉의 마지막 날짜가 오늘이면 거래일로 본다.
+    (휴장일 표 검증용. 장 시작 전에는 오늘 봉이 없어 휴장으로 나옴)
     """
-    kst = ZoneInfo("Asia/Seoul")
-    today = datetime.now(kst).date()
+    import yfinance as yf
+
+    today = today_kst()
 
     ticker = yf.Ticker("005930.KS")  # 삼성전자
     hist = ticker.history(period="7d")  # 최근 7거래일만 조회
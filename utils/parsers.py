@@ -1,10 +1,71 @@
-def to_int(value: str) -> int:
-    if value is None or value == "":
-        return 0
-    return int(float(value))
+from decimal import Decimal
+from typing import Any, Optional
+
+
+def to_int(value: Any, default: int = 0) -> int:
+    """
+    키움 숫자 문자열("-000000012345", "+0001") -> int
+    float를 거치지 않아 큰 금액도 정확하고, 소수부가 있으면 버림
+    """
+    if value is None:
+        return default
+    if isinstance(value, int):
+        return value
+    if not isinstance(value, str):
+        return int(value)
+    s = value.strip()
+    if not s:
+        return default
+    try:
+        return int(s)
+    except ValueError:
+        return int(Decimal(s))
+
+
+def to_decimal(value: Any, default: Decimal = Decimal("0")) -> Decimal:
+    if value is None:
+        return default
+    if isinstance(value, Decimal):
+        return value
+    s = str(value).strip()
+    if not s:
+        return default
+    return Decimal(s)
 
 
 def to_float(value: str) -> float:
     if value is None or value == "":
         return 0.0
     return float(value)
+
+
+# 종목 / 현금·신용 구분 정규화 (db.schema의 정규화 컬럼 backfill SQL과 같은 규칙)
+def norm_stk_cd(stk_cd: Optional[str]) -> str:
+    """
+    "A005930 " -> "005930"
+    """
+    s = (stk_cd or "").strip()
+    return s[1:] if s.startswith("A") else s
+
+
+def norm_stk_nm(stk_nm: Optional[str]) -> str:
+    """
+    신용 잔고 표시 '*' 제거: "*삼성전자" -> "삼성전자"
+    """
+    return (stk_nm or "").strip().lstrip("*").strip()
+
+
+def norm_crd_class(crd_class: Optional[str]) -> str:
+    """
+    체결 이력 crd_class -> 'CASH' / 'CREDIT' (빈 값은 현금)
+    """
+    return (crd_class or "").strip() or "CASH"
+
+
+def holding_crd_class(loan_dt: Optional[str], stk_nm: Optional[str]) -> str:
+    """
+    잔고 row는 구분 필드가 없어 대출일 / 종목명 앞 '*'로 신용 여부 판정
+    """
+    if (loan_dt or "").strip() or (stk_nm or "").startswith("*"):
+        return "CREDIT"
+    return "CASH"
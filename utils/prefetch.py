@@ -0,0 +1,74 @@
+import queue
+import threading
+from typing import Generic, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+class Prefetcher(Generic[T]):
+    """
+    iterable을 백그라운드 스레드에서 미리 최대 depth개까지 당겨오는 iterator
+    생성하는 순간부터 당겨오기 시작하므로, 소비하기 전에 다른 작업을 하는 동안에도 진행됨
+    (예: 체결내역 페이지를 받는 동안 DB에 이전 페이지를 INSERT)
+    생산자 쪽 예외는 소비하는 쪽에서 그대로 다시 발생
+    (generator처럼 예외를 한 번 올린 뒤나 close() 뒤에는 StopIteration)
+    """
+
+    def __init__(self, iterable: Iterable[T], depth: int = 2) -> None:
+        self._queue: queue.Queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._finished = False
+        self._thread = threading.Thread(
+            target=self._produce, args=(iterable,), daemon=True
+        )
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, iterable: Iterable[T]) -> None:
+        try:
+            for item in iterable:
+                if not self._put(item):
+                    return
+        except BaseException as e:
+            self._put(_Failed(e))
+            return
+        self._put(_DONE)
+
+    def __iter__(self) -> Iterator[T]:
+        return self
+
+    def __next__(self) -> T:
+        # 끝난 뒤에는 생산 스레드가 더 넣지 않으므로 queue를 기다리면 멈춤
+        if self._finished:
+            raise StopIteration
+        item = self._queue.get()
+        if item is _DONE:
+            self._finished = True
+            raise StopIteration
+        if isinstance(item, _Failed):
+            self._finished = True
+            raise item.error
+        return item
+
+    def close(self) -> None:
+        """
+        소비를 중단할 때 생산 스레드도 멈춤 (받아둔 항목은 버림)
+        """
+        self._stop.set()
+        self._thread.join()
+        self._finished = True
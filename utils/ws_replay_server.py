@@ -0,0 +1,66 @@
+# 기록된 실시간 메시지를 재생하는 로컬 websocket 서버 (clients.realtime 테스트용)
+#   python -m utils.ws_replay_server fills.jsonl --port 8765
+#   python realtime.py --url ws://127.0.0.1:8765
+# fills.jsonl: 한 줄에 REAL 메시지 하나 (realtime.py --record 로 기록한 파일)
+
+import argparse
+import asyncio
+import json
+
+from websockets.asyncio.server import ServerConnection, serve
+
+
+def _handler(path: str, delay: float):
+    async def handle(ws: ServerConnection) -> None:
+        login = json.loads(await ws.recv())
+        if login.get("trnm") != "LOGIN" or not login.get("token"):
+            await ws.send(
+                json.dumps(
+                    {"trnm": "LOGIN", "return_code": 1, "return_msg": "no token"}
+                )
+            )
+            return
+        await ws.send(json.dumps({"trnm": "LOGIN", "return_code": 0, "return_msg": ""}))
+
+        reg = json.loads(await ws.recv())
+        await ws.send(
+            json.dumps(
+                {"trnm": reg.get("trnm", "REG"), "return_code": 0, "return_msg": ""}
+            )
+        )
+
+        # 클라이언트가 PING을 그대로 돌려보내는지도 같이 확인
+        await ws.send(json.dumps({"trnm": "PING"}))
+        pong = json.loads(await ws.recv())
+        if pong.get("trnm") != "PING":
+            print(f"WARN: PING 응답 없음: {pong}")
+
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                await ws.send(line)
+                if delay:
+                    await asyncio.sleep(delay)
+
+        # 실제 서버처럼 연결은 유지 (닫으면 클라이언트가 재접속해서 같은 체결을 다시 받음)
+        await ws.wait_closed()
+
+    return handle
+
+
+async def serve_recorded(path: str, host: str, port: int, delay: float) -> None:
+    async with serve(_handler(path, delay), host, port) as server:
+        print(f"ws://{host}:{port} 에서 {path} 재생 대기")
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="기록된 REAL 메시지 jsonl")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="메시지 사이 간격(초)")
+    args = parser.parse_args()
+    asyncio.run(serve_recorded(args.path, args.host, args.port, args.delay))